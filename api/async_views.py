@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import views
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Возвращает пул потоков обработки запросов на чтение размером
+    `settings.ASYNC_READ_WORKERS`, создавая его при первом вызове
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_READ_WORKERS, thread_name_prefix='async-read'
+            )
+    return _executor
+
+def render(view, request, args, kwargs):
+    """
+    Выполняет представление DRF и рендеринг его ответа в потоке
+    пула. Соединения потока с базой данных закрываются по тем же
+    правилам (`CONN_MAX_AGE`), что и по окончании обычного запроса
+    """
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+def async_read_view(view_class):
+    """
+    Создаёт асинхронное представление из класса представления DRF.
+
+    DRF не поддерживает асинхронные представления, поэтому
+    асинхронное представление Django выполняет обработку запроса
+    представлением DRF (аутентификацию, запросы ORM, сериализацию
+    и рендеринг JSON) в пуле из `settings.ASYNC_READ_WORKERS` потоков.
+    Цикл событий ASGI-приложения при этом только принимает
+    соединения и отправляет готовые ответы, а число потоков
+    не зависит от числа соединений
+
+    Parameters
+    ----------
+    view_class : rest_framework.views.APIView
+        Класс представления на чтение
+
+    Returns
+    -------
+    view : coroutine function
+        Асинхронное представление
+    """
+    view = view_class.as_view()
+
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        #Контекст запроса (выбранная реплика `api.routers`) переносится в поток пула:
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            get_executor(), functools.partial(context.run, render, view, request, args, kwargs)
+        )
+
+    async_view.view_class = view_class
+    async_view.csrf_exempt = True
+    return async_view
+
+user = async_read_view(views.UserView)
+users = async_read_view(views.Users)
+organizations = async_read_view(views.Organizations)
@@ -0,0 +1,253 @@
+import copy
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import models
+
+class UserCache:
+    """
+    Кэш в памяти процесса с ограниченным временем жизни записей,
+    относящихся к пользователям. Записи индексируются первичным
+    ключом пользователя и удаляются по нему при сохранении или
+    удалении пользователя (`api.signals`).
+
+    Сигналы удаляют записи только в текущем процессе: в остальных
+    процессах записи живут не дольше `ttl` секунд
+
+    Parameters
+    ----------
+    ttl_setting : str
+        Имя настройки времени жизни записей в секундах
+    size_setting : str
+        Имя настройки наибольшего числа записей
+    """
+
+    def __init__(self, ttl_setting, size_setting):
+        self.ttl_setting = ttl_setting
+        self.size_setting = size_setting
+        self.entries = {}
+        self.keys_by_pk = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns
+        -------
+        entry : tuple или None
+            Первичный ключ пользователя и значение записи. None,
+            если записи нет или её время жизни истекло
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, pk, value = entry
+            if expires < time.monotonic():
+                self.discard(key)
+                return None
+        return pk, value
+
+    def set(self, key, pk, value):
+        """
+        Сохраняет значение на время жизни записей. При заполнении
+        кэша вытесняется самая старая запись
+        """
+        ttl = getattr(settings, self.ttl_setting)
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.discard(key)
+            while self.entries and len(self.entries) >= getattr(settings, self.size_setting):
+                self.discard(next(iter(self.entries)))
+            self.entries[key] = (time.monotonic() + ttl, pk, value)
+            self.keys_by_pk.setdefault(pk, set()).add(key)
+
+    def invalidate(self, pk, keep=None):
+        """
+        Удаляет записи пользователя
+
+        Parameters
+        ----------
+        pk : int
+            Первичный ключ пользователя
+        keep : callable или None
+            Функция, принимающая значение записи и возвращающая
+            True для записей, которые остаются в кэше
+        """
+        with self.lock:
+            for key in list(self.keys_by_pk.get(pk, ())):
+                if keep is None or not keep(self.entries[key][2]):
+                    self.discard(key)
+
+    def pop(self, key):
+        with self.lock:
+            self.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_pk.clear()
+
+    def discard(self, key):
+        #Вызывается под блокировкой `self.lock`:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            keys = self.keys_by_pk.get(entry[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_pk[entry[1]]
+
+class CredentialCache(UserCache):
+    """
+    Кэш успешных проверок пароля для `CachedBasicAuthentication`.
+    Ключ записи - дайджест BLAKE2b учётных данных с солью, случайной
+    для каждого процесса, значение - хэш пароля пользователя
+    на момент проверки. Сами учётные данные не хранятся.
+
+    Счётчики `hits` и `misses` считают аутентификации без
+    проверки пароля и с проверкой пароля соответственно
+    """
+
+    def __init__(self, ttl_setting, size_setting):
+        super(CredentialCache, self).__init__(ttl_setting, size_setting)
+        self.salt = os.urandom(16)
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, userid, password):
+        """
+        Returns
+        -------
+        digest : bytes
+            Дайджест учётных данных
+        """
+        digest = hashlib.blake2b(key=self.salt, digest_size=32)
+        digest.update(userid.encode())
+        digest.update(b'\0')
+        digest.update(password.encode())
+        return digest.digest()
+
+    def count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """
+        Returns
+        -------
+        stats : dict
+            Счётчики попаданий и промахов и число записей
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries)}
+
+    def clear(self):
+        super(CredentialCache, self).clear()
+        with self.lock:
+            self.hits = self.misses = 0
+
+PRINCIPALS = UserCache('JWT_PRINCIPAL_CACHE_TTL', 'JWT_PRINCIPAL_CACHE_SIZE')
+CREDENTIALS = CredentialCache('BASIC_AUTH_CACHE_TTL', 'BASIC_AUTH_CACHE_SIZE')
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Класс аутентификации по JWT, заменяющий
+    `rest_framework_simplejwt.authentication.JWTAuthentication`.
+    Пользователь токена выбирается из базы данных не чаще
+    одного раза в `settings.JWT_PRINCIPAL_CACHE_TTL` секунд
+    (`PRINCIPALS`).
+
+    При `settings.JWT_STATELESS_AUTHENTICATION` пользователь
+    не выбирается вовсе: `request.user` - экземпляр
+    `rest_framework_simplejwt.models.TokenUser`, построенный по
+    утверждениям токена. В этом режиме деактивация пользователя
+    вступает в силу только после истечения срока действия токена
+    """
+
+    def get_user(self, validated_token):
+        """
+        Parameters
+        ----------
+        validated_token : rest_framework_simplejwt.tokens.Token
+            Проверенный токен
+
+        Returns
+        -------
+        user : api.models.User или rest_framework_simplejwt.models.TokenUser
+            Пользователь токена
+        """
+        if settings.JWT_STATELESS_AUTHENTICATION:
+            if jwt_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+            return TokenUser(validated_token)
+
+        try:
+            key = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        entry = PRINCIPALS.get(key)
+        if entry is not None:
+            return copy.copy(entry[1])
+        user = super(CachedJWTAuthentication, self).get_user(validated_token)
+        PRINCIPALS.set(key, user.pk, copy.copy(user))
+        return user
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Класс аутентификации по логину и паролю, заменяющий
+    `rest_framework.authentication.BasicAuthentication`.
+    Успешная проверка пароля запоминается в `CREDENTIALS` на
+    `settings.BASIC_AUTH_CACHE_TTL` секунд: повторный запрос с теми
+    же учётными данными выбирает пользователя по первичному ключу
+    и не вычисляет хэш пароля (PBKDF2).
+
+    Запись не используется и удаляется, если хэш пароля
+    пользователя изменился, пользователь деактивирован или удалён
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        """
+        Parameters
+        ----------
+        userid : str
+            Email пользователя
+        password : str
+            Пароль
+
+        Returns
+        -------
+        credentials : tuple
+            Пользователь и None
+        """
+        digest = CREDENTIALS.digest(userid, password)
+        entry = CREDENTIALS.get(digest)
+        if entry is not None:
+            pk, password_hash = entry
+            user = models.User.objects.filter(pk=pk).first()
+            if (
+                user is not None and user.is_active and user.password == password_hash
+                and getattr(user, models.User.USERNAME_FIELD) == userid
+            ):
+                CREDENTIALS.count(hit=True)
+                return (user, None)
+            CREDENTIALS.pop(digest)
+
+        CREDENTIALS.count(hit=False)
+        user, auth = super(CachedBasicAuthentication, self).authenticate_credentials(userid, password, request)
+        CREDENTIALS.set(digest, user.pk, user.password)
+        return (user, auth)
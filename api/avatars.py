@@ -0,0 +1,296 @@
+import base64
+import binascii
+import io
+import math
+import os
+import random
+import re
+import shutil
+import string
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, UnidentifiedImageError
+
+from . import renditions
+from .storage import HashedAvatarStorage
+
+MIMES_IMAGE = {
+    'BMP': 'image/bmp', 'DIB': 'image/bmp', 'GIF': 'image/gif', 
+    'TIFF': 'image/tiff', 'JPEG': 'image/jpeg', 'JPG': 'image/jpeg', 
+    'PPM': 'image/x-portable-anymap', 'PNG': 'image/png', 'PCX': 'image/x-pcx', 
+    'EPS': 'application/postscript', 'JPEG2000': 'image/jp2', 
+    'ICNS': 'image/icns', 'ICO': 'image/x-icon', 'MPEG': 'video/mpeg', 
+    'MPO': 'image/mpo', 'PALM': 'image/palm', 'PDF': 'application/pdf', 
+    'PSD': 'image/vnd.adobe.photoshop', 'SGI': 'image/sgi', 'TGA': 'image/x-tga', 
+    'WEBP': 'image/webp', 'XBM': 'image/xbm', 'XPM': 'image/xpm'
+}
+NAME_LENGTH = 20
+REQUIRED_HEIGHT = 200
+REQUIRED_WIDTH = 200
+REDUCING_GAP = 2.0
+USER_AVATARS_PATH = settings.MEDIA_ROOT
+PER_USER_STORAGE = 'per_user'
+HASHED_STORAGE = 'hashed'
+
+StagedAvatar = namedtuple('StagedAvatar', ('path', 'filename'))
+
+class InvalidAvatar(Exception):
+    """
+    Исключение файла аватара, который не может быть обработан:
+    повторная обработка такого файла не имеет смысла
+    """
+
+def avatar_filename(filename):
+    """
+    Возвращает имя файла аватара. Если имя содержит символы, 
+    кроме [a-zA-Z0-9], генерируется случайное имя с тем же
+    расширением
+
+    Parameters
+    ----------
+    filename : str
+        Имя файла, переданное клиентом
+
+    Returns
+    -------
+    filename : str
+        Имя файла для записи в директорию пользователя
+    """
+    basename, extension = os.path.splitext(filename)
+    if not basename or not re.fullmatch(r'([a-zA-Z0-9])+', basename):
+        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=NAME_LENGTH)  + [extension])
+    return filename
+
+def stage(avatar):
+    """
+    Сохраняет присланный клиентом файл аватара в директорию
+    `settings.AVATAR_UPLOADS_ROOT` до его обработки
+
+    Parameters
+    ----------
+    avatar : dict или django.core.files.uploadedfile.UploadedFile
+        Словарь `{'filename': ..., 'file_bytes': ...}` с содержимым
+        в base64 либо загруженный файл
+
+    Returns
+    -------
+    staged : StagedAvatar или None
+        Путь к сохранённому файлу и имя файла клиента. None, если
+        расширение файла не относится к изображениям
+    """
+    uploaded = isinstance(avatar, UploadedFile)
+    if not uploaded and not isinstance(avatar, dict):
+        return None
+    filename = avatar.name if uploaded else avatar.get('filename') or ''
+    _, extension = os.path.splitext(filename)
+    if extension[1:].upper() not in MIMES_IMAGE:
+        return None
+
+    os.makedirs(settings.AVATAR_UPLOADS_ROOT, exist_ok=True)
+    path = os.path.join(settings.AVATAR_UPLOADS_ROOT, f'{uuid.uuid4().hex}{extension}')
+
+    with open(path, 'wb') as f:
+        if uploaded:
+            for chunk in avatar.chunks():
+                f.write(chunk)
+            avatar.close()
+        else:
+            try:
+                writeble_bytes = bytes(avatar.get('file_bytes')[2:-1], 'utf-8')
+                f.write(base64.b64decode(writeble_bytes))
+            except (TypeError, binascii.Error):
+                pass
+    return StagedAvatar(path, filename)
+
+def discard(staged):
+    """
+    Удаляет сохранённый до обработки файл аватара
+    """
+    try:
+        os.remove(staged.path)
+    except FileNotFoundError:
+        pass
+
+def cover(image, size):
+    """
+    Уменьшает изображение так, чтобы оно покрывало область
+    `size`, и обрезает его по центру до этой области. Изображение
+    не увеличивается: если одна из его сторон меньше области,
+    по этой стороне сохраняется исходный размер.
+
+    Изображения JPEG декодируются сразу в уменьшенном масштабе
+    (`Image.draft`), остальные форматы сначала уменьшаются в целое
+    число раз (`reducing_gap`) и лишь затем передискретизируются
+
+    Parameters
+    ----------
+    image : PIL.Image.Image
+        Открытое, ещё не декодированное изображение
+    size : tuple
+        Ширина и высота области
+
+    Returns
+    -------
+    image : PIL.Image.Image
+        Изображение размером не больше `size`
+    """
+    target_width, target_height = size
+    width, height = image.size
+    scale = min(1.0, max(target_width / width, target_height / height))
+    image.draft(image.mode, (math.ceil(width * scale), math.ceil(height * scale)))
+
+    #После уменьшенного декодирования размеры изображения меняются:
+    width, height = image.size
+    scale = min(1.0, max(target_width / width, target_height / height))
+    crop_width = min(width, target_width / scale)
+    crop_height = min(height, target_height / scale)
+    left = (width - crop_width) / 2
+    top = (height - crop_height) / 2
+    return image.resize(
+        (round(crop_width * scale), round(crop_height * scale)),
+        Image.LANCZOS,
+        box=(left, top, left + crop_width, top + crop_height),
+        reducing_gap=REDUCING_GAP
+    )
+
+def process(user, staged):
+    """
+    Приводит сохранённый файл аватара к размеру не больше
+    `REQUIRED_WIDTH` x `REQUIRED_HEIGHT`, записывает его в 
+    директорию пользователя `<MEDIA_ROOT>/<User.email>` (прежние
+    файлы аватаров пользователя удаляются) либо, если
+    `settings.AVATAR_STORAGE` равно `HASHED_STORAGE`, в хранилище,
+    адресуемое по содержимому, и устанавливает пользователю.
+
+    Файл открывается один раз и декодируется один раз. Итоговый
+    файл записывается один раз: уменьшенное изображение
+    кодируется сразу в хранилище, а файл, который не требует
+    уменьшения, переносится туда без перекодирования
+
+    Parameters
+    ----------
+    user : api.models.User
+        Пользователь
+    staged : StagedAvatar
+        Сохранённый до обработки файл аватара
+
+    Raises
+    ------
+    InvalidAvatar
+        Если содержимое файла не является изображением или
+        изображение больше `settings.AVATAR_MAX_PIXELS` пикселей
+    """
+    filename = avatar_filename(staged.filename)
+
+    try:
+        image = Image.open(staged.path)
+    except UnidentifiedImageError:
+        raise InvalidAvatar('File is not an image')
+
+    with image:
+        width, height = image.size
+        if width * height > settings.AVATAR_MAX_PIXELS:
+            raise InvalidAvatar('Image is too large')
+
+        resized = image_format = None
+        if width > REQUIRED_WIDTH or height > REQUIRED_HEIGHT:
+            resized = cover(image, (REQUIRED_WIDTH, REQUIRED_HEIGHT))
+            image_format = image.format if image.format in Image.SAVE else 'PNG'
+            if image_format != image.format:
+                filename = f'{os.path.splitext(filename)[0]}.png'
+
+    if settings.AVATAR_STORAGE == HASHED_STORAGE:
+        name = store_hashed(staged, filename, resized, image_format)
+    else:
+        name = store_per_user(user, staged, filename, resized, image_format)
+
+    user.avatar.name = name
+    user.save(update_fields=['avatar'])
+
+def store_per_user(user, staged, filename, resized, image_format):
+    """
+    Записывает аватар в директорию пользователя `<MEDIA_ROOT>/<User.email>`,
+    удаляя прежние файлы аватаров пользователя и их рендеринги
+
+    Parameters
+    ----------
+    user : api.models.User
+        Пользователь
+    staged : StagedAvatar
+        Сохранённый до обработки файл аватара
+    filename : str
+        Имя файла аватара
+    resized : PIL.Image.Image или None
+        Уменьшенное изображение. None, если файл записывается
+        без перекодирования
+    image_format : str или None
+        Формат уменьшенного изображения
+
+    Returns
+    -------
+    name : str
+        Путь к файлу относительно `MEDIA_ROOT`
+    """
+    THIS_USER_AVATAR_PATH = USER_AVATARS_PATH.joinpath(f"{user.email}")
+
+    #При загрузке нового аватара производится очистка папки с файлами 
+    #больше неактуальных аватаров пользователя:
+    if THIS_USER_AVATAR_PATH.exists():
+        for file_ in os.listdir(THIS_USER_AVATAR_PATH):
+            _, extension = os.path.splitext(file_)
+            if extension[1:].upper() in MIMES_IMAGE:
+                os.remove(THIS_USER_AVATAR_PATH.joinpath(file_))
+                renditions.discard(f'{user.email}/{file_}')
+    THIS_USER_AVATAR_PATH.mkdir(mode=0o777, parents=True, exist_ok=True)
+
+    file_path = THIS_USER_AVATAR_PATH.joinpath(filename)
+    if resized is not None:
+        resized.save(file_path, image_format)
+        discard(staged)
+    else:
+        shutil.move(staged.path, file_path)
+    return file_path.relative_to(USER_AVATARS_PATH).as_posix()
+
+def store_hashed(staged, filename, resized, image_format):
+    """
+    Записывает аватар в хранилище, адресуемое по содержимому
+    (`api.storage.HashedAvatarStorage`). Если файл с тем же
+    содержимым уже есть, запись не производится. Прежние файлы
+    аватаров не удаляются: их удаляет команда `gc_avatars`
+
+    Parameters
+    ----------
+    staged : StagedAvatar
+        Сохранённый до обработки файл аватара
+    filename : str
+        Имя файла аватара: используется только его расширение
+    resized : PIL.Image.Image или None
+        Уменьшенное изображение. None, если файл записывается
+        без перекодирования
+    image_format : str или None
+        Формат уменьшенного изображения
+
+    Returns
+    -------
+    name : str
+        Путь к файлу относительно `MEDIA_ROOT`
+    """
+    storage = HashedAvatarStorage(location=USER_AVATARS_PATH)
+    _, extension = os.path.splitext(filename)
+
+    if resized is not None:
+        buffer = io.BytesIO()
+        resized.save(buffer, image_format)
+        content = ContentFile(buffer.getvalue())
+    else:
+        content = File(open(staged.path, 'rb'))
+
+    with content:
+        name = storage.hashed_name(content, extension)
+        name = storage.save(name, content)
+    discard(staged)
+    return name
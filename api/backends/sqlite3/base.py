@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Движок SQLite, начинающий транзакции `transaction.atomic`
+    командой `BEGIN IMMEDIATE` при `settings.SQLITE_IMMEDIATE_TRANSACTIONS`.
+
+    Транзакция `BEGIN` (DEFERRED) получает блокировку записи только
+    при первой записи. Если другой процесс успел начать запись,
+    SQLite не ждёт `busy_timeout`, а сразу возвращает
+    `database is locked`. Транзакция `BEGIN IMMEDIATE` получает
+    блокировку записи в начале и ждёт её до `busy_timeout`.
+    Читатели в режиме WAL при этом не блокируются
+    """
+
+    def _start_transaction_under_autocommit(self):
+        if settings.SQLITE_IMMEDIATE_TRANSACTIONS:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super(DatabaseWrapper, self)._start_transaction_under_autocommit()
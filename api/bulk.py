@@ -0,0 +1,272 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from . import hashing, models, serializers, signals
+
+CREATED = 'created'
+ERROR = 'error'
+INSERT_BATCH_SIZE = 500
+LOOKUP_BATCH_SIZE = 500
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Возвращает пул процессов хэширования паролей размером
+    `settings.BULK_PASSWORD_WORKERS`, создавая его при первом вызове.
+    Процессы пула запускаются методом spawn: копирование (fork)
+    многопоточного процесса сервера может оставить в дочернем
+    процессе захваченные другими потоками блокировки. Процессы
+    настраиваются и хэшируют пароли функциями `api.hashing`
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.BULK_PASSWORD_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=hashing.init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'user_organizations.settings'),)
+            )
+    return _executor
+
+@atexit.register
+def shutdown_executor():
+    """
+    Останавливает пул процессов хэширования паролей, если он
+    был создан. Вызывается при завершении процесса сервера
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def hash_passwords(passwords):
+    """
+    Хэширует пароли параллельно в пуле процессов. Если пул
+    отключён (`settings.BULK_PASSWORD_WORKERS` не больше 1) или
+    его процесс аварийно завершился, пароли хэшируются в текущем
+    процессе
+
+    Parameters
+    ----------
+    passwords : list
+        Пароли в открытом виде
+
+    Returns
+    -------
+    hashes : list
+        Хэши паролей в том же порядке
+    """
+    workers = settings.BULK_PASSWORD_WORKERS
+    if workers > 1 and len(passwords) > 1:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        try:
+            return list(get_executor().map(hashing.hash_password, passwords, chunksize=chunksize))
+        except BrokenProcessPool:
+            shutdown_executor()
+    return [make_password(password) for password in passwords]
+
+def existing(model, field, values):
+    """
+    Возвращает значения поля `field`, уже занятые экземплярами модели
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+    field : str
+        Имя поля
+    values : iterable
+        Проверяемые значения
+
+    Returns
+    -------
+    values : set
+        Значения, для которых экземпляры модели существуют
+    """
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        found.update(
+            model.objects.filter(**{f'{field}__in': values[start:start + LOOKUP_BATCH_SIZE]})
+            .values_list(field, flat=True)
+        )
+    return found
+
+def validate(items, serializer_class, key, error):
+    """
+    Проверяет записи сериализатором без обращений к базе данных
+    и отмечает записи с повторяющимся в наборе значением `key`
+
+    Parameters
+    ----------
+    items : list
+        Записи, присланные клиентом
+    serializer_class : rest_framework.serializers.Serializer
+        Класс сериализатора записи
+    key : str
+        Уникальное поле записи
+    error : str
+        Описание ошибки повторяющегося значения
+
+    Returns
+    -------
+    valid : dict
+        Проверенные данные записей по индексу записи
+    results : dict
+        Отчёты об ошибках по индексу записи
+    """
+    valid, results, seen = {}, {}, set()
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': ERROR, 'errors': serializer.errors}
+            continue
+        value = serializer.validated_data[key]
+        if value in seen:
+            results[index] = {'index': index, 'status': ERROR, 'errors': {key: [error]}}
+            continue
+        seen.add(value)
+        valid[index] = serializer.validated_data
+    return valid, results
+
+def reject_existing(valid, results, model, key, error):
+    """
+    Переносит в отчёты об ошибках записи, значение `key` которых
+    уже занято в базе данных
+    """
+    taken = existing(model, key, (data[key] for data in valid.values()))
+    for index in [index for index, data in valid.items() if data[key] in taken]:
+        del valid[index]
+        results[index] = {'index': index, 'status': ERROR, 'errors': {key: [error]}}
+
+def create_users(items):
+    """
+    Создаёт пользователей из набора записей. Записи проверяются
+    без обращений к базе данных, занятые email-ы выбираются
+    пачками запросов `email__in`, пароли хэшируются в пуле процессов,
+    пользователи записываются `bulk_create` в одной транзакции.
+    Записи с ошибками не мешают созданию остальных пользователей
+
+    Parameters
+    ----------
+    items : list
+        Записи пользователей `{'email': ..., 'password': ..., ...}`
+
+    Returns
+    -------
+    results : list
+        Отчёт по каждой записи в порядке набора:
+        `{'index': ..., 'status': 'created', 'id': ..., 'email': ...}` или
+        `{'index': ..., 'status': 'error', 'errors': {...}}`
+    """
+    error = 'Such user is exist'
+    valid, results = validate(items, serializers.BulkUserSerializer, 'email', error)
+    reject_existing(valid, results, models.User, 'email', error)
+
+    indexes = list(valid)
+    hashes = hash_passwords([valid[index]['password'] for index in indexes])
+    users = {}
+    for index, password in zip(indexes, hashes):
+        data = dict(valid[index])
+        data.pop('password2', None)
+        data['password'] = password
+        users[index] = models.User(**data)
+        #`bulk_create` не вызывает `User.save`:
+        users[index].set_phone_fields()
+
+    try:
+        with transaction.atomic():
+            models.User.objects.bulk_create(users.values(), batch_size=INSERT_BATCH_SIZE)
+    except IntegrityError:
+        #Email занят параллельным запросом после проверки:
+        reject_existing(valid, results, models.User, 'email', error)
+        users = {index: user for index, user in users.items() if index in valid}
+        with transaction.atomic():
+            models.User.objects.bulk_create(users.values(), batch_size=INSERT_BATCH_SIZE)
+
+    ids = dict(
+        models.User.objects.filter(email__in=[user.email for user in users.values()])
+        .values_list('email', 'pk')
+    ) if users else {}
+    for index, user in users.items():
+        results[index] = {'index': index, 'status': CREATED, 'id': ids[user.email], 'email': user.email}
+    return [results[index] for index in range(len(items))]
+
+def create_organizations(items):
+    """
+    Создаёт организации из набора записей. Существование
+    участников и занятость названий проверяются пачками запросов,
+    организации и их участники записываются `bulk_create` в одной
+    транзакции. Версии участников увеличиваются так же, как при
+    изменении `Organization.users`
+
+    Parameters
+    ----------
+    items : list
+        Записи организаций `{'name': ..., 'description': ..., 'users': [...]}`
+
+    Returns
+    -------
+    results : list
+        Отчёт по каждой записи в порядке набора:
+        `{'index': ..., 'status': 'created', 'id': ..., 'name': ...}` или
+        `{'index': ..., 'status': 'error', 'errors': {...}}`
+    """
+    error = 'organization with this name already exists.'
+    valid, results = validate(items, serializers.BulkOrganizationSerializer, 'name', error)
+    reject_existing(valid, results, models.Organization, 'name', error)
+
+    user_ids = existing(
+        models.User, 'pk', {pk for data in valid.values() for pk in data.get('users', ())}
+    )
+    for index in list(valid):
+        missing = sorted(set(valid[index].get('users', ())) - user_ids)
+        if missing:
+            del valid[index]
+            results[index] = {
+                'index': index, 'status': ERROR,
+                'errors': {'users': [f'Invalid pk "{pk}" - object does not exist.' for pk in missing]}
+            }
+
+    def insert():
+        organizations = {
+            index: models.Organization(name=data['name'], description=data.get('description'))
+            for index, data in valid.items()
+        }
+        with transaction.atomic():
+            models.Organization.objects.bulk_create(organizations.values(), batch_size=INSERT_BATCH_SIZE)
+            ids = dict(
+                models.Organization.objects.filter(name__in=[data['name'] for data in valid.values()])
+                .values_list('name', 'pk')
+            ) if organizations else {}
+            signals.Membership.objects.bulk_create([
+                signals.Membership(organization_id=ids[data['name']], user_id=user_id)
+                for data in valid.values() for user_id in set(data.get('users', ()))
+            ], batch_size=INSERT_BATCH_SIZE)
+        return ids
+
+    try:
+        ids = insert()
+    except IntegrityError:
+        #Название занято параллельным запросом после проверки:
+        reject_existing(valid, results, models.Organization, 'name', error)
+        ids = insert()
+
+    members = {pk for data in valid.values() for pk in data.get('users', ())}
+    signals.touch(models.User, members)
+
+    for index, data in valid.items():
+        results[index] = {'index': index, 'status': CREATED, 'id': ids[data['name']], 'name': data['name']}
+    return [results[index] for index in range(len(items))]
@@ -0,0 +1,163 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import routers, serializers
+
+class RepresentationCache:
+    """
+    Класс кэша сериализованных представлений объектов модели.
+
+    Представление хранится под ключом `<prefix>:<pk>:<версия>` в кэше
+    `settings.REPRESENTATIONS_CACHE`, где версия - хэш признака версии
+    представления (`api.conditional`), прочитанного из базы данных
+    вместе с запросом. После изменения объекта его представление
+    ищется под новым ключом, поэтому кэш не нужно очищать: ни
+    чтение, завершившееся до фиксации изменения, ни кэш другого
+    процесса не вернут устаревшее представление. Так как ссылки на
+    аватары в представлении зависят от адреса, по которому пришёл
+    запрос, и от запрошенного размера аватара, значением ключа служит
+    словарь представлений по варианту запроса. Вытеснение прежних
+    версий и ограничение размера обеспечиваются бэкендом кэша:
+    `LocMemCache` для одного узла, `FileBasedCache` или `DatabaseCache`
+    для нескольких процессов
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[settings.REPRESENTATIONS_CACHE]
+
+    def key(self, pk, version):
+        digest = hashlib.sha1(repr(version).encode('utf-8')).hexdigest()
+        return f'{self.prefix}:{pk}:{digest}'
+
+    def get_or_render(self, pks, versions, variant, render, store=True):
+        """
+        Возвращает представления объектов из кэша, отсутствующие
+        в кэше представления строит функцией `render` и сохраняет
+
+        Parameters
+        ----------
+        pks : list
+            Первичные ключи объектов в порядке вывода
+        versions : dict
+            Признаки версий представлений по первичному ключу.
+            Объекты без признака версии пропускаются
+        variant : str
+            Вариант представления: базовый URI запроса и параметры,
+            от которых зависит представление
+        render : callable
+            Функция, принимающая список первичных ключей и
+            возвращающая словарь представлений по первичному ключу
+        store : bool
+            Сохранять ли построенные представления в кэше
+
+        Returns
+        -------
+        representations : list
+            Представления существующих объектов в порядке `pks`
+        """
+        keys = {pk: self.key(pk, versions[pk]) for pk in pks if pk in versions}
+        entries = self.cache.get_many(keys.values())
+
+        representations = {}
+        missing = []
+        for pk, key in keys.items():
+            entry = entries.get(key)
+            if entry is not None and variant in entry:
+                representations[pk] = entry[variant]
+            else:
+                missing.append(pk)
+
+        if missing:
+            rendered = render(missing)
+            representations.update(rendered)
+            if not store:
+                return [representations[pk] for pk in pks if pk in representations]
+            updates = {}
+            for pk, representation in rendered.items():
+                entry = dict(entries.get(keys[pk], {}))
+                entry[variant] = representation
+                updates[keys[pk]] = entry
+            self.cache.set_many(updates)
+
+        return [representations[pk] for pk in pks if pk in representations]
+
+USERS = RepresentationCache('user')
+ORGANIZATIONS = RepresentationCache('organization')
+
+class CachedRepresentationMixin:
+    """
+    Примесь для представлений, отдающих сериализованные данные
+    через `RepresentationCache`. Признаки версий представлений
+    строит функция `version_loader` из `api.conditional`. Набор
+    запросов `get_queryset` используется для построения
+    отсутствующих в кэше представлений и должен содержать
+    предварительную выборку связанных объектов. Представления,
+    построенные по данным реплики, в кэш не сохраняются.
+    Если задан класс `representation_reader` и включена настройка
+    `FAST_READ_SERIALIZERS`, представления строятся им из строк
+    `values_list`, без сериализатора
+    """
+    representation_cache = None
+    representation_reader = None
+    version_loader = None
+
+    def get_representations(self, instances, versions=None):
+        """
+        Parameters
+        ----------
+        instances : list
+            Экземпляры модели в порядке вывода, загруженные
+            с полями `version` и `modified`
+        versions : list
+            Результат `version_loader(instances)`, если он уже
+            получен для заголовков ответа
+
+        Returns
+        -------
+        representations : list
+            Сериализованные данные объектов
+        """
+        if versions is None:
+            versions = self.version_loader(instances)
+        pks = [instance.pk for instance in instances]
+        return self.representation_cache.get_or_render(
+            pks, {pk: token for pk, (token, _) in zip(pks, versions)},
+            self.get_representation_variant(), self.render_representations,
+            store=routers.read_database() not in settings.DATABASE_REPLICAS
+        )
+
+    def get_representation_variant(self):
+        """
+        Returns
+        -------
+        variant : str
+            Базовый URI запроса и размер рендеринга аватаров,
+            запрошенный параметром `avatar_size`
+        """
+        base_uri = self.request.build_absolute_uri('/') if self.request else ''
+        size = serializers.avatar_rendition_size(self.request)
+        return base_uri if size is None else f'{base_uri}|avatar_size={size}'
+
+    def render_representations(self, pks):
+        """
+        Parameters
+        ----------
+        pks : list
+            Первичные ключи объектов, отсутствующих в кэше
+
+        Returns
+        -------
+        representations : dict
+            Сериализованные данные объектов по первичному ключу
+        """
+        if self.representation_reader is not None and settings.FAST_READ_SERIALIZERS:
+            return self.representation_reader(self.get_serializer_context()).render(pks)
+        queryset = self.get_queryset().filter(pk__in=pks)
+        serializer = self.get_serializer(queryset, many=True)
+        return {representation['id']: representation for representation in serializer.data}
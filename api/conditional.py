@@ -0,0 +1,136 @@
+import hashlib
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import models
+
+Membership = models.Organization.users.through
+
+def user_versions(users):
+    """
+    Возвращает признаки версий представлений пользователей.
+    Представление пользователя включает его организации,
+    поэтому в признак входят и версии этих организаций
+
+    Parameters
+    ----------
+    users : list
+        Экземпляры модели `User`, загруженные с полями
+        `version` и `modified`
+
+    Returns
+    -------
+    versions : list
+        Список пар (признак версии, время последнего изменения)
+        в порядке `users`
+    """
+    memberships = {}
+    rows = Membership.objects.filter(user_id__in=[user.pk for user in users]).values_list(
+        'user_id', 'organization_id', 'organization__version', 'organization__modified'
+    ).order_by('user_id', 'organization_id')
+    for user_id, *organization in rows:
+        memberships.setdefault(user_id, []).append(organization)
+
+    versions = []
+    for user in users:
+        organizations = memberships.get(user.pk, [])
+        last_modified = max([user.modified] + [modified for _, _, modified in organizations])
+        token = (user.pk, user.version, user.modified.timestamp(), [
+            (pk, version, modified.timestamp()) for pk, version, modified in organizations
+        ])
+        versions.append((token, last_modified))
+    return versions
+
+def organization_versions(organizations):
+    """
+    Возвращает признаки версий представлений организаций
+
+    Parameters
+    ----------
+    organizations : list
+        Экземпляры модели `Organization`
+
+    Returns
+    -------
+    versions : list
+        Список пар (признак версии, время последнего изменения)
+        в порядке `organizations`
+    """
+    return [
+        ((organization.pk, organization.version, organization.modified.timestamp()), organization.modified)
+        for organization in organizations
+    ]
+
+class ConditionalGetMixin:
+    """
+    Примесь для представлений на чтение, которая строит
+    сильный `ETag` и `Last-Modified` по версиям объектов
+    и отвечает 304 на условные запросы до сериализации данных.
+    Представления в разных форматах (`Accept`) имеют разные `ETag`
+    """
+
+    def get_validators(self, versions, *parts):
+        """
+        Parameters
+        ----------
+        versions : list
+            Признаки версий объектов, входящих в ответ
+            (`user_versions`, `organization_versions`)
+        parts : tuple
+            Дополнительные данные, от которых зависит ответ
+
+        Returns
+        -------
+        validators : tuple
+            Значение `ETag` и время последнего изменения ответа
+            или None, если объектов нет
+        """
+        tokens = [token for token, _ in versions]
+        digest = hashlib.sha1(
+            repr((
+                self.request.build_absolute_uri(), getattr(self.request, 'accepted_media_type', None),
+                parts, tokens
+            )).encode('utf-8')
+        ).hexdigest()
+        last_modified = max((modified for _, modified in versions), default=None)
+        return f'"{digest}"', last_modified
+
+    def is_not_modified(self, etag, last_modified):
+        """
+        Проверяет заголовки `If-None-Match` и `If-Modified-Since`
+        запроса. `If-Modified-Since` учитывается только при
+        отсутствии `If-None-Match`
+
+        Returns
+        -------
+        not_modified : bool
+            True, если клиент уже имеет актуальное представление
+        """
+        if_none_match = self.request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+
+        if_modified_since = parse_http_date_safe(self.request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since is not None and last_modified is not None:
+            return int(last_modified.timestamp()) <= if_modified_since
+        return False
+
+    def conditional_response(self, etag, last_modified, data=None):
+        """
+        Возвращает ответ 304, если клиент уже имеет актуальное
+        представление, иначе ответ 200 с данными `data`.
+        Оба ответа содержат заголовки `ETag` и `Last-Modified`
+        """
+        if data is None:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept',))
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
@@ -0,0 +1,126 @@
+from . import serializers
+
+class Fieldset:
+    """
+    Класс выбора клиента: поля представления и раскрытые связи.
+
+    Связь задаётся путём через точку от сериализатора верхнего
+    уровня, например `organization_set.users`. Раскрытая связь
+    сериализуется вложенными представлениями, нераскрытая -
+    списком первичных ключей
+
+    Parameters
+    ----------
+    fields : tuple
+        Имена выбранных полей в порядке полей сериализатора
+    expanded : frozenset
+        Пути раскрытых связей
+    """
+
+    def __init__(self, fields, expanded):
+        self.fields = fields
+        self.expanded = expanded
+
+    @classmethod
+    def build(cls, serializer_class, fields=None, expand=None, depth=None):
+        """
+        Parameters
+        ----------
+        serializer_class : type
+            Класс сериализатора с полями `Meta.fields` и путями
+            связей `EXPANDABLE`
+        fields : list или None
+            Запрошенные поля. Поле `id` выбирается всегда
+        expand : list или None
+            Запрошенные пути связей. Вместе со связью раскрываются
+            и связи, через которые она проходит
+        depth : int или None
+            Наибольшая глубина раскрываемых связей
+
+        Returns
+        -------
+        fieldset : Fieldset или None
+            Выбор клиента или None, если ни один параметр
+            не задан и нужно полное представление
+        """
+        if fields is None and expand is None and depth is None:
+            return None
+        declared = serializer_class.Meta.fields
+        if fields is not None:
+            declared = tuple(name for name in declared if name == 'id' or name in fields)
+
+        expanded = set(serializer_class.EXPANDABLE)
+        if expand is not None:
+            expanded &= {
+                '.'.join(path.split('.')[:length])
+                for path in expand for length in range(1, path.count('.') + 2)
+            }
+        if depth is not None:
+            expanded = {path for path in expanded if path.count('.') < depth}
+        return cls(declared, frozenset(expanded))
+
+    def expands(self, path):
+        return path in self.expanded
+
+    @property
+    def key(self):
+        """
+        Returns
+        -------
+        key : str
+            Строка выбора для варианта представления в кэше
+        """
+        return f"fields={','.join(self.fields)}|expand={','.join(sorted(self.expanded))}"
+
+class SparseFieldsetMixin:
+    """
+    Примесь для представлений на чтение, которая позволяет клиенту
+    выбрать поля представления параметром `fields` и раскрываемые
+    связи параметрами `expand` и `depth`.
+
+    Выбор передаётся сериализатору в контексте ключом `fieldset`
+    и должен учитываться `get_queryset` представления: выбираются
+    только нужные столбцы, а для нераскрытых связей не загружаются
+    связанные объекты. Закэшированные представления разделяются
+    по выбору клиента
+    """
+
+    def get_fieldset_params(self):
+        """
+        Returns
+        -------
+        params : serializers.FieldsetSerializer
+            Сериализатор параметров `fields`, `expand` и `depth`
+            запроса. Перед получением выбора клиента представление
+            проверяет его методом `is_valid`
+        """
+        if not hasattr(self, '_fieldset_params'):
+            self._fieldset_params = serializers.FieldsetSerializer(
+                data=self.request.query_params,
+                context={'serializer_class': self.get_serializer_class()}
+            )
+        return self._fieldset_params
+
+    def get_fieldset(self):
+        """
+        Returns
+        -------
+        fieldset : Fieldset или None
+            Выбор клиента или None для полного представления
+        """
+        if not hasattr(self, '_fieldset'):
+            params = self.get_fieldset_params()
+            self._fieldset = Fieldset.build(
+                self.get_serializer_class(), **params.validated_data
+            ) if params.is_valid() else None
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super(SparseFieldsetMixin, self).get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+    def get_representation_variant(self):
+        variant = super(SparseFieldsetMixin, self).get_representation_variant()
+        fieldset = self.get_fieldset()
+        return variant if fieldset is None else f'{variant}|{fieldset.key}'
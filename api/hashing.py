@@ -0,0 +1,38 @@
+"""
+Функции процессов пула хэширования паролей `api.bulk`. Процесс,
+запущенный методом spawn, импортирует этот модуль до настройки
+Django, поэтому модуль не импортирует Django и модели приложения
+на уровне модуля
+"""
+import os
+
+def init_worker(settings_module):
+    """
+    Настраивает Django в процессе пула хэширования паролей
+
+    Parameters
+    ----------
+    settings_module : str
+        Модуль настроек родительского процесса
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+def hash_password(password):
+    """
+    Хэширует пароль `django.contrib.auth.hashers.make_password`
+    в процессе пула, настроенном `init_worker`
+
+    Parameters
+    ----------
+    password : str
+        Пароль в открытом виде
+
+    Returns
+    -------
+    hash : str
+        Хэш пароля
+    """
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
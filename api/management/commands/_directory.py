@@ -0,0 +1,165 @@
+"""
+Общие определения команд `export_directory` и `import_directory`.
+
+Формат выгрузки - JSONL, сжатый gzip. Для каждой модели
+сначала записывается строка-заголовок
+
+    {"model": "api.user", "fields": ["id", "password", ...]}
+
+после которой следуют строки значений полей в виде массивов
+JSON в том же порядке. Модели выгружаются в порядке
+`DIRECTORY_MODELS`, так что при загрузке внешние ключи
+сквозной таблицы всегда ссылаются на уже созданные записи.
+"""
+import datetime
+
+from django.conf import settings
+
+from api import models
+
+DIRECTORY_MODELS = (
+    models.User,
+    models.Organization,
+    models.Organization.users.through,
+)
+CHUNK_SIZE = 2000
+BATCH_SIZE = 2000
+
+def model_label(model):
+    """
+    Возвращает метку модели для строки-заголовка
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+
+    Returns
+    -------
+    label : str
+        Метка модели вида `api.user`
+    """
+    return model._meta.label_lower
+
+def field_names(model):
+    """
+    Возвращает имена столбцов модели в порядке `concrete_fields`,
+    который совпадает с порядком позиционных аргументов
+    конструктора модели
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+
+    Returns
+    -------
+    names : list
+        Имена атрибутов полей модели
+    """
+    return [field.attname for field in model._meta.concrete_fields]
+
+TEMPORAL_FIELDS = ('DateTimeField', 'DateField', 'TimeField')
+TEMPORAL_PARSERS = {
+    'DateTimeField': datetime.datetime.fromisoformat,
+    'DateField': datetime.date.fromisoformat,
+    'TimeField': datetime.time.fromisoformat,
+}
+
+def insert_sql(model, connection):
+    """
+    Возвращает SQL вставки одной строки модели со всеми
+    столбцами в порядке `field_names`
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+    connection : django.db.backends.base.base.BaseDatabaseWrapper
+        Соединение с базой данных
+
+    Returns
+    -------
+    sql : str
+        Параметризованный запрос INSERT
+    """
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(field.column) for field in model._meta.concrete_fields)
+    placeholders = ', '.join(['%s'] * len(model._meta.concrete_fields))
+    return f'INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+def row_preparer(model, connection):
+    """
+    Возвращает функцию, которая приводит строку выгрузки
+    к параметрам запроса вставки.
+
+    Строки, числа, логические значения и null из JSON передаются
+    драйверу базы данных как есть. Значения полей даты и времени
+    разбираются из ISO 8601 и подготавливаются самим полем модели
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+    connection : django.db.backends.base.base.BaseDatabaseWrapper
+        Соединение с базой данных
+
+    Returns
+    -------
+    prepare : callable
+        Функция, принимающая список значений строки и
+        возвращающая список параметров запроса
+    """
+    temporal = [
+        (index, value_preparer(field, connection))
+        for index, field in enumerate(model._meta.concrete_fields)
+        if field.get_internal_type() in TEMPORAL_FIELDS
+    ]
+    if not temporal:
+        return lambda row: row
+
+    def prepare(row):
+        for index, prepare_value in temporal:
+            value = row[index]
+            if value is not None:
+                row[index] = prepare_value(value)
+        return row
+    return prepare
+
+def value_preparer(field, connection):
+    """
+    Возвращает функцию подготовки значения поля даты и времени
+    из строки ISO 8601.
+
+    Базы данных без поддержки часовых поясов (SQLite, MySQL) хранят
+    время без пояса в часовом поясе соединения. Для них значения
+    `DateTimeField` переводятся в этот пояс сразу, без `get_db_prep_save`
+    поля: проверки и преобразования поля для каждого значения занимали
+    большую часть времени загрузки пользователей
+
+    Parameters
+    ----------
+    field : django.db.models.Field
+        Поле даты и времени
+    connection : django.db.backends.base.base.BaseDatabaseWrapper
+        Соединение с базой данных
+
+    Returns
+    -------
+    prepare : callable
+        Функция, принимающая строку и возвращающая параметр запроса
+    """
+    parse = TEMPORAL_PARSERS[field.get_internal_type()]
+    if field.get_internal_type() != 'DateTimeField' or not settings.USE_TZ \
+            or connection.features.supports_timezones:
+        return lambda value: field.get_db_prep_save(parse(value), connection)
+
+    tz = connection.timezone
+    adapt = connection.ops.adapt_datetimefield_value
+
+    def prepare(value):
+        value = parse(value)
+        if value.tzinfo is not None:
+            value = value.astimezone(tz).replace(tzinfo=None)
+        return adapt(value)
+    return prepare
@@ -0,0 +1,72 @@
+import datetime
+import gzip
+import json
+
+from django.core.management.base import BaseCommand
+
+from ._directory import CHUNK_SIZE, DIRECTORY_MODELS, field_names, model_label
+
+def encode_temporal(value):
+    """
+    Переводит значения даты и времени в строку ISO 8601
+    без потери микросекунд
+
+    Parameters
+    ----------
+    value : datetime.datetime, datetime.date или datetime.time
+        Значение поля модели
+
+    Returns
+    -------
+    value : str
+        Значение в формате ISO 8601
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Тип {type(value).__name__} не поддерживается выгрузкой')
+
+class Command(BaseCommand):
+    """
+    Выгружает пользователей, организации и членство в организациях
+    в сжатый файл JSONL. Строки читаются из базы данных порциями
+    через `QuerySet.iterator`, поэтому расход памяти не зависит
+    от количества строк
+    """
+    help = 'Выгружает пользователей, организации и членство в сжатый JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу выгрузки (.jsonl.gz)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество строк, читаемых из базы данных за один запрос'
+        )
+        parser.add_argument(
+            '--compresslevel', type=int, default=1,
+            help='Уровень сжатия gzip от 1 (быстрее) до 9 (компактнее)'
+        )
+
+    def handle(self, *args, **options):
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=encode_temporal)
+        total = 0
+
+        with gzip.open(options['path'], 'wt', encoding='utf-8',
+                       compresslevel=options['compresslevel']) as stream:
+            for model in DIRECTORY_MODELS:
+                names = field_names(model)
+                header = {'model': model_label(model), 'fields': names}
+                stream.write(encoder.encode(header) + '\n')
+
+                rows = (
+                    model._base_manager.order_by('pk')
+                    .values_list(*names)
+                    .iterator(chunk_size=options['chunk_size'])
+                )
+                count = 0
+                for row in rows:
+                    stream.write(encoder.encode(row) + '\n')
+                    count += 1
+
+                total += count
+                self.stdout.write(f'{model_label(model)}: {count}')
+
+        self.stdout.write(self.style.SUCCESS(f'Выгружено строк: {total}'))
@@ -0,0 +1,109 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import models, renditions
+from api.storage import HashedAvatarStorage
+
+BATCH_SIZE = 1000
+MIN_AGE = 60 * 60
+
+class Command(BaseCommand):
+    """
+    Удаляет из хранилища аватаров, адресуемого по содержимому,
+    файлы, на которые не ссылается ни один пользователь, вместе
+    с их рендерингами. Файлы
+    проверяются пачками по `--batch-size`: на каждую пачку
+    выполняется один запрос к базе данных.
+
+    Файлы моложе `--min-age` секунд не удаляются: их может
+    записывать задание обработки аватара, ещё не сохранившее
+    пользователя. Хранилище обновляет время изменения файла при
+    повторном сохранении, а время изменения проверяется ещё раз
+    непосредственно перед удалением
+    """
+    help = 'Удаляет файлы аватаров, на которые не ссылается ни один пользователь'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество файлов, проверяемых одним запросом'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=MIN_AGE,
+            help='Минимальный возраст удаляемого файла в секундах'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести количество неиспользуемых файлов'
+        )
+
+    def handle(self, *args, **options):
+        storage = HashedAvatarStorage(location=settings.MEDIA_ROOT)
+        root = storage.path(storage.directory)
+        self.deadline = deadline = time.time() - options['min_age']
+        self.checked = self.removed = 0
+
+        batch = []
+        for directory, _, files in os.walk(root):
+            for file_ in files:
+                path = os.path.join(directory, file_)
+                if os.stat(path).st_mtime > deadline:
+                    continue
+                batch.append(os.path.relpath(path, storage.location).replace(os.sep, '/'))
+                if len(batch) >= options['batch_size']:
+                    self.collect(storage, batch, options['dry_run'])
+                    batch = []
+        if batch:
+            self.collect(storage, batch, options['dry_run'])
+
+        if not options['dry_run']:
+            self.remove_empty_directories(root)
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(f'Проверено файлов: {self.checked}, {action.lower()} неиспользуемых: {self.removed}')
+
+    def collect(self, storage, names, dry_run):
+        """
+        Удаляет файлы пачки, на которые не ссылается ни один пользователь
+
+        Parameters
+        ----------
+        storage : api.storage.HashedAvatarStorage
+            Хранилище аватаров
+        names : list
+            Пути к файлам относительно корня хранилища
+        dry_run : bool
+            Не удалять файлы
+        """
+        referenced = set(
+            models.User.objects.filter(avatar__in=names).values_list('avatar', flat=True)
+        )
+        self.checked += len(names)
+        for name in names:
+            if name in referenced:
+                continue
+            try:
+                #Файл мог быть сохранён повторно после запроса к базе данных
+                if os.stat(storage.path(name)).st_mtime > self.deadline:
+                    continue
+            except FileNotFoundError:
+                continue
+            self.removed += 1
+            if not dry_run:
+                storage.delete(name)
+                renditions.discard(name)
+
+    @staticmethod
+    def remove_empty_directories(root):
+        """
+        Удаляет опустевшие директории шардов
+        """
+        for directory, _, _ in os.walk(root, topdown=False):
+            if directory == root:
+                continue
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
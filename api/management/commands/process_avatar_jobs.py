@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api import models, tasks
+
+class Command(BaseCommand):
+    """
+    Выполняет в текущем процессе задания обработки аватаров,
+    ожидающие в очереди. Используется для обработки очереди
+    отдельным процессом и для возобновления заданий, оставшихся
+    после перезапуска сервера
+    """
+    help = 'Выполняет задания обработки аватаров, ожидающие в очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue', action='store_true',
+            help='Вернуть в очередь задания, прерванные в статусе processing'
+        )
+
+    def handle(self, *args, **options):
+        jobs = models.AvatarJob.objects
+        if options['requeue']:
+            jobs.filter(status=models.AvatarJob.PROCESSING).update(status=models.AvatarJob.PENDING)
+
+        pending = list(jobs.filter(status=models.AvatarJob.PENDING).values_list('pk', flat=True))
+        for job_id in pending:
+            tasks.run(job_id)
+
+        self.stdout.write(f'Обработано заданий: {len(pending)}, в очереди: {tasks.backlog()}')
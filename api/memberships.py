@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import m2m_changed
+
+from . import models
+
+Membership = models.Organization.users.through
+LOOKUP_BATCH_SIZE = 10000
+INSERT_BATCH_SIZE = 500
+DELETE_BATCH_SIZE = 500
+
+class UsersNotFound(Exception):
+    """
+    Исключение изменения участников организации, если каких-либо
+    пользователей нет
+
+    Parameters
+    ----------
+    pks : list
+        Отсортированный список отсутствующих первичных ключей
+    """
+
+    def __init__(self, pks):
+        super(UsersNotFound, self).__init__(pks)
+        self.pks = pks
+
+def memberships(organization, user_ids):
+    """
+    Проверяет существование пользователей и их членство в
+    организации одним запросом на каждые `LOOKUP_BATCH_SIZE`
+    первичных ключей
+
+    Parameters
+    ----------
+    organization : api.models.Organization
+        Организация
+    user_ids : iterable
+        Первичные ключи пользователей
+
+    Returns
+    -------
+    memberships : dict
+        Членство в организации (bool) по первичному ключу
+        существующего пользователя
+    """
+    user_ids = list(user_ids)
+    is_member = Membership.objects.filter(organization_id=organization.pk, user_id=OuterRef('pk'))
+    found = {}
+    for start in range(0, len(user_ids), LOOKUP_BATCH_SIZE):
+        found.update(
+            models.User.objects.filter(pk__in=user_ids[start:start + LOOKUP_BATCH_SIZE])
+            .annotate(is_member=Exists(is_member))
+            .values_list('pk', 'is_member')
+        )
+    return found
+
+def send_changed(organization, action, pk_set):
+    """
+    Отправляет сигнал `m2m_changed` так же, как `Organization.users`,
+    чтобы обработчики `api.signals` обновили версии
+    """
+    m2m_changed.send(
+        sender=Membership, instance=organization, action=action, reverse=False,
+        model=models.User, pk_set=pk_set, using=Membership.objects.db
+    )
+
+def change_members(organization, add=(), remove=()):
+    """
+    Добавляет и удаляет участников организации пакетными запросами
+    к промежуточной таблице `Organization.users` в одной транзакции.
+    Пользователи, уже состоящие (не состоящие) в организации,
+    пропускаются
+
+    Parameters
+    ----------
+    organization : api.models.Organization
+        Организация
+    add : iterable
+        Первичные ключи добавляемых пользователей
+    remove : iterable
+        Первичные ключи удаляемых пользователей
+
+    Returns
+    -------
+    added : set
+        Первичные ключи добавленных пользователей
+    removed : set
+        Первичные ключи удалённых пользователей
+
+    Raises
+    ------
+    UsersNotFound
+        Если какого-либо пользователя нет
+    """
+    add, remove = set(add), set(remove)
+    with transaction.atomic():
+        found = memberships(organization, add | remove)
+        missing = sorted((add | remove) - set(found))
+        if missing:
+            raise UsersNotFound(missing)
+
+        added = {pk for pk in add if not found[pk]}
+        removed = {pk for pk in remove if found[pk]}
+
+        if added:
+            send_changed(organization, 'pre_add', added)
+            Membership.objects.bulk_create(
+                [Membership(organization_id=organization.pk, user_id=pk) for pk in added],
+                batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True
+            )
+            send_changed(organization, 'post_add', added)
+        if removed:
+            send_changed(organization, 'pre_remove', removed)
+            removed_ids = sorted(removed)
+            for start in range(0, len(removed_ids), DELETE_BATCH_SIZE):
+                Membership.objects.filter(
+                    organization_id=organization.pk,
+                    user_id__in=removed_ids[start:start + DELETE_BATCH_SIZE]
+                ).delete()
+            send_changed(organization, 'post_remove', removed)
+    return added, removed
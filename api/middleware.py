@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from . import routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class ReadReplicaMiddleware:
+    """
+    Направляет чтения представлений с атрибутом `read_replica = True`
+    (`UserView`, `Users`, `Organizations`) в реплику базы данных.
+
+    После успешного запроса на изменение данных клиент получает
+    cookie `settings.DATABASE_STICKY_COOKIE`, и в течение
+    `settings.DATABASE_STICKY_SECONDS` секунд его чтения выполняются
+    в основной базе данных: клиент видит свои изменения, даже если
+    реплика ещё не получила их
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.read_database = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if request.read_database is not None:
+                routers.read_from(None)
+
+        if (
+            settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            sticky = settings.DATABASE_STICKY_SECONDS
+            response.set_cookie(
+                settings.DATABASE_STICKY_COOKIE, f'{time.time() + sticky:.3f}',
+                max_age=sticky, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            request.method in SAFE_METHODS and getattr(view_class, 'read_replica', False)
+            and not routers.is_sticky(request)
+        ):
+            request.read_database = routers.choose_replica()
+            if request.read_database is not None:
+                routers.read_from(request.read_database)
+        return None
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.7 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ('phone', 'id')},
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone', 'id'], name='api_user_phone_28203d_idx'),
+        ),
+    ]
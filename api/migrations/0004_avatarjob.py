@@ -0,0 +1,32 @@
+# Generated by Django 3.1.7 on 2026-10-18 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_versioned_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvatarJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=400)),
+                ('filename', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('failed', 'Ошибка обработки')], db_index=True, default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avatar_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('created',),
+            },
+        ),
+    ]
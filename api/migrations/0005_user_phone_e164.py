@@ -0,0 +1,27 @@
+# Generated by Django 3.1.7 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_avatarjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_country_code',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone_country_code', 'phone', 'id'], name='api_user_phone_c_a2c7f4_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.core.exceptions import ValidationError
+from django.db import migrations
+
+from api import validators
+
+BATCH_SIZE = 1000
+
+def backfill_phones(apps, schema_editor):
+    """
+    Заполняет `phone_e164` и `phone_country_code` существующих
+    пользователей пакетами по `BATCH_SIZE` в порядке первичных
+    ключей, не загружая всю таблицу в память
+    """
+    User = apps.get_model('api', 'User')
+    users = User.objects.using(schema_editor.connection.alias).filter(phone__isnull=False).exclude(phone='')
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).order_by('pk').only('pk', 'phone')[:BATCH_SIZE])
+        if not batch:
+            break
+        for user in batch:
+            try:
+                user.phone_e164, user.phone_country_code = validators.parse_phone(user.phone)
+            except ValidationError:
+                user.phone_e164 = user.phone_country_code = None
+        User.objects.using(schema_editor.connection.alias).bulk_update(
+            batch, ['phone_e164', 'phone_country_code']
+        )
+        last_pk = batch[-1].pk
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_user_phone_e164'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_phones, migrations.RunPython.noop),
+    ]
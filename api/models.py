@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.core.exceptions import ValidationError
 from django.db import models
 
 from . import validators
@@ -84,12 +85,44 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
-class User(AbstractUser):
+class VersionedModel(models.Model):
+    """
+    Абстрактная модель с номером версии и временем последнего
+    изменения экземпляра. Версия увеличивается при каждом
+    сохранении существующего экземпляра, а при изменении
+    членства в организациях - обработчиками `api.signals`.
+
+    Используется для построения заголовков `ETag` и
+    `Last-Modified` ответов на чтение
+    """
+    version = models.PositiveIntegerField(default=1)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        Увеличивает версию существующего экземпляра и сохраняет его.
+        Если переданы `update_fields`, к ним добавляются поля
+        `version` и `modified`
+        """
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'modified'}
+        super(VersionedModel, self).save(*args, **kwargs)
+
+class User(VersionedModel, AbstractUser):
 
     username = None
     email = models.EmailField(unique=True)
     avatar = models.ImageField(blank=True, null=True, max_length=400, storage=UserAvatarStorage())
     phone = models.CharField(max_length=14, blank=True, null=True, validators=[validators.isPhoneNumber])
+    #Вычисляются из `phone` при сохранении (`set_phone_fields`):
+    phone_e164 = models.CharField(max_length=16, blank=True, null=True, editable=False, db_index=True)
+    phone_country_code = models.PositiveSmallIntegerField(blank=True, null=True, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -97,11 +130,41 @@ class User(AbstractUser):
 
     def __str__(self):
         return f'{self.email}'
+
+    def set_phone_fields(self):
+        """
+        Записывает номер телефона в формате E.164 и код страны
+        в поля `phone_e164` и `phone_country_code`. Для пустого
+        номера и номера, который нельзя перевести в международный
+        формат, поля очищаются
+        """
+        try:
+            self.phone_e164, self.phone_country_code = (
+                validators.parse_phone(self.phone) if self.phone else (None, None)
+            )
+        except ValidationError:
+            self.phone_e164 = self.phone_country_code = None
+
+    def save(self, *args, **kwargs):
+        """
+        Вычисляет поля номера телефона и сохраняет экземпляр.
+        Если `phone` входит в `update_fields`, в них добавляются
+        и вычисляемые поля
+        """
+        self.set_phone_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164', 'phone_country_code'}
+        super(User, self).save(*args, **kwargs)
     
     class Meta:
-        ordering = ('phone',)
+        ordering = ('phone', 'id')
+        indexes = [
+            models.Index(fields=['phone', 'id']),
+            models.Index(fields=['phone_country_code', 'phone', 'id']),
+        ]
     
-class Organization(models.Model):
+class Organization(VersionedModel):
 
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(max_length=1000, blank=True, null=True)
@@ -111,4 +174,36 @@ class Organization(models.Model):
         return self.name
     
     class Meta:
-        ordering = ('name',)
\ No newline at end of file
+        ordering = ('name',)
+
+class AvatarJob(models.Model):
+    """
+    Задание на обработку загруженного файла аватара пользователя.
+    Задания выполняются пулом потоков `api.tasks` или командой
+    `process_avatar_jobs`
+    """
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает обработки'),
+        (PROCESSING, 'Обрабатывается'),
+        (DONE, 'Обработано'),
+        (FAILED, 'Ошибка обработки'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='avatar_jobs')
+    source = models.CharField(max_length=400)
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user} - {self.status}'
+
+    class Meta:
+        ordering = ('created',)
@@ -0,0 +1,98 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_MODE = 'cursor'
+
+class IdCursorPagination(CursorPagination):
+    """
+    Класс постраничного отображения по курсору на первичном
+    ключе. В отличие от `PageNumberPagination` не выполняет
+    `COUNT(*)` и `OFFSET`, поэтому время получения страницы
+    не зависит от её глубины
+    """
+    ordering = 'id'
+
+class PaginationModeMixin:
+    """
+    Примесь для представлений-списков, которая позволяет
+    клиенту выбрать постраничное отображение по курсору
+    параметром строки запроса `pagination=cursor`. Без этого
+    параметра используется класс постраничного отображения
+    из настроек `REST_FRAMEWORK`
+    """
+    cursor_pagination_class = IdCursorPagination
+
+    @property
+    def paginator(self):
+        """
+        Возвращает экземпляр класса постраничного отображения
+        согласно режиму, запрошенному клиентом
+
+        Returns
+        -------
+        paginator : rest_framework.pagination.BasePagination
+            Экземпляр класса постраничного отображения
+        """
+        if not hasattr(self, '_paginator'):
+            query_params = self.request.query_params
+            cursor_mode = (
+                query_params.get('pagination') == CURSOR_MODE
+                or self.cursor_pagination_class.cursor_query_param in query_params
+            )
+            if cursor_mode:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = super(PaginationModeMixin, self).paginator
+        return self._paginator
+
+class RankedPagination(PageNumberPagination):
+    """
+    Класс постраничного отображения результатов поиска по номеру
+    страницы. Число результатов не подсчитывается: выбирается на
+    один результат больше размера страницы, и по нему определяется,
+    есть ли следующая страница
+    """
+
+    def paginate_ranked(self, search, request):
+        """
+        Parameters
+        ----------
+        search : callable
+            Функция `search(limit, offset)`, возвращающая первичные
+            ключи найденных объектов
+        request : rest_framework.request.Request
+            Запрос клиента
+
+        Returns
+        -------
+        pks : list
+            Первичные ключи объектов страницы
+        """
+        self.request = request
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message)
+        page_size = self.get_page_size(request)
+        pks = search(page_size + 1, (self.number - 1) * page_size)
+        self.has_next = len(pks) > page_size
+        return pks[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_html_context(self):
+        return {'previous_url': self.get_previous_link(), 'next_url': self.get_next_link()}
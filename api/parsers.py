@@ -0,0 +1,62 @@
+import mimetypes
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, DataAndFiles, FileUploadParser, JSONParser
+
+from . import renderers
+from .renderers import msgpack, orjson
+
+class ImageUploadParser(FileUploadParser):
+    """
+    Класс парсера тела запроса, содержащего файл изображения
+    аватара (`Content-Type: image/*`). Файл передаётся
+    в данных запроса под ключом `avatar`. Если имя файла не
+    передано заголовком `Content-Disposition`, оно строится
+    по типу содержимого
+    """
+    media_type = 'image/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data_and_files = super(ImageUploadParser, self).parse(stream, media_type, parser_context)
+        return DataAndFiles({}, {'avatar': data_and_files.files['file']})
+
+    def get_filename(self, stream, media_type, parser_context):
+        filename = super(ImageUploadParser, self).get_filename(stream, media_type, parser_context)
+        if filename:
+            return filename
+        content_type = parser_context['request'].content_type.split(';')[0].strip()
+        extension = mimetypes.guess_extension(content_type) or ''
+        return f'avatar{extension}'
+
+class ORJSONParser(JSONParser):
+    """
+    Класс парсера JSON библиотекой orjson. Тело запроса в кодировке,
+    отличной от UTF-8, и без установленной orjson разбирается
+    `rest_framework.parsers.JSONParser`
+    """
+    renderer_class = renderers.ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super(ORJSONParser, self).parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+class MessagePackParser(BaseParser):
+    """
+    Класс парсера тела запроса MessagePack
+    (`Content-Type: application/msgpack`). Требует библиотеку
+    msgpack: без неё класс не входит в `DEFAULT_PARSER_CLASSES`
+    """
+    media_type = renderers.MSGPACK_MEDIA_TYPE
+    renderer_class = renderers.MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
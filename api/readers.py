@@ -0,0 +1,191 @@
+from rest_framework.reverse import reverse
+
+from . import models, serializers
+
+#Значение первичного ключа, по которому в собранной ссылке находится место id:
+URL_PK_PLACEHOLDER = 918273645
+USER_FIELDS = ('id', 'email', 'phone', 'first_name', 'last_name', 'avatar')
+
+class AvatarAccessor:
+    """
+    Класс построения ссылки на аватар по имени файла так же,
+    как `serializers.AvatarField`, но без экземпляра `FieldFile`
+
+    Parameters
+    ----------
+    request : rest_framework.request.Request или None
+        Запрос клиента
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.size = serializers.avatar_rendition_size(request)
+        self.storage = models.User._meta.get_field('avatar').storage
+
+    def __call__(self, name):
+        if not name:
+            return None
+        if self.size is not None:
+            return reverse(
+                'avatar-rendition', kwargs={'size': self.size, 'name': name}, request=self.request
+            )
+        url = self.storage.url(name)
+        return url if self.request is None else self.request.build_absolute_uri(url)
+
+class RepresentationReader:
+    """
+    Базовый класс построения представлений на чтение из строк
+    `values_list` без сериализаторов DRF: поля не создаются для
+    каждого запроса, а значения берутся из строк запросов напрямую.
+    Представления совпадают с представлениями сериализатора
+    `serializer_class`, в том числе при выборе клиента `fieldset`
+
+    Parameters
+    ----------
+    context : dict
+        Контекст сериализатора представления с ключами
+        `request` и `fieldset`
+    """
+    serializer_class = None
+
+    def __init__(self, context):
+        self.request = context.get('request')
+        self.fieldset = context.get('fieldset')
+        self.avatar = AvatarAccessor(self.request)
+        if self.fieldset is None:
+            self.fields = self.serializer_class.Meta.fields
+        else:
+            self.fields = self.fieldset.fields
+
+    def expands(self, path):
+        return self.fieldset is None or self.fieldset.expands(path)
+
+    def load(self, queryset, columns):
+        """
+        Parameters
+        ----------
+        queryset : django.db.models.QuerySet
+            Набор запросов модели
+        columns : tuple
+            Поля модели. Поле `avatar` заменяется ссылкой на аватар
+
+        Returns
+        -------
+        representations : list
+            Словари значений полей `columns` в порядке `queryset`
+        """
+        representations = [dict(zip(columns, row)) for row in queryset.values_list(*columns)]
+        if 'avatar' in columns:
+            avatar = self.avatar
+            for representation in representations:
+                representation['avatar'] = avatar(representation['avatar'])
+        return representations
+
+    def render(self, pks):
+        """
+        Parameters
+        ----------
+        pks : list
+            Первичные ключи объектов
+
+        Returns
+        -------
+        representations : dict
+            Представления существующих объектов по первичному ключу
+        """
+        raise NotImplementedError
+
+class UserReader(RepresentationReader):
+    """
+    Класс построения представлений `serializers.UserSerializerOnlyRead`.
+    Организации пользователей и их участники выбираются по одному
+    запросу на уровень раскрытия связей
+    """
+    serializer_class = serializers.UserSerializerOnlyRead
+
+    def render(self, pks):
+        columns = tuple(name for name in self.fields if name in USER_FIELDS)
+        representations = {
+            representation['id']: representation
+            for representation in self.load(models.User.objects.filter(pk__in=pks), columns)
+        }
+        if 'organization_set' not in self.fields:
+            return representations
+
+        for representation in representations.values():
+            representation['organization_set'] = []
+        #Организации упорядочены по названию, как в предварительной выборке `organization_set`:
+        organizations = models.Organization.objects.filter(users__in=list(representations))
+        if not self.expands('organization_set'):
+            for user_id, organization_id in organizations.values_list('users', 'id'):
+                representations[user_id]['organization_set'].append(organization_id)
+            return representations
+
+        rows = organizations.values_list('users', 'id', 'name', 'description')
+        nested = {}
+        #Порядок полей `serializers.OrganizationSerializer`:
+        for user_id, organization_id, name, description in rows:
+            organization = {
+                'id': organization_id, 'users': nested.setdefault(organization_id, []),
+                'name': name, 'description': description,
+            }
+            representations[user_id]['organization_set'].append(organization)
+
+        member = 'email' if self.expands('organization_set.users') else 'id'
+        members = models.User.objects.filter(organization__in=list(nested)).values_list('organization', member)
+        for organization_id, value in members:
+            nested[organization_id].append(value)
+        return representations
+
+class OrganizationReader(RepresentationReader):
+    """
+    Класс построения представлений `serializers.OrganizationOnlyRead`.
+    Количество и первые участники организаций выбираются теми же
+    запросами, что и в `serializers.OrganizationListSerializer`
+    """
+    serializer_class = serializers.OrganizationOnlyRead
+
+    def users_url(self):
+        """
+        Returns
+        -------
+        users_url : callable
+            Функция, возвращающая ссылку на участников организации
+            по её id. Ссылка собирается `reverse` один раз
+        """
+        url = reverse('organization-members', kwargs={'pk': URL_PK_PLACEHOLDER}, request=self.request)
+        prefix, _, suffix = url.rpartition(str(URL_PK_PLACEHOLDER))
+        return lambda pk: f'{prefix}{pk}{suffix}'
+
+    def render(self, pks):
+        columns = tuple(name for name in self.fields if name in ('id', 'name', 'description'))
+        representations = {
+            representation['id']: representation
+            for representation in self.load(models.Organization.objects.filter(pk__in=pks), columns)
+        }
+        ids = list(representations)
+
+        if 'users_count' in self.fields:
+            counts = serializers.OrganizationListSerializer.count_users(ids)
+            for pk, representation in representations.items():
+                representation['users_count'] = counts.get(pk, 0)
+
+        if 'users' in self.fields:
+            for representation in representations.values():
+                representation['users'] = []
+            rows = serializers.OrganizationListSerializer.first_users(ids)
+            if self.expands('users'):
+                columns = tuple(f'user__{name}' for name in USER_FIELDS)
+                for organization_id, *values in rows.values_list('organization_id', *columns):
+                    member = dict(zip(USER_FIELDS, values))
+                    member['avatar'] = self.avatar(member['avatar'])
+                    representations[organization_id]['users'].append(member)
+            else:
+                for organization_id, user_id in rows.values_list('organization_id', 'user_id'):
+                    representations[organization_id]['users'].append(user_id)
+
+        if 'users_url' in self.fields:
+            users_url = self.users_url()
+            for pk, representation in representations.items():
+                representation['users_url'] = users_url(pk)
+        return representations
@@ -0,0 +1,57 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Класс рендеринга JSON библиотекой orjson. Результат совпадает
+    с результатом `rest_framework.renderers.JSONRenderer` при
+    настройках `UNICODE_JSON` и `COMPACT_JSON` по умолчанию: даты,
+    десятичные числа и другие типы вне JSON преобразуются
+    кодировщиком DRF, символы U+2028 и U+2029 экранируются.
+
+    Без установленной orjson, с отступами (`indent`) и при
+    изменённых настройках рендеринг выполняется `JSONRenderer`
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super(ORJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        #Как в JSONRenderer, результат остаётся подмножеством JavaScript:
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Класс рендеринга MessagePack (`Accept: application/msgpack`).
+    Типы вне MessagePack преобразуются кодировщиком DRF так же,
+    как в JSON. Требует библиотеку msgpack: без неё класс не входит
+    в `DEFAULT_RENDERER_CLASSES`
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
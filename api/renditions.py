@@ -0,0 +1,159 @@
+import os
+import tempfile
+import threading
+import zlib
+
+from django.conf import settings
+from django.utils._os import safe_join
+from PIL import Image, UnidentifiedImageError, features
+
+from . import avatars
+
+RENDITION_SIZES = (32, 64, 200)
+RENDITIONS_DIRECTORY = 'renditions'
+LOCKS_COUNT = 64
+
+#Блокировки распределяются по ключам рендеринга хэшем, так что их
+#число не растёт вместе с числом аватаров:
+_locks = [threading.Lock() for _ in range(LOCKS_COUNT)]
+
+def rendition_format():
+    """
+    Returns
+    -------
+    image_format : str
+        Формат рендеринга: WebP, если Pillow поддерживает его запись,
+        иначе PNG
+    """
+    Image.init()
+    if 'WEBP' in Image.SAVE and features.check('webp'):
+        return 'WEBP'
+    return 'PNG'
+
+def fit_size(requested):
+    """
+    Возвращает наименьший размер рендеринга, не меньший
+    запрошенного, либо наибольший размер рендеринга
+
+    Parameters
+    ----------
+    requested : int
+        Размер, запрошенный клиентом, в пикселях
+
+    Returns
+    -------
+    size : int
+        Размер рендеринга из `RENDITION_SIZES`
+    """
+    for size in RENDITION_SIZES:
+        if size >= requested:
+            return size
+    return RENDITION_SIZES[-1]
+
+def rendition_name(name, size):
+    """
+    Parameters
+    ----------
+    name : str
+        Путь к файлу аватара относительно `MEDIA_ROOT`
+    size : int
+        Размер рендеринга
+
+    Returns
+    -------
+    name : str
+        Путь к файлу рендеринга относительно `MEDIA_ROOT`
+    """
+    extension = 'webp' if rendition_format() == 'WEBP' else 'png'
+    return f'{RENDITIONS_DIRECTORY}/{size}/{name}.{extension}'
+
+def ensure(name, size):
+    """
+    Возвращает путь к файлу рендеринга аватара размером
+    `size` x `size`. Рендеринг создаётся при первом запросе и
+    хранится на диске; он создаётся заново, если файл аватара
+    изменился позже рендеринга.
+
+    Одновременные запросы одного рендеринга в процессе ждут
+    друг друга, и рендеринг создаётся один раз. Файл записывается
+    во временный файл и атомарно переименовывается, поэтому
+    процессы никогда не видят частично записанный рендеринг
+
+    Parameters
+    ----------
+    name : str
+        Путь к файлу аватара относительно `MEDIA_ROOT`
+    size : int
+        Размер рендеринга из `RENDITION_SIZES`
+
+    Returns
+    -------
+    path : str
+        Абсолютный путь к файлу рендеринга
+
+    Raises
+    ------
+    FileNotFoundError
+        Если файла аватара нет
+    avatars.InvalidAvatar
+        Если файл аватара не является изображением
+    """
+    source = safe_join(settings.MEDIA_ROOT, name)
+    target = safe_join(settings.MEDIA_ROOT, rendition_name(name, size))
+    source_modified = os.stat(source).st_mtime
+
+    if is_fresh(target, source_modified):
+        return target
+
+    with _locks[zlib.crc32(target.encode()) % LOCKS_COUNT]:
+        if is_fresh(target, source_modified):
+            return target
+        render(source, target, size)
+    return target
+
+def is_fresh(target, source_modified):
+    try:
+        return os.stat(target).st_mtime >= source_modified
+    except FileNotFoundError:
+        return False
+
+def render(source, target, size):
+    """
+    Записывает рендеринг файла аватара `source` в файл `target`
+    """
+    try:
+        image = Image.open(source)
+    except UnidentifiedImageError:
+        raise avatars.InvalidAvatar('File is not an image')
+
+    with image:
+        resized = avatars.cover(image, (size, size))
+        if resized.mode not in ('RGB', 'RGBA'):
+            resized = resized.convert('RGBA' if 'transparency' in resized.info or 'A' in resized.mode else 'RGB')
+
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.rendition-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            resized.save(f, rendition_format())
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, target)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+def discard(name):
+    """
+    Удаляет рендеринги файла аватара
+
+    Parameters
+    ----------
+    name : str
+        Путь к файлу аватара относительно `MEDIA_ROOT`
+    """
+    for size in RENDITION_SIZES:
+        try:
+            os.remove(safe_join(settings.MEDIA_ROOT, rendition_name(name, size)))
+        except FileNotFoundError:
+            pass
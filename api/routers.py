@@ -0,0 +1,74 @@
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_read_database = contextvars.ContextVar('read_database', default=None)
+
+def choose_replica():
+    """
+    Returns
+    -------
+    alias : str или None
+        Псевдоним случайной реплики из `settings.DATABASE_REPLICAS`.
+        None, если реплики не настроены
+    """
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+def read_from(alias):
+    """
+    Направляет последующие чтения в текущем контексте
+    в базу данных `alias` (None - в основную базу данных)
+    """
+    _read_database.set(alias)
+
+def read_database():
+    return _read_database.get() or DEFAULT_DB_ALIAS
+
+def sticky_until(request):
+    """
+    Returns
+    -------
+    until : float
+        Время (Unix), до которого чтения клиента направляются в
+        основную базу данных, по cookie `settings.DATABASE_STICKY_COOKIE`.
+        0, если cookie нет или она повреждена
+    """
+    try:
+        return float(request.COOKIES.get(settings.DATABASE_STICKY_COOKIE, 0))
+    except ValueError:
+        return 0
+
+def is_sticky(request):
+    return sticky_until(request) > time.time()
+
+class ReplicaRouter:
+    """
+    Маршрутизатор баз данных: записи всегда выполняются в основной
+    базе данных `default`, чтения - в реплике, выбранной
+    `api.middleware.ReadReplicaMiddleware` для текущего запроса,
+    и в основной базе данных во всех остальных случаях
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        #Экземпляр, прочитанный из реплики, сохраняется в основную базу данных:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        #Реплики получают схему и данные репликацией основной базы данных:
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
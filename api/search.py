@@ -0,0 +1,224 @@
+import functools
+import operator
+import re
+
+from django.conf import settings
+from django.db import OperationalError, connections, router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from . import models
+
+TERM = re.compile(r'[^\W_]+')
+MAX_TERMS = 8
+
+def terms(query):
+    """
+    Returns
+    -------
+    terms : list
+        Слова поискового запроса в нижнем регистре, не более `MAX_TERMS`
+    """
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+class SearchIndex:
+    """
+    Полнотекстовый индекс SQLite FTS5 по полям модели.
+
+    Таблица индекса хранит только словарь (external content) и
+    обновляется триггерами на таблице модели, поэтому остаётся
+    согласованной и при `bulk_create`, `QuerySet.update` и
+    `QuerySet.delete`, которые не отправляют сигналы моделей.
+    Индексы префиксов из 2-6 символов ускоряют поиск по началу слова.
+    Если совпадений не больше `settings.SEARCH_RANK_LIMIT`, они
+    ранжируются в SQL функцией `bm25` с весами полей. `bm25`
+    вычисляется для каждого совпадения, поэтому совпадения более
+    широких запросов упорядочиваются по rowid: FTS5 выбирает их
+    в этом порядке без сортировки. В обоих случаях страницы
+    выбираются из одного упорядоченного списка совпадений.
+
+    Если база данных не SQLite или SQLite собран без FTS5, поиск
+    выполняется фильтрами `icontains` по тем же полям (в SQLite
+    без учёта регистра только для латиницы)
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+    fields : tuple
+        Имена индексируемых полей
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.table = f'{model._meta.db_table}_search'
+
+    def create_statements(self, connection):
+        """
+        Returns
+        -------
+        statements : list
+            Пары (имя объекта схемы, SQL его создания): таблица
+            индекса и триггеры таблицы модели
+        """
+        quote = connection.ops.quote_name
+        source = quote(self.model._meta.db_table)
+        table = quote(self.table)
+        pk = quote(self.model._meta.pk.column)
+        columns = [quote(self.model._meta.get_field(field).column) for field in self.fields]
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{column}' for column in columns)
+        old = ', '.join(f'old.{column}' for column in columns)
+        insert = f'INSERT INTO {table}(rowid, {names}) VALUES (new.{pk}, {new});'
+        delete = f"INSERT INTO {table}({table}, rowid, {names}) VALUES ('delete', old.{pk}, {old});"
+        return [
+            (self.table,
+             f"CREATE VIRTUAL TABLE {table} USING fts5({names}, content={source}, content_rowid={pk}, "
+             f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6')"),
+            (f'{self.table}_insert',
+             f'CREATE TRIGGER {quote(self.table + "_insert")} AFTER INSERT ON {source} BEGIN {insert} END'),
+            (f'{self.table}_delete',
+             f'CREATE TRIGGER {quote(self.table + "_delete")} AFTER DELETE ON {source} BEGIN {delete} END'),
+            (f'{self.table}_update',
+             f'CREATE TRIGGER {quote(self.table + "_update")} AFTER UPDATE OF {names} ON {source} '
+             f'BEGIN {delete} {insert} END'),
+        ]
+
+    def exists(self, connection):
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.table])
+            return cursor.fetchone() is not None
+
+    def create(self, connection):
+        """
+        Создаёт таблицу индекса и триггеры, если их нет, и заполняет
+        индекс существующими записями. Триггеры создаются заново и
+        после миграций, пересоздающих таблицу модели (SQLite удаляет
+        триггеры вместе с таблицей)
+
+        Returns
+        -------
+        created : bool
+            False, если индекс и триггеры уже были или FTS5 недоступен
+        """
+        if connection.vendor != 'sqlite':
+            return False
+        statements = self.create_statements(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(statements))})",
+                [name for name, _ in statements]
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+        missing = [statement for name, statement in statements if name not in existing]
+        if not missing:
+            return False
+        table = connection.ops.quote_name(self.table)
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for statement in missing:
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        except OperationalError:
+            #SQLite собран без FTS5:
+            return False
+        return True
+
+    def drop_insert_trigger(self, connection):
+        """
+        Удаляет триггер, добавляющий в индекс новые записи модели.
+        Используется при загрузке большого числа записей: вместо
+        вставки в индекс по каждой строке индекс перестраивается
+        один раз методом `create`, который создаёт триггер заново
+        """
+        if self.exists(connection):
+            trigger = connection.ops.quote_name(f'{self.table}_insert')
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    def weights(self):
+        """
+        Returns
+        -------
+        weights : str
+            Веса полей для функции ранжирования `bm25`, убывающие
+            в порядке `fields`
+        """
+        return ', '.join(f'{weight}.0' for weight in range(len(self.fields), 0, -1))
+
+    def search(self, query, limit, offset=0):
+        """
+        Ищет записи, поля которых содержат слова, начинающиеся
+        со всех слов запроса
+
+        Parameters
+        ----------
+        query : str
+            Поисковый запрос
+        limit : int
+            Наибольшее число результатов
+        offset : int
+            Число пропускаемых результатов
+
+        Returns
+        -------
+        pks : list
+            Первичные ключи найденных записей в порядке убывания
+            релевантности `bm25` (при равной релевантности - в порядке
+            первичных ключей). Если совпадений больше
+            `settings.SEARCH_RANK_LIMIT`, и при поиске без FTS5 -
+            в порядке первичных ключей
+        """
+        words = terms(query)
+        if not words:
+            return []
+        connection = connections[router.db_for_read(self.model)]
+        if self.exists(connection):
+            quote = connection.ops.quote_name
+            table = quote(self.table)
+            match = ' '.join(f'"{word}"*' for word in words)
+            rank_limit = settings.SEARCH_RANK_LIMIT
+            with connection.cursor() as cursor:
+                #Подсчёт останавливается на `rank_limit + 1` совпадении:
+                cursor.execute(
+                    f'SELECT count(*) FROM (SELECT 1 FROM {table} WHERE {table} MATCH %s LIMIT %s)',
+                    [match, rank_limit + 1]
+                )
+                if cursor.fetchone()[0] <= rank_limit:
+                    order = f'bm25({table}, {self.weights()}), rowid'
+                else:
+                    order = 'rowid'
+                cursor.execute(
+                    f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY {order} LIMIT %s OFFSET %s',
+                    [match, limit, offset]
+                )
+                return [row[0] for row in cursor.fetchall()]
+
+        condition = functools.reduce(operator.and_, (
+            functools.reduce(operator.or_, (Q(**{f'{field}__icontains': word}) for field in self.fields))
+            for word in words
+        ))
+        return list(
+            self.model.objects.filter(condition).order_by('pk')
+            .values_list('pk', flat=True)[offset:offset + limit]
+        )
+
+USERS = SearchIndex(models.User, ('last_name', 'first_name', 'email'))
+ORGANIZATIONS = SearchIndex(models.Organization, ('name', 'description'))
+
+@receiver(post_migrate)
+def create_indexes(sender, using, **kwargs):
+    """
+    Создаёт индексы поиска после `migrate` в базах данных,
+    куда маршрутизатор разрешает миграции моделей
+    """
+    if sender.name != 'api':
+        return
+    connection = connections[using]
+    for index in (USERS, ORGANIZATIONS):
+        if router.allow_migrate_model(using, index.model):
+            index.create(connection)
@@ -1,74 +1,38 @@
-import base64
-import os
-import random
-import re
-import string
-
-from django.core.files import File
-from PIL import Image, UnidentifiedImageError
-from resizeimage import resizeimage
+from django.conf import settings
+from django.db.models import Count, Manager, OuterRef, Prefetch, Subquery
+from django.http import QueryDict
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
-from user_organizations.settings import BASE_DIR
-from . import models
-
-MIMES_IMAGE = {
-    'BMP': 'image/bmp', 'DIB': 'image/bmp', 'GIF': 'image/gif', 
-    'TIFF': 'image/tiff', 'JPEG': 'image/jpeg', 'JPG': 'image/jpeg', 
-    'PPM': 'image/x-portable-anymap', 'PNG': 'image/png', 'PCX': 'image/x-pcx', 
-    'EPS': 'application/postscript', 'JPEG2000': 'image/jp2', 
-    'ICNS': 'image/icns', 'ICO': 'image/x-icon', 'MPEG': 'video/mpeg', 
-    'MPO': 'image/mpo', 'PALM': 'image/palm', 'PDF': 'application/pdf', 
-    'PSD': 'image/vnd.adobe.photoshop', 'SGI': 'image/sgi', 'TGA': 'image/x-tga', 
-    'WEBP': 'image/webp', 'XBM': 'image/xbm', 'XPM': 'image/xpm'
-}
-NAME_LENGTH = 20
-REQUIRED_HEIGHT = 200
-REQUIRED_WIDTH = 200
-USER_AVATARS_PATH = BASE_DIR.joinpath('api//user_avatars')
+from . import avatars, models, renditions, tasks, validators
 
-class AvatarField(serializers.ImageField):
-    """
-    Класс сериализатора файлового поля `avatar`
-    отличается реализацией метода `to_internal_value` 
-    в том, что после преобразования значения в тип python 
-    происходит освобождение файла от процесса, который 
-    открывает его содержимое.
+USERS_PREVIEW_LENGTH = 5
+AVATAR_SIZE_PARAM = 'avatar_size'
 
-    !!
-    Предназначен для использования в сериализаторе 
-    `UserSerializer`
-    !!
+def avatar_rendition_size(request):
     """
+    Возвращает размер рендеринга аватара, подходящий размеру,
+    запрошенному параметром `avatar_size` строки запроса
+
+    Parameters
+    ----------
+    request : rest_framework.request.Request или None
+        Запрос клиента
+
+    Returns
+    -------
+    size : int или None
+        Размер из `renditions.RENDITION_SIZES`. None, если размер
+        не запрошен или задан не положительным целым числом
+    """
+    if request is None:
+        return None
+    try:
+        requested = int(request.query_params.get(AVATAR_SIZE_PARAM))
+    except (TypeError, ValueError):
+        return None
+    return renditions.fit_size(requested) if requested > 0 else None
 
-    def to_internal_value(self, data):
-        """
-        Данный метод переоперделён для перевода сериализованного 
-        значения поля `avatar` в тип python.
-
-        После преобразования значения в тип python метод закрывает файл, 
-        так как операции, связанные с его загрузкой уже были произведены в 
-        методе `api.UserSerializer.to_internal_value`
-
-        Parameters
-        ----------
-        data : django.core.files.Files
-            Открытый файловый поток, содержащий контент поля `avatar` 
-            модели `api.User`
-
-        Returns
-        -------
-        value : io.BufferedReader
-            Закрытый файловый поток, содержащий контент поля `avatar` 
-            модели `api.User`
-        """
-        file_object = super(serializers.ImageField, self).to_internal_value(data)
-        django_field = self._DjangoImageField()
-        django_field.error_messages = self.error_messages
-        value = django_field.clean(file_object)
-        file_object.close()
-        return value
-    
 class StringRelatedSerializer(serializers.StringRelatedField):
     """
     Класс используется для сериализации и десериализации 
@@ -83,18 +47,37 @@ class StringRelatedSerializer(serializers.StringRelatedField):
         """
         return data
 
+class AvatarField(serializers.ImageField):
+    """
+    Класс поля аватара на чтение. Если клиент запросил размер
+    аватара параметром `avatar_size`, вместо ссылки на файл аватара
+    возвращает ссылку на его рендеринг подходящего размера
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        size = avatar_rendition_size(request)
+        if not value or size is None:
+            return super(AvatarField, self).to_representation(value)
+        return reverse(
+            'avatar-rendition', kwargs={'size': size, 'name': value.name}, request=request
+        )
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Класс используется для десериализации данных модели 
     `User` на запись.
 
     Отличается реализацией метода `to_internal_value` в том, 
-    что в нём производится загрузка файла для поля `avatar`
-    в директорию пользователя /api/user_avatars/<User.email>
+    что в нём сохраняется присланный файл для поля `avatar`
+    для последующей обработки и записи в директорию 
+    пользователя /api/user_avatars/<User.email>
     """
 
     organization_set = StringRelatedSerializer(many=True, required=False)
-    avatar = AvatarField(use_url=True, required=False)
+    avatar = serializers.ImageField(use_url=True, read_only=True)
+
+    MANY_FIELDS = ('organization_set',)
 
     class Meta:
         model = models.User
@@ -102,85 +85,117 @@ class UserSerializer(serializers.ModelSerializer):
 
     def to_internal_value(self, data):
         """
-        Устаналивает значения полей `avatar`, `email` для передачи 
-        на проверку сериализатором. Производит загрузку файла
-        для поля `avatar`, предваритеольно преобразовывая 
-        последовательность байтов к типу django.core.files.Files
+        Устаналивает значение поля `email` для передачи на проверку 
+        сериализатором. Сохраняет присланный файл аватара до его
+        обработки в `staged_avatar`: обработка выполняется заданием
+        `api.models.AvatarJob` после сохранения пользователя.
+
+        Файл аватара принимается либо словарем `{'filename': ..., 'file_bytes': ...}`
+        с содержимым в base64, либо загруженным файлом 
+        (multipart/form-data или тело запроса image/*)
 
         Parameters
         ----------
-        data : dict
-            Данные json, полученные от клиента
+        data : dict или django.http.QueryDict
+            Данные json или формы, полученные от клиента
         
         Returns
         -------
         ret : collections.OrderedDict
             Десериализованные данные для проверки
         """
-        avatar = data.get("avatar")
-        filename = avatar.get("filename") if avatar else ''
-        file_string = avatar.get("file_bytes") if avatar else ''
-        basename, extension = os.path.splitext(filename)
+        if isinstance(data, QueryDict):
+            data = {
+                key: values if key in self.MANY_FIELDS else values[-1]
+                for key, values in data.lists()
+            }
+        else:
+            data = dict(data)
 
         if self.instance:
-            email = data.get('email', self.instance.email)
-            data['email'] = email
-
-        #Генерирование имени файла, если имя не содержит символы [a-zA-Z0-9]:
-        if avatar and extension[1:].upper() in MIMES_IMAGE:
-            if not re.fullmatch(r'([a-zA-Z0-9])+', basename) or not basename:
-                filename = ''.join(random.choices(string.ascii_uppercase + string.digits, k=NAME_LENGTH)  + [extension])
-
-            #Установка пути к файлу аватара:
-            THIS_USER_AVATAR_PATH = USER_AVATARS_PATH.joinpath(f"{email}")
-
-            #При загрузке нового аватара производится очистка папки с файлами 
-            #больше неактуальных аватаров пользователя:
-            if THIS_USER_AVATAR_PATH.exists() and file_string:
-                user_avatar_files = os.listdir(THIS_USER_AVATAR_PATH)
-                for file_ in user_avatar_files:
-                    _, extension = os.path.splitext(file_)
-
-                    if extension[1:].upper() in MIMES_IMAGE:
-                        os.remove(THIS_USER_AVATAR_PATH.joinpath(file_))
-            try:
-                THIS_USER_AVATAR_PATH.mkdir(mode=777)
-            except FileExistsError:
-                pass
-            file_path = THIS_USER_AVATAR_PATH.joinpath(f'{filename}')
+            data['email'] = data.get('email', self.instance.email)
 
-        
-            with open(file_path, 'wb') as f:
-                try:
-                    writeble_bytes = bytes(file_string[2:-1], 'utf-8')
-                    f.write(base64.b64decode(writeble_bytes))
-                except TypeError:
-                    pass
-
-            with open(file_path, 'r+b') as f:
-                try:
-                    with Image.open(f) as image:
-                        height, width = image.size     
-                        if height > REQUIRED_HEIGHT or width > REQUIRED_WIDTH:
-                            resized = resizeimage.resize_cover(image, [REQUIRED_HEIGHT, REQUIRED_WIDTH])
-                            resized.save(file_path, image.format)
-                except UnidentifiedImageError:
-                    pass
-            desired_file = open(file_path, 'rb')
-            data['avatar'] = File(desired_file)
+        avatar = data.pop('avatar', None)
+        self.staged_avatar = avatars.stage(avatar) if avatar else None
 
         return super(UserSerializer, self).to_internal_value(data)
 
+    def validate_organization_set(self, value):
+        """
+        Проверяет существование организаций одним запросом
+
+        Parameters
+        ----------
+        value : list
+            Первичные ключи организаций
+
+        Returns
+        -------
+        value : set
+            Первичные ключи организаций
+        """
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        try:
+            pks = {int(pk) for pk in value}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError('Incorrect type. Expected pk value.')
+        missing = pks - set(models.Organization.objects.filter(pk__in=pks).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError([
+                f'Invalid pk "{pk}" - object does not exist.' for pk in sorted(missing)
+            ])
+        return pks
+
+    def update(self, instance, validated_data):
+        """
+        Сохраняет только изменившиеся поля пользователя
+        (`save(update_fields=...)`), а изменение `organization_set`
+        записывает разницей: добавляются только новые и удаляются
+        только исключённые организации. Если ничего не изменилось,
+        запись в базу данных не производится
+
+        Parameters
+        ----------
+        instance : api.models.User
+            Пользователь
+        validated_data : dict
+            Проверенные данные
+
+        Returns
+        -------
+        instance : api.models.User
+            Пользователь после изменения
+        """
+        organizations = validated_data.pop('organization_set', None)
+        changed = [
+            attr for attr, value in validated_data.items() if getattr(instance, attr) != value
+        ]
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
+        if changed:
+            instance.save(update_fields=changed)
+
+        if organizations is not None:
+            current = set(instance.organization_set.values_list('pk', flat=True))
+            added, removed = organizations - current, current - organizations
+            if removed:
+                instance.organization_set.remove(*removed)
+            if added:
+                instance.organization_set.add(*added)
+        return instance
+
 class OrganizationSerializer(serializers.ModelSerializer):
     """
     Класс используется для десериализации данных модели 
-    `Organization` на запись
+    `Organization` на запись. Служебные поля `version` и `modified`
+    не принимаются от клиента и не выводятся
     """
     users = StringRelatedSerializer(many=True, required=False)
 
     class Meta:
         model = models.Organization
-        fields = '__all__'
+        fields = ('id', 'users', 'name', 'description')
 
     def to_internal_value(self, data):
         """
@@ -202,25 +217,384 @@ class OrganizationSerializer(serializers.ModelSerializer):
             data['name'] = data.get('name', name)
         return super(OrganizationSerializer, self).to_internal_value(data)
 
-class UserSerializerOnlyRead(serializers.ModelSerializer):
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Базовый класс сериализаторов на чтение, поддерживающих выбор
+    полей и раскрытие связей клиентом. Выбор передаётся в контексте
+    ключом `fieldset` (`api.fieldsets.Fieldset`): невыбранные поля
+    удаляются, а нераскрытые связи из `EXPANDABLE` сериализуются
+    списками первичных ключей
+    """
+    EXPANDABLE = ()
+
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsetSerializer, self).__init__(*args, **kwargs)
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return
+        for name in list(self.fields):
+            if name not in fieldset.fields:
+                self.fields.pop(name)
+        for path in self.EXPANDABLE:
+            if not fieldset.expands(path):
+                self.collapse(path)
+
+    def collapse(self, path):
+        """
+        Заменяет поле связи `path` списком первичных ключей
+
+        Parameters
+        ----------
+        path : str
+            Путь связи через точку от этого сериализатора
+        """
+        *parents, name = path.split('.')
+        serializer = self
+        for parent in parents:
+            field = serializer.fields.get(parent)
+            if not isinstance(field, serializers.ListSerializer):
+                return
+            serializer = field.child
+        if name in serializer.fields:
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+class UserSerializerOnlyRead(SparseFieldsetSerializer):
     """
     Класс используется для сериализации данных модели 
     `User` на чтение
     """
     organization_set = OrganizationSerializer(many=True, required=False)
-    avatar = serializers.ImageField(use_url=True)
+    avatar = AvatarField(use_url=True)
+
+    EXPANDABLE = ('organization_set', 'organization_set.users')
 
     class Meta:
         model = models.User
         fields = ('id', 'email', 'phone', 'first_name', 'last_name', 'avatar', 'organization_set')
 
-class OrganizationOnlyRead(serializers.ModelSerializer):
+    @staticmethod
+    def setup_eager_loading(queryset, fieldset=None):
+        """
+        Добавляет к набору запросов предварительную выборку
+        организаций пользователей вместе с их участниками, так что
+        сериализация любой страницы выполняется фиксированным
+        числом SQL-запросов. При выборе клиента `fieldset`
+        выбираются только столбцы выбранных полей, а организации
+        и их участники загружаются только с теми столбцами, которые
+        нужны для раскрытых связей
+
+        Parameters
+        ----------
+        queryset : django.db.models.QuerySet
+            Набор запросов модели `User`
+        fieldset : api.fieldsets.Fieldset или None
+            Выбор клиента
+
+        Returns
+        -------
+        queryset : django.db.models.QuerySet
+            Набор запросов с предварительной выборкой `organization_set`
+        """
+        if fieldset is not None:
+            queryset = queryset.only(*(name for name in fieldset.fields if name != 'organization_set'))
+            if 'organization_set' not in fieldset.fields:
+                return queryset
+            if not fieldset.expands('organization_set'):
+                return queryset.prefetch_related(
+                    Prefetch('organization_set', queryset=models.Organization.objects.only('pk'))
+                )
+        if fieldset is None or fieldset.expands('organization_set.users'):
+            members = models.User.objects.only('email')
+        else:
+            members = models.User.objects.only('pk')
+        organizations = models.Organization.objects.prefetch_related(
+            Prefetch('users', queryset=members)
+        )
+        return queryset.prefetch_related(
+            Prefetch('organization_set', queryset=organizations)
+        )
+
+class MemberSerializer(serializers.ModelSerializer):
+    """
+    Класс используется для сериализации данных модели
+    `User` на чтение в составе организации: без вложенного
+    списка организаций пользователя
+    """
+    avatar = AvatarField(use_url=True)
+
+    class Meta:
+        model = models.User
+        fields = ('id', 'email', 'phone', 'first_name', 'last_name', 'avatar')
+
+class OrganizationListSerializer(serializers.ListSerializer):
+    """
+    Класс используется для сериализации набора организаций
+    на чтение. Перед сериализацией одним запросом подсчитывает
+    участников организаций и вторым запросом выбирает первых
+    `USERS_PREVIEW_LENGTH` участников каждой организации
+    """
+
+    def to_representation(self, data):
+        """
+        Parameters
+        ----------
+        data : django.db.models.QuerySet или list
+            Набор экземпляров модели `Organization`
+
+        Returns
+        -------
+        ret : list
+            Список сериализованных организаций
+        """
+        organizations = list(data.all() if isinstance(data, Manager) else data)
+        self.attach_users_preview(organizations, self.context.get('fieldset'))
+        return super(OrganizationListSerializer, self).to_representation(organizations)
+
+    @staticmethod
+    def count_users(ids):
+        """
+        Returns
+        -------
+        counts : dict
+            Количество участников по id организации (организации
+            без участников отсутствуют)
+        """
+        return dict(
+            models.Organization.users.through.objects.filter(organization_id__in=ids)
+            .values('organization_id')
+            .annotate(count=Count('pk'))
+            .values_list('organization_id', 'count')
+        )
+
+    @staticmethod
+    def first_users(ids):
+        """
+        Returns
+        -------
+        rows : django.db.models.QuerySet
+            Записи членства первых `USERS_PREVIEW_LENGTH` участников
+            каждой организации в порядке id организаций и участников
+        """
+        through = models.Organization.users.through
+        first_users = through.objects.filter(
+            organization_id=OuterRef('organization_id')
+        ).order_by('user_id').values('user_id')[:USERS_PREVIEW_LENGTH]
+        return through.objects.filter(
+            organization_id__in=ids, user_id__in=Subquery(first_users)
+        ).order_by('organization_id', 'user_id')
+
+    @staticmethod
+    def attach_users_preview(organizations, fieldset=None):
+        """
+        Устанавливает экземплярам организаций атрибуты `users_count`
+        и `users_preview`. При выборе клиента `fieldset` запросы
+        невыбранных полей не выполняются, а для нераскрытой связи
+        `users` в `users_preview` попадают только первичные ключи
+        участников, без соединения с таблицей пользователей
+
+        Parameters
+        ----------
+        organizations : list
+            Список экземпляров модели `Organization`
+        fieldset : api.fieldsets.Fieldset или None
+            Выбор клиента
+        """
+        ids = [organization.pk for organization in organizations]
+
+        if fieldset is None or 'users_count' in fieldset.fields:
+            counts = OrganizationListSerializer.count_users(ids)
+            for organization in organizations:
+                organization.users_count = counts.get(organization.pk, 0)
+
+        if fieldset is None or 'users' in fieldset.fields:
+            rows = OrganizationListSerializer.first_users(ids)
+            previews = {pk: [] for pk in ids}
+            if fieldset is None or fieldset.expands('users'):
+                for row in rows.select_related('user'):
+                    previews[row.organization_id].append(row.user)
+            else:
+                for organization_id, user_id in rows.values_list('organization_id', 'user_id'):
+                    previews[organization_id].append(user_id)
+            for organization in organizations:
+                organization.users_preview = previews[organization.pk]
+
+class OrganizationOnlyRead(SparseFieldsetSerializer):
     """
     Класс используется для сериализации данных модели 
-    `Organization` на чтение
+    `Organization` на чтение. Вместо полного списка участников
+    содержит их количество, первых `USERS_PREVIEW_LENGTH` участников
+    и ссылку на постраничный список всех участников
     """
-    users = UserSerializer(many=True, required=False)
+    users_count = serializers.SerializerMethodField()
+    users = serializers.SerializerMethodField()
+    users_url = serializers.SerializerMethodField()
+
+    EXPANDABLE = ('users',)
 
     class Meta:
         model = models.Organization
-        fields = '__all__'
\ No newline at end of file
+        fields = ('id', 'name', 'description', 'users_count', 'users', 'users_url')
+        list_serializer_class = OrganizationListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset, fieldset=None):
+        """
+        Parameters
+        ----------
+        queryset : django.db.models.QuerySet
+            Набор запросов модели `Organization`
+        fieldset : api.fieldsets.Fieldset или None
+            Выбор клиента
+
+        Returns
+        -------
+        queryset : django.db.models.QuerySet
+            Набор запросов, выбирающий только столбцы выбранных полей
+        """
+        if fieldset is None:
+            return queryset
+        return queryset.only(*(name for name in fieldset.fields if name in ('id', 'name', 'description')))
+
+    def collapse(self, path):
+        #Участники организации - не связь модели, а первые участники из `users_preview`:
+        if path == 'users' and 'users' in self.fields:
+            self.fields['users'] = serializers.SerializerMethodField('get_user_ids')
+
+    def get_users_count(self, organization):
+        if not hasattr(organization, 'users_count'):
+            OrganizationListSerializer.attach_users_preview([organization], self.context.get('fieldset'))
+        return organization.users_count
+
+    def get_users(self, organization):
+        if not hasattr(organization, 'users_preview'):
+            OrganizationListSerializer.attach_users_preview([organization], self.context.get('fieldset'))
+        return MemberSerializer(organization.users_preview, many=True, context=self.context).data
+
+    def get_user_ids(self, organization):
+        if not hasattr(organization, 'users_preview'):
+            OrganizationListSerializer.attach_users_preview([organization], self.context.get('fieldset'))
+        return organization.users_preview
+
+    def get_users_url(self, organization):
+        return reverse(
+            'organization-members',
+            kwargs={'pk': organization.pk},
+            request=self.context.get('request')
+        )
+
+class AvatarJobSerializer(serializers.ModelSerializer):
+    """
+    Класс используется для сериализации данных модели
+    `AvatarJob` на чтение: состояние задания обработки аватара,
+    текущий аватар пользователя и размер очереди заданий
+    """
+    url = serializers.SerializerMethodField()
+    avatar = serializers.ImageField(source='user.avatar', use_url=True, read_only=True)
+    backlog = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.AvatarJob
+        fields = ('id', 'url', 'status', 'attempts', 'error', 'avatar', 'backlog', 'created', 'updated')
+
+    def get_url(self, job):
+        return reverse('avatar-job', kwargs={'pk': job.pk}, request=self.context.get('request'))
+
+    def get_backlog(self, job):
+        return tasks.backlog()
+
+class BulkUserSerializer(serializers.Serializer):
+    """
+    Класс используется для проверки записи пользователя
+    в наборе `/users/bulk/`. В отличие от `UserSerializer`
+    не обращается к базе данных: занятость email-ов проверяется
+    для всего набора одним запросом
+    """
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(write_only=True)
+    password2 = serializers.CharField(write_only=True, required=False)
+    phone = serializers.CharField(
+        max_length=14, required=False, allow_null=True, allow_blank=True,
+        validators=[validators.isPhoneNumber]
+    )
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+
+    def validate(self, data):
+        if 'password2' in data and data['password'] != data['password2']:
+            raise serializers.ValidationError('Password\'s inputs don\'t match')
+        return data
+
+class UserFilterSerializer(serializers.Serializer):
+    """
+    Класс используется для проверки параметров фильтрации
+    списка пользователей `/users/`. Номер телефона переводится
+    в формат E.164
+    """
+    phone = serializers.CharField(max_length=32, required=False)
+    country_code = serializers.IntegerField(min_value=1, max_value=999, required=False)
+    organization = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_phone(self, value):
+        return validators.parse_phone(value)[0]
+
+class FieldsetSerializer(serializers.Serializer):
+    """
+    Класс используется для проверки параметров `fields`, `expand`
+    и `depth` представлений на чтение. Параметры `fields` и `expand`
+    - имена полей и пути связей через запятую, допустимые значения
+    берутся из сериализатора `context['serializer_class']`
+    """
+    fields = serializers.CharField(required=False, allow_blank=True)
+    expand = serializers.CharField(required=False, allow_blank=True)
+    depth = serializers.IntegerField(min_value=0, required=False)
+
+    @staticmethod
+    def split(value):
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def validate_fields(self, value):
+        names = self.split(value)
+        declared = self.context['serializer_class'].Meta.fields
+        unknown = [name for name in names if name not in declared]
+        if unknown:
+            raise serializers.ValidationError([f'Unknown field "{name}".' for name in unknown])
+        return names
+
+    def validate_expand(self, value):
+        paths = self.split(value)
+        expandable = self.context['serializer_class'].EXPANDABLE
+        unknown = [path for path in paths if path not in expandable]
+        if unknown:
+            raise serializers.ValidationError([f'Unknown relation "{path}".' for path in unknown])
+        return paths
+
+class BulkOrganizationSerializer(serializers.Serializer):
+    """
+    Класс используется для проверки записи организации
+    в наборе `/organizations/bulk/` без обращений к базе данных
+    """
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(max_length=1000, required=False, allow_null=True, allow_blank=True)
+    users = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+class MembershipChangeSerializer(serializers.Serializer):
+    """
+    Класс используется для проверки запроса на изменение
+    участников организации: списков добавляемых и удаляемых
+    пользователей
+    """
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+        max_length=settings.BULK_MAX_MEMBERS
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+        max_length=settings.BULK_MAX_MEMBERS
+    )
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError('Nothing to add or remove')
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError('The same user can\'t be added and removed')
+        return data
@@ -0,0 +1,168 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import renditions
+from .storage import HashedAvatarStorage
+
+DJANGO_SERVE = 'django'
+X_ACCEL_REDIRECT_SERVE = 'x-accel-redirect'
+X_SENDFILE_SERVE = 'x-sendfile'
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def is_immutable(name):
+    """
+    Файл, адресуемый по содержимому, и его рендеринги никогда
+    не меняются под тем же именем
+
+    Parameters
+    ----------
+    name : str
+        Путь к файлу относительно `MEDIA_ROOT`
+    """
+    parts = name.split('/')
+    if parts[0] == renditions.RENDITIONS_DIRECTORY:
+        parts = parts[2:]
+    return len(parts) > 1 and parts[0] == HashedAvatarStorage.directory
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def byte_range(header, size):
+    """
+    Разбирает заголовок `Range` с одним диапазоном байтов
+
+    Parameters
+    ----------
+    header : str
+        Значение заголовка `Range`
+    size : int
+        Размер файла
+
+    Returns
+    -------
+    byte_range : tuple или None
+        Первый и последний байт диапазона включительно. None, если
+        заголовок не задаёт один диапазон байтов: файл отдаётся
+        целиком
+
+    Raises
+    ------
+    ValueError
+        Если диапазон не пересекается с файлом
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        #Суффиксный диапазон: последние `end` байтов файла:
+        length = int(end)
+        if not length:
+            raise ValueError('Unsatisfiable range')
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+def serve(request, name, path):
+    """
+    Отдаёт файл аватара или его рендеринга.
+
+    В режиме `settings.AVATAR_SERVE` равном `DJANGO_SERVE` файл
+    отдаётся `FileResponse`: WSGI-сервер, поддерживающий
+    `wsgi.file_wrapper`, передаёт его без копирования (`sendfile`).
+    В режимах `X_ACCEL_REDIRECT_SERVE` и `X_SENDFILE_SERVE` передача
+    файла поручается веб-серверу (nginx, Apache/lighttpd), а
+    приложение отдаёт только заголовки.
+
+    Ответ содержит `ETag` и `Last-Modified`, поддерживает условные
+    запросы и запросы одного диапазона байтов (`Range`). Файлы,
+    адресуемые по содержимому, кэшируются клиентами бессрочно
+
+    Parameters
+    ----------
+    request : django.http.HttpRequest
+        Запрос клиента
+    name : str
+        Путь к файлу относительно `MEDIA_ROOT`
+    path : str
+        Абсолютный путь к файлу
+
+    Returns
+    -------
+    response : django.http.HttpResponse
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.AVATAR_SERVE == X_ACCEL_REDIRECT_SERVE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(f'{settings.AVATAR_ACCEL_PREFIX.rstrip("/")}/{name}')
+        elif settings.AVATAR_SERVE == X_SENDFILE_SERVE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            response = file_response(request, path, stat.st_size, etag, content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if is_immutable(name) else REVALIDATE_CACHE_CONTROL
+    return response
+
+def file_response(request, path, size, etag, content_type):
+    """
+    Отдаёт файл целиком либо диапазон байтов из заголовка `Range`.
+    Диапазон не отдаётся, если заголовок `If-Range` не совпадает
+    с текущим `ETag` файла
+    """
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    requested = None
+    if header and (not if_range or if_range == etag):
+        try:
+            requested = byte_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if requested is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = requested
+        response = StreamingHttpResponse(
+            read_range(path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,99 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import models
+from .authentication import CREDENTIALS, PRINCIPALS
+
+Membership = models.Organization.users.through
+TOUCH_BATCH_SIZE = 500
+
+def members_of(organization_ids):
+    """
+    Возвращает первичные ключи участников организаций
+
+    Parameters
+    ----------
+    organization_ids : iterable
+        Первичные ключи организаций
+
+    Returns
+    -------
+    user_ids : set
+        Первичные ключи пользователей
+    """
+    return set(
+        Membership.objects.filter(organization_id__in=organization_ids)
+        .values_list('user_id', flat=True)
+    )
+
+def touch(model, pks):
+    """
+    Увеличивает версию и обновляет время изменения экземпляров
+    модели, унаследованной от `api.models.VersionedModel`,
+    без отправки сигналов сохранения
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Класс модели
+    pks : iterable
+        Первичные ключи экземпляров
+    """
+    pks = list(pks)
+    now = timezone.now()
+    for start in range(0, len(pks), TOUCH_BATCH_SIZE):
+        model.objects.filter(pk__in=pks[start:start + TOUCH_BATCH_SIZE]).update(
+            version=F('version') + 1, modified=now
+        )
+
+def user_changed(user):
+    """
+    Обновляет версии организаций пользователя: представления
+    организаций и их участников включают данные пользователя,
+    а версии входят в ключи кэша представлений (`api.cache`)
+    """
+    touch(models.Organization, set(user.organization_set.values_list('pk', flat=True)))
+
+@receiver(post_save, sender=models.User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    PRINCIPALS.invalidate(instance.pk)
+    #Проверки пароля остаются действительными, пока не изменился его хэш:
+    CREDENTIALS.invalidate(
+        instance.pk, keep=lambda password: instance.is_active and password == instance.password
+    )
+    user_changed(instance)
+
+@receiver(pre_delete, sender=models.User)
+def user_deleted(sender, instance, **kwargs):
+    PRINCIPALS.invalidate(instance.pk)
+    CREDENTIALS.invalidate(instance.pk)
+    user_changed(instance)
+
+@receiver(m2m_changed, sender=Membership)
+def membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Обрабатывает изменение участников организации как со стороны
+    `Organization.users`, так и со стороны `User.organization_set`:
+    обновляет версии затронутых пользователей и организаций
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if action == 'pre_clear':
+        if reverse:
+            touch(models.User, {instance.pk})
+            user_changed(instance)
+        else:
+            members = members_of({instance.pk})
+            touch(models.Organization, {instance.pk})
+            touch(models.User, members)
+    elif reverse:
+        touch(models.User, {instance.pk})
+        touch(models.Organization, pk_set)
+    else:
+        touch(models.Organization, {instance.pk})
+        touch(models.User, pk_set)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    """
+    Выполняет `PRAGMA` из `settings.SQLITE_PRAGMAS` (режим журнала,
+    `busy_timeout`, `synchronous`, `cache_size`, `mmap_size`) для
+    каждого нового соединения с базой данных SQLite.
+    Прагмы с пустым значением не выполняются
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        if value not in (None, ''):
+            #Выполняется в обход `connection.cursor()`, чтобы не попадать в журнал запросов:
+            connection.connection.execute(f'PRAGMA {name} = {value}')
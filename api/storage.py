@@ -1,3 +1,8 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
 from django.core.files.storage import FileSystemStorage
 
 class UserAvatarStorage(FileSystemStorage):
@@ -32,4 +37,107 @@ class UserAvatarStorage(FileSystemStorage):
         """
         if self.exists(name):
             return name
-        return super(UserAvatarStorage, self).save(name, content, max_length=max_length)
\ No newline at end of file
+        return super(UserAvatarStorage, self).save(name, content, max_length=max_length)
+
+class HashedAvatarStorage(UserAvatarStorage):
+    """
+    Класс хранилища файлов аватаров, адресуемых по содержимому.
+    Файл называется хэшем SHA-256 своего содержимого и лежит
+    в директории `hashed/<2 символа хэша>/<следующие 2 символа>/`,
+    поэтому одинаковые изображения хранятся один раз, а ни одна
+    директория не разрастается.
+
+    Файлы не удаляются при смене аватара: неиспользуемые файлы
+    удаляет команда `gc_avatars`. При повторном сохранении уже
+    существующего файла обновляется время его изменения, чтобы
+    команда не удалила файл, на который снова начали ссылаться
+    """
+    directory = 'hashed'
+    chunk_size = 64 * 1024
+
+    def hashed_name(self, content, extension):
+        """
+        Возвращает имя файла по его содержимому
+
+        Parameters
+        ----------
+        content : django.core.files.File
+            Содержимое файла
+        extension : str
+            Расширение файла с точкой
+
+        Returns
+        -------
+        name : str
+            Путь к файлу относительно корня хранилища
+        """
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(self.directory, digest[:2], digest[2:4], f'{digest}{extension.lower()}')
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Имя, построенное по содержимому, всегда доступно: файл
+        с таким именем имеет то же содержимое
+        """
+        return name
+
+    def save(self, name, content, max_length=None):
+        """
+        Сохраняет файл, возвращает путь в строковом представлении.
+        Если файл уже существует, только обновляет время его изменения
+
+        Parameters
+        ----------
+        name : str
+            Путь к файлу относительно корня хранилища
+        content : django.core.files.Files
+            Контент файла
+        max_length : int
+            Максимальная длина пути для загружаемого файла
+
+        Returns
+        -------
+        path : str
+            Путь в прямом слэше
+        """
+        if self.exists(name):
+            try:
+                #Файл мог стать неиспользуемым: свежее время изменения
+                #не даёт `gc_avatars` удалить его как старый
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                #Файл удалили между проверками, записывается заново
+                pass
+        return super(UserAvatarStorage, self).save(name, content, max_length=max_length)
+
+    def _save(self, name, content):
+        """
+        Записывает файл во временный файл той же директории и
+        атомарно переименовывает его, так что одновременная запись
+        одинаковых изображений не приводит к ошибке или к
+        частично записанному файлу
+        """
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temporary_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                content.seek(0)
+                for chunk in content.chunks(self.chunk_size):
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary_path, self.file_permissions_mode)
+            else:
+                os.chmod(temporary_path, 0o644)
+            os.replace(temporary_path, full_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        return name
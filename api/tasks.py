@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from . import avatars, models
+
+EAGER = 'eager'
+ACTIVE_STATUSES = (models.AvatarJob.PENDING, models.AvatarJob.PROCESSING)
+
+logger = logging.getLogger(__name__)
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """
+    Возвращает пул потоков обработки аватаров размером
+    `settings.AVATAR_WORKERS`, создавая его при первом вызове
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.AVATAR_WORKERS, thread_name_prefix='avatar'
+            )
+    return _executor
+
+def backlog():
+    """
+    Возвращает количество заданий, ожидающих обработки
+    или обрабатываемых в данный момент
+
+    Returns
+    -------
+    count : int
+        Размер очереди заданий
+    """
+    return models.AvatarJob.objects.filter(status__in=ACTIVE_STATUSES).count()
+
+def enqueue(user, staged):
+    """
+    Создаёт задание на обработку аватара пользователя
+    и передаёт его на выполнение
+
+    Parameters
+    ----------
+    user : api.models.User
+        Пользователь
+    staged : api.avatars.StagedAvatar
+        Сохранённый до обработки файл аватара
+
+    Returns
+    -------
+    job : api.models.AvatarJob
+        Задание в актуальном состоянии
+    """
+    job = models.AvatarJob.objects.create(user=user, source=staged.path, filename=staged.filename)
+    submit(job.pk)
+    job.refresh_from_db()
+    return job
+
+def submit(job_id):
+    """
+    Передаёт задание на выполнение. В режиме `settings.AVATAR_PROCESSING
+    == 'eager'` задание выполняется сразу в текущем потоке, иначе -
+    в пуле потоков после фиксации текущей транзакции
+    """
+    if settings.AVATAR_PROCESSING == EAGER:
+        run(job_id)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_in_worker, job_id))
+
+def run_in_worker(job_id):
+    """
+    Выполняет задание в потоке пула и закрывает соединение
+    потока с базой данных
+    """
+    try:
+        run(job_id)
+    except Exception:
+        logger.exception('Avatar job %s crashed', job_id)
+    finally:
+        connection.close()
+
+def run(job_id):
+    """
+    Выполняет задание, если оно ещё ожидает обработки. При ошибке
+    задание возвращается в очередь, пока число попыток не достигнет
+    `settings.AVATAR_JOB_MAX_ATTEMPTS`. Файл, который не может быть
+    обработан (`api.avatars.InvalidAvatar`), сразу переводит задание
+    в статус ошибки
+
+    Parameters
+    ----------
+    job_id : int
+        Первичный ключ задания
+    """
+    claimed = models.AvatarJob.objects.filter(pk=job_id, status=models.AvatarJob.PENDING).update(
+        status=models.AvatarJob.PROCESSING, attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return
+
+    job = models.AvatarJob.objects.select_related('user').get(pk=job_id)
+    staged = avatars.StagedAvatar(job.source, job.filename)
+    try:
+        avatars.process(job.user, staged)
+    except avatars.InvalidAvatar as error:
+        finish(job, models.AvatarJob.FAILED, str(error))
+        avatars.discard(staged)
+    except Exception as error:
+        logger.warning('Avatar job %s failed on attempt %s: %s', job.pk, job.attempts, error)
+        if job.attempts < settings.AVATAR_JOB_MAX_ATTEMPTS:
+            finish(job, models.AvatarJob.PENDING, str(error))
+            submit(job.pk)
+        else:
+            finish(job, models.AvatarJob.FAILED, str(error))
+            avatars.discard(staged)
+    else:
+        finish(job, models.AvatarJob.DONE)
+
+def finish(job, status, error=''):
+    """
+    Сохраняет статус задания и описание ошибки
+    """
+    job.status = status
+    job.error = error
+    job.save(update_fields=['status', 'error', 'updated'])
@@ -1,10 +1,36 @@
 import base64
 import configparser
+import datetime
+import decimal
+import importlib
+import io
+import json
 import os
+import pathlib
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image, JpegImagePlugin
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from . import models
+from . import async_views, authentication, avatars, bulk, cache, conditional, memberships, models, parsers, renderers, renditions, routers, search, serializers, tasks, validators, views
 from user_organizations.settings import BASE_DIR
 
 config = configparser.ConfigParser()
@@ -14,10 +40,28 @@ API_URL = f"{config['site']['domain']}/api"
 EMAIL_NAME_LENGTH = 10
 TEST_AVATAR_PATH = BASE_DIR.joinpath("api//TEST_AVATARS")
 
+def use_temporary_media_root(testcase):
+    #Файлы аватаров теста записываются во временную директорию:
+    media_root = pathlib.Path(tempfile.mkdtemp())
+    testcase.addCleanup(shutil.rmtree, media_root, True)
+    media_settings = override_settings(
+        MEDIA_ROOT=media_root, AVATAR_UPLOADS_ROOT=media_root.joinpath('uploads')
+    )
+    media_settings.enable()
+    testcase.addCleanup(media_settings.disable)
+    patcher = mock.patch.object(avatars, 'USER_AVATARS_PATH', media_root)
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+    return media_root
+
 # Create your tests here.
+@override_settings(AVATAR_PROCESSING='eager')
 class UserOrganizationsAPITestCase(APITestCase):
 
     def setUp(self):
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        authentication.PRINCIPALS.clear()
+        authentication.CREDENTIALS.clear()
         #Создаём пользователей и организации до двух страниц:
         user = models.User.objects.create(email="someone1@yandex.ru")
         user2 = models.User.objects.create(email="someone2@yandex.ru")
@@ -77,6 +121,13 @@ class UserOrganizationsAPITestCase(APITestCase):
         response = self.client.post(url, body, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+        #Версия организации, от которой зависят ETag, не задаётся клиентом:
+        body = {"name": "ООО Версия", "version": 100, "modified": "2000-01-01T00:00:00Z"}
+        response = self.client.post(url, body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(response.json()), {"id", "users", "name", "description"})
+        self.assertEqual(models.Organization.objects.get(name="ООО Версия").version, 1)
+
     def test_organizations_get(self):
         url = f"{API_URL}/organizations/"
         response = self.client.get(url)
@@ -101,8 +152,1273 @@ class UserOrganizationsAPITestCase(APITestCase):
         response = self.client.put(url, body, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_user_edit_multipart_avatar(self):
+        with open(TEST_AVATAR_PATH.joinpath("av-to-change.png"), 'rb') as filestream:
+            body = { "first_name": "Andrey", "avatar": filestream }
+            response = self.client.put(f"{API_URL}/user/edit/?pk=1", body, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["first_name"], "Andrey")
+        self.assertTrue(response.json()["avatar"].endswith(".png"))
+
+    def test_user_edit_raw_avatar(self):
+        with open(TEST_AVATAR_PATH.joinpath("av-to-change-2.png"), 'rb') as filestream:
+            response = self.client.put(
+                f"{API_URL}/user/edit/?pk=1", filestream.read(), content_type='image/png'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()["avatar"].endswith("avatar.png"))
+
+    @override_settings(AVATAR_UPLOAD_MAX_SIZE=1024)
+    def test_user_edit_avatar_too_large(self):
+        with open(TEST_AVATAR_PATH.joinpath("av-to-change.png"), 'rb') as filestream:
+            response = self.client.put(
+                f"{API_URL}/user/edit/?pk=1", filestream.read(), content_type='image/png'
+            )
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
     def test_users_get(self):
         url = f"{API_URL}/users/"
         response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.json()["page_links"]), 2)
\ No newline at end of file
+        self.assertEqual(len(response.json()["page_links"]), 2)
+
+    def test_users_get_cursor_pagination(self):
+        url = f"{API_URL}/users/?pagination=cursor"
+        emails = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in context.captured_queries))
+            emails += [user['email'] for user in response.json()['users']]
+            url = response.json()['next_url']
+        self.assertEqual(len(emails), models.User.objects.count())
+        self.assertEqual(len(set(emails)), len(emails))
+
+    def test_organizations_get_cursor_pagination(self):
+        url = f"{API_URL}/organizations/?pagination=cursor"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("page_links", response.json())
+        self.assertIsNotNone(response.json()["next_url"])
+        self.assertIsNone(response.json()["previous_url"])
+
+class AuthenticatedAPITestCase(APITestCase):
+
+    def setUp(self):
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        authentication.PRINCIPALS.clear()
+        authentication.CREDENTIALS.clear()
+        user = models.User.objects.create(email="reader@yandex.ru")
+        user.set_password("qwerty1234")
+        user.save()
+        basic_auth_data = { "email": "reader@yandex.ru", "password": "qwerty1234" }
+        response = self.client.post(f'{API_URL}/token/', basic_auth_data, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + response.json()['access'])
+
+    def populate(self, prefix, users_count, organizations_count):
+        #Каждый новый пользователь состоит во всех новых организациях:
+        organizations = [
+            models.Organization.objects.create(name=f"{prefix}-организация-{i}")
+            for i in range(organizations_count)
+        ]
+        for i in range(users_count):
+            user = models.User.objects.create(email=f"{prefix}-{i}@yandex.ru")
+            user.organization_set.add(*organizations)
+
+    def count_queries(self, url):
+        #Число запросов измеряется без учёта кэша представлений и пользователей:
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        authentication.PRINCIPALS.clear()
+        authentication.CREDENTIALS.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+class UsersQueryCountTestCase(AuthenticatedAPITestCase):
+
+    def test_users_get_query_count_is_constant(self):
+        url = f"{API_URL}/users/"
+        self.populate("small", 2, 1)
+        small = self.count_queries(url)
+        self.populate("large", 30, 8)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_user_get_query_count_is_constant(self):
+        self.populate("small", 1, 1)
+        pk = models.User.objects.get(email="small-0@yandex.ru").pk
+        small = self.count_queries(f"{API_URL}/user/?pk={pk}")
+        self.populate("large", 5, 8)
+        pk = models.User.objects.get(email="large-0@yandex.ru").pk
+        self.assertEqual(self.count_queries(f"{API_URL}/user/?pk={pk}"), small)
+
+    def test_organizations_get_query_count_is_constant(self):
+        url = f"{API_URL}/organizations/"
+        self.populate("small", 2, 1)
+        small = self.count_queries(url)
+        self.populate("large", 30, 8)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_organizations_get_users_preview(self):
+        self.populate("large", 30, 1)
+        response = self.client.get(f"{API_URL}/organizations/")
+        organization = response.json()["organizations"][0]
+        self.assertEqual(organization["users_count"], 30)
+        self.assertEqual(len(organization["users"]), serializers.USERS_PREVIEW_LENGTH)
+        self.assertTrue(organization["users_url"].endswith(f"/organizations/{organization['id']}/members/"))
+
+    def test_organization_members_get(self):
+        self.populate("large", 12, 1)
+        pk = models.Organization.objects.get(name="large-организация-0").pk
+        response = self.client.get(f"{API_URL}/organizations/{pk}/members/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["users"]), 10)
+        self.assertEqual(len(response.json()["page_links"]), 2)
+        response = self.client.get(f"{API_URL}/organizations/{pk + 1}/members/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RepresentationCacheTestCase(AuthenticatedAPITestCase):
+
+    def get_cached(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(context.captured_queries)
+
+    def test_user_get_is_cached(self):
+        self.populate("small", 1, 2)
+        pk = models.User.objects.get(email="small-0@yandex.ru").pk
+        url = f"{API_URL}/user/?pk={pk}"
+        first, miss_queries = self.get_cached(url)
+        second, hit_queries = self.get_cached(url)
+        self.assertEqual(first, second)
+        self.assertLess(hit_queries, miss_queries)
+
+    def test_user_get_invalidated_on_save(self):
+        self.populate("small", 1, 1)
+        user = models.User.objects.get(email="small-0@yandex.ru")
+        url = f"{API_URL}/user/?pk={user.pk}"
+        self.get_cached(url)
+        user.first_name = "Андрей"
+        user.save()
+        self.assertEqual(self.get_cached(url)[0]["first_name"], "Андрей")
+
+    def test_changes_without_signals_are_not_served_from_cache(self):
+        #Изменение, сделанное другим процессом: сигналы этого процесса не отправляются:
+        self.populate("small", 2, 1)
+        user = models.User.objects.get(email="small-0@yandex.ru")
+        organization = user.organization_set.get()
+        self.get_cached(f"{API_URL}/users/")
+        self.get_cached(f"{API_URL}/organizations/")
+        models.User.objects.filter(pk=user.pk).update(first_name="Андрей", version=F("version") + 1)
+        models.Organization.objects.filter(pk=organization.pk).update(name="Новое название", version=F("version") + 1)
+
+        users = {item["email"]: item for item in self.get_cached(f"{API_URL}/users/")[0]["users"]}
+        self.assertEqual(users["small-0@yandex.ru"]["first_name"], "Андрей")
+        self.assertEqual(users["small-1@yandex.ru"]["organization_set"][0]["name"], "Новое название")
+        organizations = self.get_cached(f"{API_URL}/organizations/")[0]["organizations"]
+        self.assertIn("Новое название", [item["name"] for item in organizations])
+
+    def test_users_get_invalidated_on_membership_change(self):
+        self.populate("small", 2, 1)
+        organization = models.Organization.objects.get(name="small-организация-0")
+        newcomer = models.User.objects.create(email="newcomer@yandex.ru")
+        url = f"{API_URL}/users/"
+        self.get_cached(url)
+        #Новый участник должен появиться в списках организации у всех её участников:
+        newcomer.organization_set.add(organization)
+        users = {user["email"]: user for user in self.get_cached(url)[0]["users"]}
+        self.assertIn("newcomer@yandex.ru", users["small-0@yandex.ru"]["organization_set"][0]["users"])
+        self.assertEqual(len(users["newcomer@yandex.ru"]["organization_set"]), 1)
+
+    def test_organizations_get_invalidated_on_member_change(self):
+        self.populate("small", 2, 1)
+        url = f"{API_URL}/organizations/"
+        self.get_cached(url)
+        user = models.User.objects.get(email="small-0@yandex.ru")
+        user.email = "renamed@yandex.ru"
+        user.save()
+        organizations = self.get_cached(url)[0]["organizations"]
+        self.assertIn("renamed@yandex.ru", [user["email"] for user in organizations[0]["users"]])
+        models.Organization.objects.filter(pk=organizations[0]["id"]).first().users.clear()
+        self.assertEqual(self.get_cached(url)[0]["organizations"][0]["users_count"], 0)
+
+class ConditionalGetTestCase(AuthenticatedAPITestCase):
+
+    def test_user_get_not_modified(self):
+        self.populate("small", 1, 1)
+        pk = models.User.objects.get(email="small-0@yandex.ru").pk
+        url = f"{API_URL}/user/?pk={pk}"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        #Ответ 304 формируется без сериализации данных:
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        with mock.patch.object(serializers.UserSerializerOnlyRead, 'to_representation') as to_representation:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        to_representation.assert_not_called()
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_user_get_etag_changes_with_organization(self):
+        self.populate("small", 1, 1)
+        user = models.User.objects.get(email="small-0@yandex.ru")
+        url = f"{API_URL}/user/?pk={user.pk}"
+        etag = self.client.get(url)["ETag"]
+        organization = user.organization_set.get()
+        organization.description = "Новое описание"
+        organization.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_pages_not_modified(self):
+        self.populate("small", 3, 2)
+        for url in (f"{API_URL}/users/", f"{API_URL}/organizations/"):
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag = self.client.get(f"{API_URL}/organizations/")["ETag"]
+        user = models.User.objects.get(email="small-0@yandex.ru")
+        user.organization_set.remove(user.organization_set.first())
+        response = self.client.get(f"{API_URL}/organizations/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class AvatarJobsTestCase(AuthenticatedAPITestCase):
+
+    def upload(self, filename="av-to-change.png"):
+        user = models.User.objects.get(email="reader@yandex.ru")
+        with open(TEST_AVATAR_PATH.joinpath(filename), 'rb') as filestream:
+            response = self.client.put(
+                f"{API_URL}/user/edit/?pk={user.pk}", filestream.read(), content_type='image/png'
+            )
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT.joinpath(user.email), True)
+        return response
+
+    def test_user_edit_returns_accepted(self):
+        #Пул потоков получает задание только после фиксации транзакции,
+        #поэтому в тесте задание выполняется вызовом `tasks.run`:
+        response = self.upload()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNone(response.json()["avatar"])
+        job = response.json()["avatar_job"]
+        self.assertEqual(response["Location"], job["url"])
+        self.assertEqual(job["status"], models.AvatarJob.PENDING)
+        self.assertEqual(job["backlog"], 1)
+
+        tasks.run(job["id"])
+        job = self.client.get(job["url"]).json()
+        self.assertEqual(job["status"], models.AvatarJob.DONE)
+        self.assertEqual(job["backlog"], 0)
+        self.assertTrue(job["avatar"].endswith("/reader%40yandex.ru/avatar.png"))
+
+    def test_job_retried_after_error(self):
+        job_id = self.upload().json()["avatar_job"]["id"]
+        with mock.patch("api.avatars.process", side_effect=OSError("disk is full")), \
+                self.assertLogs("api.tasks", "WARNING"):
+            tasks.run(job_id)
+        job = models.AvatarJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts, job.error), (models.AvatarJob.PENDING, 1, "disk is full"))
+
+        call_command('process_avatar_jobs', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (models.AvatarJob.DONE, 2))
+
+    @override_settings(AVATAR_PROCESSING='eager')
+    def test_not_an_image_fails_job(self):
+        user = models.User.objects.get(email="reader@yandex.ru")
+        body = { "avatar": { 'file_bytes': str(base64.b64encode(b"not an image")), 'filename': "avatar.png" } }
+        response = self.client.put(f"{API_URL}/user/edit/?pk={user.pk}", body, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(models.AvatarJob.objects.get().status, models.AvatarJob.FAILED)
+
+@override_settings(AVATAR_PROCESSING='eager')
+class AvatarProcessingTestCase(AuthenticatedAPITestCase):
+
+    def upload_image(self, size, image_format, content_type):
+        user = models.User.objects.get(email="reader@yandex.ru")
+        stream = io.BytesIO()
+        Image.new('RGB', size, (200, 80, 40)).save(stream, image_format)
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT.joinpath(user.email), True)
+        return self.client.put(
+            f"{API_URL}/user/edit/?pk={user.pk}", stream.getvalue(), content_type=content_type
+        )
+
+    def saved_avatar(self):
+        user = models.User.objects.get(email="reader@yandex.ru")
+        with Image.open(user.avatar.path) as image:
+            return image.format, image.size
+
+    def test_large_jpeg_is_decoded_reduced(self):
+        draft = JpegImagePlugin.JpegImageFile.draft
+        with mock.patch.object(JpegImagePlugin.JpegImageFile, 'draft', autospec=True, side_effect=draft) as patched:
+            response = self.upload_image((3000, 2000), 'JPEG', 'image/jpeg')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.saved_avatar(), ('JPEG', (200, 200)))
+        self.assertEqual(patched.call_args[0][2], (300, 200))
+
+    def test_wide_png_is_not_upscaled(self):
+        response = self.upload_image((300, 100), 'PNG', 'image/png')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.saved_avatar(), ('PNG', (200, 100)))
+
+    def test_small_png_is_kept(self):
+        response = self.upload_image((64, 64), 'PNG', 'image/png')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.saved_avatar(), ('PNG', (64, 64)))
+
+    @override_settings(AVATAR_MAX_PIXELS=1000)
+    def test_too_many_pixels(self):
+        response = self.upload_image((300, 100), 'PNG', 'image/png')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"]["avatar"], ["Image is too large"])
+
+@override_settings(AVATAR_STORAGE='hashed')
+class HashedAvatarStorageTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+        self.users = [models.User.objects.create(email=f"hashed{i}@yandex.ru") for i in range(2)]
+
+    def process(self, user, color):
+        stream = io.BytesIO()
+        Image.new('RGB', (64, 64), color).save(stream, 'PNG')
+        staged = avatars.stage({
+            'filename': 'avatar.png', 'file_bytes': str(base64.b64encode(stream.getvalue()))
+        })
+        avatars.process(user, staged)
+        user.refresh_from_db()
+        return user.avatar.name
+
+    def stored_files(self):
+        return sorted(
+            path.relative_to(self.media_root).as_posix()
+            for path in self.media_root.joinpath('hashed').rglob('*') if path.is_file()
+        )
+
+    def test_identical_avatars_are_stored_once(self):
+        names = [self.process(user, (10, 20, 30)) for user in self.users]
+        self.assertEqual(names[0], names[1])
+        self.assertRegex(names[0], r'^hashed/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.png$')
+        self.assertEqual(self.stored_files(), [names[0]])
+
+    def test_gc_removes_unreferenced_files(self):
+        shared = [self.process(user, (10, 20, 30)) for user in self.users][0]
+        replaced = self.process(self.users[0], (40, 50, 60))
+        changed = self.process(self.users[0], (70, 80, 90))
+        #Прежние файлы не удаляются во время обработки:
+        self.assertEqual(self.stored_files(), sorted([shared, replaced, changed]))
+
+        out = io.StringIO()
+        call_command('gc_avatars', min_age=3600, stdout=out)
+        self.assertEqual(len(self.stored_files()), 3)
+
+        call_command('gc_avatars', min_age=0, batch_size=1, stdout=out)
+        self.assertEqual(self.stored_files(), sorted([shared, changed]))
+
+    def test_gc_keeps_old_file_referenced_again(self):
+        orphan = self.process(self.users[0], (10, 20, 30))
+        self.process(self.users[0], (40, 50, 60))
+        path = self.media_root.joinpath(orphan)
+        old = time.time() - 2 * 3600
+        os.utime(path, (old, old))
+
+        #Повторная загрузка того же изображения не перезаписывает файл:
+        self.assertEqual(self.process(self.users[1], (10, 20, 30)), orphan)
+        self.assertGreater(path.stat().st_mtime, old)
+
+        call_command('gc_avatars', min_age=3600, stdout=io.StringIO())
+        self.assertIn(orphan, self.stored_files())
+
+class AvatarRenditionsTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(AvatarRenditionsTestCase, self).setUp()
+        self.media_root = use_temporary_media_root(self)
+        self.media_root.joinpath("reader@yandex.ru").mkdir()
+        Image.new('RGB', (300, 240), (200, 80, 40)).save(self.media_root.joinpath("reader@yandex.ru/avatar.png"))
+        models.User.objects.filter(email="reader@yandex.ru").update(avatar="reader@yandex.ru/avatar.png")
+
+    def rendition_url(self, avatar_size):
+        response = self.client.get(f"{API_URL}/users/?avatar_size={avatar_size}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()["users"][0]["avatar"]
+
+    def test_rendition_url_fits_requested_size(self):
+        self.assertTrue(self.rendition_url(40).endswith("/api/avatars/64/reader@yandex.ru/avatar.png"))
+        self.assertTrue(self.rendition_url(1000).endswith("/api/avatars/200/reader@yandex.ru/avatar.png"))
+        response = self.client.get(f"{API_URL}/users/")
+        self.assertTrue(response.json()["users"][0]["avatar"].endswith("/reader%40yandex.ru/avatar.png"))
+
+    def test_rendition_is_generated_once(self):
+        url = self.rendition_url(32)
+        with mock.patch.object(renditions, 'render', wraps=renditions.render) as render:
+            for _ in range(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                with Image.open(io.BytesIO(b"".join(response.streaming_content))) as image:
+                    self.assertEqual((image.format, image.size), (renditions.rendition_format(), (32, 32)))
+        self.assertEqual(render.call_count, 1)
+
+    def test_concurrent_requests_render_once(self):
+        barrier = threading.Barrier(4)
+        render = renditions.render
+
+        def slow_render(*args):
+            time.sleep(0.05)
+            render(*args)
+
+        def request():
+            barrier.wait()
+            renditions.ensure("reader@yandex.ru/avatar.png", 64)
+
+        with mock.patch.object(renditions, 'render', side_effect=slow_render) as patched:
+            threads = [threading.Thread(target=request) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(patched.call_count, 1)
+
+    def test_rendition_regenerated_after_avatar_change(self):
+        path = renditions.ensure("reader@yandex.ru/avatar.png", 64)
+        source = self.media_root.joinpath("reader@yandex.ru/avatar.png")
+        modified = os.stat(path).st_mtime + 10
+        os.utime(source, (modified, modified))
+        with mock.patch.object(renditions, 'render', wraps=renditions.render) as render:
+            renditions.ensure("reader@yandex.ru/avatar.png", 64)
+        self.assertEqual(render.call_count, 1)
+
+    def test_unknown_rendition_not_found(self):
+        for url in (
+            "/api/avatars/48/reader@yandex.ru/avatar.png",
+            "/api/avatars/64/reader@yandex.ru/missing.png",
+            "/api/avatars/64/../settings.py",
+        ):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+class AvatarServingTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+        self.content = bytes(range(256)) * 4
+        for name in ("reader@yandex.ru/avatar.png", "hashed/ab/cd/abcd.png"):
+            path = self.media_root.joinpath(name)
+            path.parent.mkdir(parents=True)
+            path.write_bytes(self.content)
+
+    def test_file_served_with_validators(self):
+        response = self.client.get("/reader@yandex.ru/avatar.png")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get("/reader@yandex.ru/avatar.png", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_hashed_file_is_immutable(self):
+        response = self.client.get("/hashed/ab/cd/abcd.png")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+    def test_range_requests(self):
+        url = "/reader@yandex.ru/avatar.png"
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(AVATAR_SERVE='x-accel-redirect', AVATAR_ACCEL_PREFIX='/protected/')
+    def test_x_accel_redirect(self):
+        response = self.client.get("/reader@yandex.ru/avatar.png")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/reader%40yandex.ru/avatar.png")
+        self.assertEqual(response.content, b"")
+
+    def test_missing_file_not_found(self):
+        for url in ("/reader@yandex.ru/missing.png", "/reader@yandex.ru/", "/../config.ini"):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+class BulkProvisioningTestCase(AuthenticatedAPITestCase):
+
+    @override_settings(BULK_PASSWORD_WORKERS=2)
+    def test_users_bulk(self):
+        records = [
+            {"email": "bulk-0@yandex.ru", "password": "qwerty1234", "phone": "+79170000000"},
+            {"email": "bulk-1@yandex.ru", "password": "qwerty1234", "password2": "qwerty1234"},
+            {"email": "bulk-0@yandex.ru", "password": "qwerty1234"},
+            {"email": "reader@yandex.ru", "password": "qwerty1234"},
+            {"email": "not-an-email", "password": "qwerty1234"},
+            {"email": "bulk-2@yandex.ru", "password": "qwerty1234", "password2": "other"},
+        ]
+        self.addCleanup(bulk.shutdown_executor)
+        #Пароли хэшируются в пуле процессов, а не в текущем процессе:
+        with mock.patch.object(bulk, "make_password", side_effect=AssertionError("serial hashing")):
+            response = self.client.post(f"{API_URL}/users/bulk/", records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        report = response.json()
+        self.assertEqual((report["created"], report["failed"]), (2, 4))
+        self.assertEqual(
+            [result["status"] for result in report["results"]],
+            ["created", "created", "error", "error", "error", "error"]
+        )
+        self.assertEqual(report["results"][3]["errors"], {"email": ["Such user is exist"]})
+
+        user = models.User.objects.get(pk=report["results"][0]["id"])
+        self.assertEqual((user.email, user.phone), ("bulk-0@yandex.ru", "+79170000000"))
+        self.assertTrue(user.check_password("qwerty1234"))
+
+    def test_organizations_bulk(self):
+        self.populate("bulk", 2, 0)
+        user_ids = list(models.User.objects.filter(email__startswith="bulk-").values_list("pk", flat=True))
+        user_url = f"{API_URL}/user/?pk={user_ids[0]}"
+        self.assertEqual(self.client.get(user_url).json()["organization_set"], [])
+        version = models.User.objects.get(pk=user_ids[0]).version
+
+        records = [
+            {"name": "Bulk-1", "description": "Первая", "users": user_ids},
+            {"name": "Bulk-2"},
+            {"name": "Bulk-1"},
+            {"name": "Bulk-3", "users": [user_ids[0], 100000]},
+        ]
+        response = self.client.post(f"{API_URL}/organizations/bulk/", {"organizations": records}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "created", "error", "error"])
+
+        organization = models.Organization.objects.get(pk=results[0]["id"])
+        self.assertEqual(set(organization.users.values_list("pk", flat=True)), set(user_ids))
+        self.assertEqual(models.User.objects.get(pk=user_ids[0]).version, version + 1)
+        self.assertEqual(
+            [item["name"] for item in self.client.get(user_url).json()["organization_set"]], ["Bulk-1"]
+        )
+
+    @override_settings(BULK_MAX_ITEMS=2)
+    def test_bulk_limits(self):
+        records = [{"name": f"Bulk-{i}"} for i in range(3)]
+        response = self.client.post(f"{API_URL}/organizations/bulk/", records, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(f"{API_URL}/users/bulk/", {"users": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class MembershipChangeTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(MembershipChangeTestCase, self).setUp()
+        self.populate("member", 3, 1)
+        self.organization = models.Organization.objects.get(name="member-организация-0")
+        self.url = f"{API_URL}/organizations/{self.organization.pk}/members/"
+        self.members = list(self.organization.users.values_list("pk", flat=True))
+
+    def change(self, data):
+        authentication.PRINCIPALS.clear()
+        authentication.CREDENTIALS.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, data, format='json')
+        return response, len(context.captured_queries)
+
+    def test_add_and_remove_members(self):
+        reader = models.User.objects.get(email="reader@yandex.ru")
+        user_url = f"{API_URL}/user/?pk={reader.pk}"
+        self.assertEqual(self.client.get(user_url).json()["organization_set"], [])
+
+        response, _ = self.change({"add": [reader.pk, self.members[0]], "remove": self.members[1:]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"added": 1, "removed": 2, "users_count": 2})
+        self.assertEqual(
+            set(self.organization.users.values_list("pk", flat=True)), {reader.pk, self.members[0]}
+        )
+        self.assertEqual(models.User.objects.get(pk=reader.pk).version, reader.version + 1)
+        self.assertEqual(
+            [item["name"] for item in self.client.get(user_url).json()["organization_set"]],
+            ["member-организация-0"]
+        )
+
+    def test_query_count_does_not_depend_on_size(self):
+        self.populate("small", 2, 0)
+        small = list(models.User.objects.filter(email__startswith="small-").values_list("pk", flat=True))
+        _, small_queries = self.change({"add": small})
+        self.populate("large", 40, 0)
+        large = list(models.User.objects.filter(email__startswith="large-").values_list("pk", flat=True))
+        response, large_queries = self.change({"add": large})
+        self.assertEqual(response.json()["added"], 40)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_missing_user_changes_nothing(self):
+        response, _ = self.change({"add": [100000], "remove": self.members})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"]["users"], ['Invalid pk "100000" - object does not exist.'])
+        self.assertEqual(set(self.organization.users.values_list("pk", flat=True)), set(self.members))
+
+        response, _ = self.change({"add": self.members[:1], "remove": self.members[:1]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(f"{API_URL}/organizations/100000/members/", {"add": [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_key_errors_are_not_bad_data(self):
+        with mock.patch.object(memberships, "send_changed", side_effect=KeyError("handler")):
+            with self.assertRaises(KeyError):
+                self.change({"add": self.members[:1], "remove": self.members[1:]})
+        self.assertEqual(set(self.organization.users.values_list("pk", flat=True)), set(self.members))
+
+class PartialUserEditTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(PartialUserEditTestCase, self).setUp()
+        self.populate("patch", 0, 3)
+        self.organizations = list(models.Organization.objects.values_list("pk", flat=True))
+        self.user = models.User.objects.get(email="reader@yandex.ru")
+        self.user.organization_set.add(*self.organizations[:2])
+        self.user.refresh_from_db()
+        self.url = f"{API_URL}/user/edit/?pk={self.user.pk}"
+
+    def patch(self, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith(("UPDATE", "INSERT", "DELETE"))
+        ]
+        return response, writes
+
+    def test_patch_writes_only_changed_fields(self):
+        response, writes = self.patch({"phone": "89170000001"})
+        self.assertEqual(response.json()["phone"], "89170000001")
+        #Кроме пользователя обновляются только версии его организаций:
+        writes = [sql for sql in writes if not sql.startswith('UPDATE "api_organization"')]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"phone"', writes[0])
+        self.assertNotIn('"first_name"', writes[0])
+        self.assertNotIn('"password"', writes[0])
+
+        user = models.User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.first_name, user.version), (self.user.first_name, self.user.version + 1))
+
+    def test_patch_without_changes_does_not_write(self):
+        _, writes = self.patch({"phone": self.user.phone, "organization_set": self.organizations[:2]})
+        self.assertEqual(writes, [])
+        self.assertEqual(models.User.objects.get(pk=self.user.pk).version, self.user.version)
+
+    def test_patch_applies_membership_diff(self):
+        response, writes = self.patch({"organization_set": self.organizations[1:]})
+        self.assertEqual(
+            set(self.user.organization_set.values_list("pk", flat=True)), set(self.organizations[1:])
+        )
+        through = models.Organization.users.through._meta.db_table
+        membership_writes = [sql for sql in writes if through in sql.split("WHERE")[0]]
+        self.assertEqual([sql.split()[0] for sql in membership_writes], ["DELETE", "INSERT"])
+
+    def test_patch_rejects_unknown_organization(self):
+        response = self.client.patch(self.url, {"organization_set": [100000]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["errors"]["organization_set"], ['Invalid pk "100000" - object does not exist.']
+        )
+
+class CachedJWTAuthenticationTestCase(AuthenticatedAPITestCase):
+
+    def principal_lookups(self, expected_status=status.HTTP_200_OK):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"{API_URL}/organizations/")
+        self.assertEqual(response.status_code, expected_status)
+        return sum('"api_user"."email" =' in query["sql"] for query in context.captured_queries)
+
+    def test_principal_is_cached(self):
+        self.assertEqual(self.principal_lookups(), 1)
+        self.assertEqual(self.principal_lookups(), 0)
+
+    def test_deactivation_invalidates_principal(self):
+        self.principal_lookups()
+        user = models.User.objects.get(email="reader@yandex.ru")
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.principal_lookups(status.HTTP_401_UNAUTHORIZED), 1)
+
+    @override_settings(JWT_PRINCIPAL_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        self.assertEqual(self.principal_lookups(), 1)
+        self.assertEqual(self.principal_lookups(), 1)
+
+    @override_settings(JWT_STATELESS_AUTHENTICATION=True)
+    def test_stateless_mode(self):
+        self.assertEqual(self.principal_lookups(), 0)
+
+class CachedBasicAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        authentication.CREDENTIALS.clear()
+        self.user = models.User.objects.create(email="script@yandex.ru")
+        self.user.set_password("qwerty1234")
+        self.user.save()
+
+    def get(self, password="qwerty1234"):
+        credentials = base64.b64encode(f"script@yandex.ru:{password}".encode()).decode()
+        with mock.patch('django.contrib.auth.base_user.check_password', wraps=check_password) as checked:
+            response = self.client.get(f"{API_URL}/organizations/", HTTP_AUTHORIZATION=f"Basic {credentials}")
+        return response.status_code, checked.call_count
+
+    def test_verification_is_cached(self):
+        self.assertEqual(self.get(), (status.HTTP_200_OK, 1))
+        self.assertEqual(self.get(), (status.HTTP_200_OK, 0))
+        self.assertEqual(self.get("wrong"), (status.HTTP_401_UNAUTHORIZED, 1))
+        stats = authentication.CREDENTIALS.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 2, 1))
+
+    def test_password_change_drops_entry(self):
+        self.get()
+        self.user.first_name = "Скрипт"
+        self.user.save()
+        self.assertEqual(authentication.CREDENTIALS.stats()["entries"], 1)
+
+        self.user.set_password("other1234")
+        self.user.save()
+        self.assertEqual(authentication.CREDENTIALS.stats()["entries"], 0)
+        self.assertEqual(self.get(), (status.HTTP_401_UNAUTHORIZED, 1))
+
+    def test_hash_change_in_other_process_is_detected(self):
+        self.get()
+        models.User.objects.filter(pk=self.user.pk).update(password=make_password("other1234"))
+        self.assertEqual(self.get(), (status.HTTP_401_UNAUTHORIZED, 1))
+
+class AsyncReadViewsTestCase(TransactionTestCase):
+
+    def setUp(self):
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        authentication.PRINCIPALS.clear()
+        organization = models.Organization.objects.create(name="Асинхронная")
+        for i in range(3):
+            user = models.User.objects.create(email=f"async-{i}@yandex.ru")
+            user.set_password("qwerty1234")
+            user.save()
+            user.organization_set.add(organization)
+        response = self.client.post(
+            f"{API_URL}/token/", {"email": "async-0@yandex.ru", "password": "qwerty1234"},
+            content_type="application/json"
+        )
+        self.token = response.json()['access']
+        self.user_pk = models.User.objects.get(email="async-0@yandex.ru").pk
+
+    def get(self, client, path, authorized=True, **headers):
+        #AsyncClient передаёт именованные аргументы заголовками запроса ASGI:
+        headers = {name.replace("_", "-"): value for name, value in headers.items()}
+        if authorized:
+            headers["authorization"] = f"Bearer {self.token}"
+        return client.get(path, **headers)
+
+    async def test_async_views_match_sync_views(self):
+        client = AsyncClient()
+        threads = []
+        render = async_views.render
+
+        def recording_render(*args):
+            threads.append(threading.current_thread().name)
+            return render(*args)
+
+        with mock.patch.object(async_views, 'render', side_effect=recording_render):
+            for path, key in (("users/", "users"), ("organizations/", "organizations"), (f"user/?pk={self.user_pk}", None)):
+                sync_response = await sync_to_async(self.client.get)(
+                    f"/api/{path}", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+                )
+                response = await self.get(client, f"/api/async/{path}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response["ETag"], (await self.get(client, f"/api/async/{path}"))["ETag"])
+                if key:
+                    self.assertEqual(response.json()[key], sync_response.json()[key])
+                else:
+                    self.assertEqual(response.json(), sync_response.json())
+        self.assertTrue(threads and all(name.startswith("async-read") for name in threads))
+
+    async def test_async_conditional_and_auth(self):
+        client = AsyncClient()
+        response = await self.get(client, "/api/async/users/")
+        response = await self.get(client, "/api/async/users/", if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = await self.get(client, "/api/async/users/", authorized=False)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+
+    replica = 'replica_test'
+
+    @classmethod
+    def setUpClass(cls):
+        super(ReadReplicaRoutingTestCase, cls).setUpClass()
+        #Реплика - отдельный файл SQLite, заполняемый копией основной базы данных:
+        cls.replica_name = tempfile.mkstemp(suffix='.sqlite3')[1]
+        connections.databases[cls.replica] = {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.replica_name,
+        }
+        cls.replica_settings = override_settings(DATABASE_REPLICAS=[cls.replica])
+        cls.replica_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.replica_settings.disable()
+        connections[cls.replica].close()
+        del connections.databases[cls.replica]
+        os.remove(cls.replica_name)
+        super(ReadReplicaRoutingTestCase, cls).tearDownClass()
+
+    def setUp(self):
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        authentication.PRINCIPALS.clear()
+        organization = models.Organization.objects.create(name="Реплицированная")
+        user = models.User.objects.create(email="replicated@yandex.ru")
+        user.set_password("qwerty1234")
+        user.save()
+        user.organization_set.add(organization)
+        response = self.client.post(
+            f"{API_URL}/token/", {"email": "replicated@yandex.ru", "password": "qwerty1234"},
+            content_type="application/json"
+        )
+        self.client.credentials = {"HTTP_AUTHORIZATION": f"Bearer {response.json()['access']}"}
+        self.client.cookies.clear()
+        self.replicate()
+        #Изменения после копирования ещё не дошли до реплики:
+        models.User.objects.create(email="lagging@yandex.ru")
+
+    def replicate(self):
+        connections[self.replica].close()
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(self.replica_name)
+        try:
+            primary.connection.backup(replica)
+        finally:
+            replica.close()
+
+    def emails(self, path="users/"):
+        response = self.client.get(f"{API_URL}/{path}", **self.client.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {user["email"] for user in response.json()["users"]}
+
+    def test_get_views_read_from_replica(self):
+        self.assertEqual(self.emails(), {"replicated@yandex.ru"})
+        self.assertEqual(self.emails("async/users/"), {"replicated@yandex.ru"})
+        self.assertEqual(routers.read_database(), 'default')
+        self.assertEqual(models.User.objects.filter(email="lagging@yandex.ru").count(), 1)
+
+    def test_writes_use_primary_and_make_client_sticky(self):
+        response = self.client.post(
+            f"{API_URL}/organization/create/", {"name": "Новая", "users": []},
+            content_type="application/json", **self.client.credentials
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(models.Organization.objects.filter(name="Новая").exists())
+        self.assertIn(settings.DATABASE_STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.emails(), {"replicated@yandex.ru", "lagging@yandex.ru"})
+
+        self.client.cookies[settings.DATABASE_STICKY_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.emails(), {"replicated@yandex.ru"})
+
+    def test_replica_reads_are_not_cached(self):
+        user = models.User.objects.get(email="replicated@yandex.ru")
+        models.User.objects.filter(pk=user.pk).update(first_name="Новое")
+        response = self.client.get(f"{API_URL}/user/", {"pk": user.pk}, **self.client.credentials)
+        self.assertEqual(response.json()["first_name"], "")
+        key = cache.USERS.key(user.pk, conditional.user_versions([models.User.objects.get(pk=user.pk)])[0][0])
+        self.assertIsNone(cache.USERS.cache.get(key))
+
+        #Клиент, закреплённый за основной базой данных, получает свои изменения:
+        self.client.cookies[settings.DATABASE_STICKY_COOKIE] = str(time.time() + 60)
+        response = self.client.get(f"{API_URL}/user/", {"pk": user.pk}, **self.client.credentials)
+        self.assertEqual(response.json()["first_name"], "Новое")
+        self.assertIsNotNone(cache.USERS.cache.get(key))
+
+    def test_instances_read_from_replica_are_saved_to_primary(self):
+        routers.read_from(self.replica)
+        try:
+            user = models.User.objects.get(email="replicated@yandex.ru")
+        finally:
+            routers.read_from(None)
+        self.assertEqual(user._state.db, self.replica)
+        user.first_name = "Изменённое"
+        user.save()
+        self.assertEqual(models.User.objects.get(pk=user.pk).first_name, "Изменённое")
+
+class SQLiteTuningTestCase(TransactionTestCase):
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        database_name = tempfile.mkstemp(suffix='.sqlite3')[1]
+        self.addCleanup(os.remove, database_name)
+        primary = connections['default']
+        wrapper = primary.__class__({**primary.settings_dict, 'NAME': database_name}, alias='sqlite_tuning')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            values = {}
+            for name in settings.SQLITE_PRAGMAS:
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        self.assertEqual(values['journal_mode'], 'wal')
+        self.assertEqual(values['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(values['synchronous'], 1)
+        self.assertEqual(values['cache_size'], settings.SQLITE_PRAGMAS['cache_size'])
+
+    def test_atomic_blocks_begin_immediate(self):
+        with CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                models.User.objects.create(email="immediate@yandex.ru")
+        self.assertEqual(context.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+        with override_settings(SQLITE_IMMEDIATE_TRANSACTIONS=False), CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                models.User.objects.create(email="deferred@yandex.ru")
+        self.assertEqual(context.captured_queries[0]['sql'], 'BEGIN')
+
+class SearchTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(SearchTestCase, self).setUp()
+        models.User.objects.create(email="ivanov@yandex.ru", first_name="Иван", last_name="Иванов")
+        models.User.objects.create(email="petrov@mail.ru", first_name="Пётр", last_name="Иванченко")
+        models.User.objects.bulk_create([
+            models.User(email=f"bulk-{i}@yandex.ru", first_name="Сидор") for i in range(12)
+        ])
+        models.Organization.objects.create(name="Уфаоргсинтез", description="Нефтехимия")
+        models.Organization.objects.create(name="ГК Титан", description="Холдинг нефтехимии")
+
+    def find(self, path, query, **params):
+        response = self.client.get(f"{API_URL}/{path}/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_prefix_search_is_ranked(self):
+        users = self.find("users", "иван")["users"]
+        self.assertEqual([user["email"] for user in users], ["ivanov@yandex.ru", "petrov@mail.ru"])
+        users = self.find("users", "пётр ИВАН")["users"]
+        self.assertEqual([user["email"] for user in users], ["petrov@mail.ru"])
+        users = self.find("users", "mail")["users"]
+        self.assertEqual([user["email"] for user in users], ["petrov@mail.ru"])
+
+        organizations = self.find("organizations", "нефтехим")["organizations"]
+        self.assertEqual({organization["name"] for organization in organizations}, {"Уфаоргсинтез", "ГК Титан"})
+        organizations = self.find("organizations", "титан")["organizations"]
+        self.assertEqual([organization["name"] for organization in organizations], ["ГК Титан"])
+
+    def test_index_follows_writes(self):
+        user = models.User.objects.get(email="ivanov@yandex.ru")
+        user.last_name = "Смирнов"
+        user.save()
+        models.User.objects.filter(email="petrov@mail.ru").update(first_name="Семён")
+        self.assertEqual([user["email"] for user in self.find("users", "смирн")["users"]], ["ivanov@yandex.ru"])
+        self.assertEqual([user["email"] for user in self.find("users", "пётр")["users"]], [])
+
+        models.User.objects.filter(email="ivanov@yandex.ru").delete()
+        self.assertEqual(self.find("users", "смирн")["users"], [])
+
+    def test_pagination(self):
+        page = self.find("users", "сидор")
+        self.assertEqual(len(page["users"]), settings.REST_FRAMEWORK["PAGE_SIZE"])
+        self.assertIsNone(page["previous_url"])
+        self.assertIn("page=2", page["next_url"])
+
+        page = self.find("users", "сидор", page=2)
+        self.assertEqual(len(page["users"]), 2)
+        self.assertIsNone(page["next_url"])
+        self.assertIsNotNone(page["previous_url"])
+
+        response = self.client.get(f"{API_URL}/users/search/", {"q": "сидор", "page": 0})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ranking_covers_all_matches(self):
+        #Совпадений больше, чем помещалось в прежнее окно ранжирования, а лучшее из них имеет наибольший rowid:
+        models.User.objects.bulk_create([
+            models.User(email=f"more-{i}@yandex.ru", first_name="Сидор") for i in range(250)
+        ])
+        models.User.objects.create(email="sidorov@yandex.ru", first_name="Сидор", last_name="Сидор")
+        self.assertEqual(self.find("users", "сидор")["users"][0]["email"], "sidorov@yandex.ru")
+
+        pks = [pk for offset in range(0, 270, 10) for pk in search.USERS.search("сидор", 10, offset)]
+        self.assertEqual(len(pks), len(set(pks)))
+        self.assertEqual(set(pks), set(models.User.objects.filter(first_name="Сидор").values_list("pk", flat=True)))
+
+    def test_broad_queries_are_ordered_by_pk(self):
+        models.User.objects.create(email="sidorov@yandex.ru", first_name="Сидор", last_name="Сидор")
+        expected = list(models.User.objects.filter(first_name="Сидор").order_by("pk").values_list("pk", flat=True))
+        self.assertEqual(search.USERS.search("сидор", 1), expected[-1:])
+
+        #Совпадений больше `SEARCH_RANK_LIMIT`: без ранжирования, страницы не пересекаются:
+        with override_settings(SEARCH_RANK_LIMIT=5):
+            pks = [pk for offset in range(0, 20, 5) for pk in search.USERS.search("сидор", 5, offset)]
+        self.assertEqual(pks, expected)
+
+    def test_empty_query_is_rejected(self):
+        response = self.client.get(f"{API_URL}/users/search/", {"q": " @ "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.json()["errors"])
+
+    def test_search_without_index(self):
+        with mock.patch.object(search.SearchIndex, "exists", return_value=False):
+            users = self.find("users", "yandex IVAN")["users"]
+            organizations = self.find("organizations", "нефтехимии")["organizations"]
+        self.assertEqual([user["email"] for user in users], ["ivanov@yandex.ru"])
+        self.assertEqual([organization["name"] for organization in organizations], ["ГК Титан"])
+
+class PhoneFiltersTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(PhoneFiltersTestCase, self).setUp()
+        self.organization = models.Organization.objects.create(name="Телефонная")
+        self.russian = models.User.objects.create(email="russian@yandex.ru", phone="89170000001")
+        self.american = models.User.objects.create(email="american@gmail.com", phone="+16502530000")
+        self.american.organization_set.add(self.organization)
+        models.User.objects.create(email="silent@yandex.ru")
+
+    def emails(self, **params):
+        response = self.client.get(f"{API_URL}/users/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {user["email"] for user in response.json()["users"]}
+
+    def test_phone_is_normalized_on_save(self):
+        self.assertEqual((self.russian.phone_e164, self.russian.phone_country_code), ("+79170000001", 7))
+        self.american.phone = "+79170000002"
+        self.american.save(update_fields=["phone"])
+        self.american.refresh_from_db()
+        self.assertEqual((self.american.phone_e164, self.american.phone_country_code), ("+79170000002", 7))
+
+        with self.assertRaises(ValidationError):
+            validators.isPhoneNumber("12345")
+        response = self.client.patch(f"{API_URL}/user/edit/?pk={self.russian.pk}", {"phone": "12345"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("phone", response.json()["errors"])
+
+    def test_users_filters(self):
+        self.assertEqual(self.emails(phone="+7 917 000-00-01"), {"russian@yandex.ru"})
+        self.assertEqual(self.emails(phone="8 (917) 000-00-01"), {"russian@yandex.ru"})
+        self.assertEqual(self.emails(country_code=1), {"american@gmail.com"})
+        self.assertEqual(self.emails(organization=self.organization.pk), {"american@gmail.com"})
+        self.assertEqual(self.emails(organization=self.organization.pk, country_code=7), set())
+
+        response = self.client.get(f"{API_URL}/users/", {"phone": "12345", "country_code": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.json()["errors"]), {"phone", "country_code"})
+
+    def test_users_filters_use_indexes(self):
+        view = views.Users()
+        for filters in ({"phone": "+79170000001"}, {"country_code": 7}, {"organization": self.organization.pk}):
+            plan = view.filter_users(models.User.objects.all(), filters).explain()
+            self.assertIsNone(re.search(r"SCAN (TABLE )?api_user\b", plan), plan)
+
+    def test_backfill_migration(self):
+        models.User.objects.update(phone_e164=None, phone_country_code=None)
+        migration = importlib.import_module("api.migrations.0006_backfill_phone_e164")
+        with mock.patch.object(migration, "BATCH_SIZE", 1):
+            migration.backfill_phones(apps, mock.Mock(connection=connection))
+        self.assertEqual(
+            dict(models.User.objects.values_list("email", "phone_e164")),
+            {"reader@yandex.ru": None, "russian@yandex.ru": "+79170000001",
+             "american@gmail.com": "+16502530000", "silent@yandex.ru": None}
+        )
+
+class DirectoryCommandsTestCase(TestCase):
+
+    def setUp(self):
+        organization = models.Organization.objects.create(name="ГК Титан", description="Холдинг")
+        models.Organization.objects.create(name="Уфаоргсинтез")
+        for i in range(5):
+            user = models.User.objects.create(
+                email=f"someone{i}@yandex.ru", phone="+79170000000", avatar=f"someone{i}@yandex.ru/Selene.jpg"
+            )
+            user.set_password("qwerty1234")
+            user.save()
+            user.organization_set.add(organization)
+
+    def snapshot(self):
+        through = models.Organization.users.through
+        return (
+            list(models.User.objects.order_by('pk').values()),
+            list(models.Organization.objects.order_by('pk').values()),
+            list(through.objects.order_by('pk').values()),
+        )
+
+    def test_export_import_round_trip(self):
+        before = self.snapshot()
+        path = tempfile.mkstemp(suffix='.jsonl.gz')[1]
+        self.addCleanup(os.remove, path)
+
+        call_command('export_directory', path, '--chunk-size', '2', stdout=io.StringIO())
+        models.Organization.objects.all().delete()
+        models.User.objects.all().delete()
+        call_command('import_directory', path, '--batch-size', '2', stdout=io.StringIO())
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertTrue(models.User.objects.get(email="someone0@yandex.ru").check_password("qwerty1234"))
+
+        #Индексы поиска перестроены, триггеры вставки созданы заново:
+        self.assertEqual(len(search.USERS.search("someone", 10)), 5)
+        self.assertEqual(len(search.ORGANIZATIONS.search("холдинг", 10)), 1)
+        models.User.objects.create(email="imported-later@yandex.ru")
+        self.assertEqual(len(search.USERS.search("imported", 10)), 1)
+
+class SparseFieldsetTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(SparseFieldsetTestCase, self).setUp()
+        self.populate("поля", 3, 2)
+        self.user = models.User.objects.get(email="поля-0@yandex.ru")
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"{API_URL}/{path}", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json(), [query["sql"] for query in context.captured_queries]
+
+    def selecting(self, queries, column):
+        #Запросы построения представлений, выбирающие столбец (запрос аутентификации не учитывается):
+        return [sql for sql in queries if " IN (" in sql and column in sql.split(" FROM ")[0]]
+
+    def test_users_fields_trim_output_and_columns(self):
+        data, queries = self.get("users/", fields="email,first_name")
+        self.assertEqual({tuple(user) for user in data["users"]}, {("id", "email", "first_name")})
+        self.assertFalse(self.selecting(queries, '"api_organization"."name"'))
+        self.assertFalse(self.selecting(queries, '"api_user"."password"'))
+        self.assertFalse(self.selecting(queries, '"api_user"."last_name"'))
+
+        #Полное представление не смешивается с урезанным в кэше представлений:
+        data, _ = self.get("users/")
+        self.assertIn("organization_set", data["users"][0])
+
+    def test_user_expand_and_depth(self):
+        organizations = sorted(self.user.organization_set.values_list("pk", flat=True))
+        members = sorted(models.User.objects.filter(email__startswith="поля").values_list("pk", flat=True))
+
+        data, queries = self.get("user/", pk=self.user.pk, fields="organization_set", depth=0)
+        self.assertEqual(sorted(data["organization_set"]), organizations)
+        self.assertFalse(self.selecting(queries, '"api_organization"."name"'))
+
+        data, queries = self.get("user/", pk=self.user.pk, expand="organization_set")
+        self.assertEqual(sorted(data["organization_set"][0]["users"]), members)
+        self.assertFalse([sql for sql in self.selecting(queries, '"api_user"."email"') if "api_organization_users" in sql])
+
+        data, _ = self.get("user/", pk=self.user.pk, depth=2)
+        self.assertIn("поля-0@yandex.ru", data["organization_set"][0]["users"])
+
+        for params in ({"fields": "password"}, {"expand": "users"}, {"depth": -1}):
+            response = self.client.get(f"{API_URL}/user/", {"pk": self.user.pk, **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(set(response.json()["errors"]), set(params))
+
+    def test_organizations_fields_skip_preview_queries(self):
+        data, queries = self.get("organizations/", fields="name")
+        self.assertEqual({tuple(organization) for organization in data["organizations"]}, {("id", "name")})
+        self.assertFalse([sql for sql in queries if "api_organization_users" in sql])
+
+        data, queries = self.get("organizations/", fields="users", depth=0)
+        organization = next(item for item in data["organizations"] if item["id"] == self.user.organization_set.first().pk)
+        self.assertEqual(len(organization["users"]), 3)
+        self.assertTrue(all(isinstance(pk, int) for pk in organization["users"]))
+        self.assertFalse(self.selecting(queries, '"api_user"."phone"'))
+
+class FastReadSerializersTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(FastReadSerializersTestCase, self).setUp()
+        self.populate("быстро", 7, 3)
+        models.Organization.objects.create(name="Пустая", description="Без участников")
+        models.User.objects.filter(email="быстро-1@yandex.ru").update(
+            phone="+79170000001", first_name="Пётр", last_name="Иванов", avatar="быстро-1@yandex.ru/avatar.png"
+        )
+        models.User.objects.create(email="одиночка@yandex.ru", phone="+16502530000")
+        self.user = models.User.objects.get(email="быстро-1@yandex.ru")
+
+    def content(self, fast, path, params):
+        caches[settings.REPRESENTATIONS_CACHE].clear()
+        with override_settings(FAST_READ_SERIALIZERS=fast):
+            #Лишние параметры `q` и `pk` представления без них не учитывают:
+            response = self.client.get(f"{API_URL}/{path}", {**params, "q": "быстро", "pk": self.user.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.content
+
+    def test_output_is_identical_to_serializers(self):
+        self.assertIn(b"/avatar.png", self.content(True, "users/", {}))
+        users = json.loads(self.content(True, "users/", {}))["users"]
+        self.assertEqual(
+            {tuple(organization) for user in users for organization in user["organization_set"]},
+            {("id", "users", "name", "description")}
+        )
+        variants = (
+            {}, {"avatar_size": 64}, {"depth": 0}, {"depth": 1}, {"expand": "organization_set"},
+            {"fields": "email,avatar"}, {"fields": "organization_set,phone", "depth": 1},
+        )
+        for params in variants:
+            for path in ("users/", "user/"):
+                with self.subTest(path=path, params=params):
+                    self.assertEqual(self.content(True, path, params), self.content(False, path, params))
+
+        variants = (
+            {}, {"avatar_size": 200}, {"depth": 0}, {"fields": "users_count,users_url"},
+            {"fields": "name,users", "expand": "users"},
+        )
+        for params in variants:
+            with self.subTest(path="organizations/", params=params):
+                self.assertEqual(
+                    self.content(True, "organizations/", params), self.content(False, "organizations/", params)
+                )
+        for path in ("users/search/", "organizations/search/"):
+            with self.subTest(path=path):
+                self.assertEqual(self.content(True, path, {}), self.content(False, path, {}))
+
+class RenderersTestCase(AuthenticatedAPITestCase):
+
+    def setUp(self):
+        super(RenderersTestCase, self).setUp()
+        self.populate("формат", 3, 2)
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            "users": self.client.get(f"{API_URL}/users/").json()["users"],
+            "modified": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "amount": decimal.Decimal("1.50"), 1: "строка\u2028", "ids": {1},
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(renderers.ORJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.ORJSONRenderer().render(data), expected)
+        self.assertEqual(
+            renderers.ORJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4")
+        )
+
+    def test_json_parse_error(self):
+        for orjson in (renderers.orjson, None):
+            with mock.patch.object(parsers, "orjson", orjson):
+                response = self.client.post(
+                    f"{API_URL}/organization/create/", b'{"name": ', content_type="application/json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("JSON parse error", response.json()["detail"])
+
+    @skipUnless(renderers.msgpack, "msgpack не установлен")
+    def test_msgpack_negotiation(self):
+        json_response = self.client.get(f"{API_URL}/users/")
+        response = self.client.get(f"{API_URL}/users/", HTTP_ACCEPT=renderers.MSGPACK_MEDIA_TYPE)
+        self.assertEqual(response["Content-Type"], renderers.MSGPACK_MEDIA_TYPE)
+        self.assertEqual(renderers.msgpack.unpackb(response.content), json_response.json())
+        self.assertNotEqual(response["ETag"], json_response["ETag"])
+        self.assertIn("Accept", response["Vary"])
+
+        response = self.client.post(
+            f"{API_URL}/organization/create/", renderers.msgpack.packb({"name": "Упакованная"}),
+            content_type=renderers.MSGPACK_MEDIA_TYPE, HTTP_ACCEPT=renderers.MSGPACK_MEDIA_TYPE
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(renderers.msgpack.unpackb(response.content)["name"], "Упакованная")
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+class AvatarTooLarge(APIException):
+    """
+    Исключение превышения допустимого размера загружаемого
+    файла аватара `settings.AVATAR_UPLOAD_MAX_SIZE`
+    """
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Avatar file is too large'
+    default_code = 'avatar_too_large'
+
+class AvatarUploadHandler(TemporaryFileUploadHandler):
+    """
+    Класс обработчика загрузки файла аватара. Записывает тело
+    запроса во временный файл порциями по `chunk_size` байт и
+    прерывает загрузку, как только её размер превышает
+    `settings.AVATAR_UPLOAD_MAX_SIZE`
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        """
+        Отклоняет запрос до чтения тела, если объявленная длина
+        содержимого превышает допустимый размер
+        """
+        if content_length and content_length > settings.AVATAR_UPLOAD_MAX_SIZE:
+            raise AvatarTooLarge()
+        return super(AvatarUploadHandler, self).handle_raw_input(
+            input_data, META, content_length, boundary, encoding
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        """
+        Записывает очередную порцию файла во временный файл
+
+        Parameters
+        ----------
+        raw_data : bytes
+            Порция содержимого файла
+        start : int
+            Смещение порции от начала файла
+        """
+        if start + len(raw_data) > settings.AVATAR_UPLOAD_MAX_SIZE:
+            self.file.close()
+            raise AvatarTooLarge()
+        return super(AvatarUploadHandler, self).receive_data_chunk(raw_data, start)
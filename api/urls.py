@@ -4,7 +4,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView
 )
 
-from api import views
+from api import async_views, views
 
 urlpatterns = [
     path('token/', TokenObtainPairView.as_view()),
@@ -12,7 +12,25 @@ urlpatterns = [
     path('signup/', views.Registration.as_view()),
     path('organization/create/', views.OrganizationCreate.as_view()),
     path('organizations/', views.Organizations.as_view()),
+    path('organizations/bulk/', views.OrganizationsBulk.as_view()),
+    path('organizations/search/', views.OrganizationSearch.as_view()),
+    path(
+        'organizations/<int:pk>/members/',
+        views.OrganizationMembers.as_view(),
+        name='organization-members'
+    ),
     re_path(r'^user/(?:pk=(?P<pk>[0-9]+)/)?$', views.UserView.as_view()),
     re_path(r'^user/edit/(?:pk=(?P<pk>[0-9]+)/)?$', views.UserEdit.as_view()),
-    path('users/', views.Users.as_view())
+    path('user/avatar/jobs/<int:pk>/', views.AvatarJobView.as_view(), name='avatar-job'),
+    path(
+        'avatars/<int:size>/<path:name>',
+        views.AvatarRendition.as_view(),
+        name='avatar-rendition'
+    ),
+    path('users/', views.Users.as_view()),
+    path('users/bulk/', views.UsersBulk.as_view()),
+    path('users/search/', views.UserSearch.as_view()),
+    path('async/user/', async_views.user),
+    path('async/users/', async_views.users),
+    path('async/organizations/', async_views.organizations)
 ]
\ No newline at end of file
@@ -1,4 +1,47 @@
+import functools
+
 import phonenumbers
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+@functools.lru_cache(maxsize=4096)
+def _parse_phone(number, region):
+    phone_number = phonenumbers.parse(number, region)
+    if not phonenumbers.is_valid_number(phone_number):
+        raise phonenumbers.NumberParseException(phonenumbers.NumberParseException.NOT_A_NUMBER, number)
+    return (
+        phonenumbers.format_number(phone_number, phonenumbers.PhoneNumberFormat.E164),
+        phone_number.country_code
+    )
+
+def parse_phone(number):
+    """
+    Переводит телефонный номер в международный формат E.164.
+    Номер без кода страны разбирается как номер страны
+    `settings.PHONE_DEFAULT_REGION`. Результаты разбора кэшируются,
+    поэтому проверка и сохранение номера разбирают его один раз
+
+    Parameters
+    ----------
+    number : str
+        Телефонный номер
+
+    Returns
+    -------
+    e164 : str
+        Номер в формате E.164
+    country_code : int
+        Телефонный код страны
+
+    Raises
+    ------
+    django.core.exceptions.ValidationError
+        Если номер не разбирается или не существует
+    """
+    try:
+        return _parse_phone(number, settings.PHONE_DEFAULT_REGION)
+    except phonenumbers.NumberParseException:
+        raise ValidationError('Enter a valid phone number.', code='invalid_phone')
 
 def isPhoneNumber(number):
     """
@@ -11,16 +54,10 @@ def isPhoneNumber(number):
     ----------
     number : str
         Телефонный номер
-        
-    Returns
-    -------
-    number: str или False
-        Возможность записи - телефонный номер в 
-        международном формате, в противном случае - False
+
+    Raises
+    ------
+    django.core.exceptions.ValidationError
+        Если номер нельзя перевести в международный формат
     """
-    try:
-        phone_number = phonenumbers.parse(number)
-    except phonenumbers.NumberParseException:
-        return False
-    else:
-        return ''.join(('+', phone_number.country_code, phone_number.national_number))
\ No newline at end of file
+    parse_phone(number)
@@ -1,8 +1,23 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import JsonResponse
+from django.utils._os import safe_join
+from django.views import View
 from rest_framework import generics, status
 from rest_framework import permissions as rest_perm
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from . import models, serializers
+from . import avatars, bulk, cache, conditional, memberships, models, readers, renditions, search, serializers, serving, tasks
+from .parsers import ImageUploadParser
+from .uploads import AvatarUploadHandler
+from .cache import CachedRepresentationMixin
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsetMixin
+from .pagination import PaginationModeMixin, RankedPagination
 # Create your views here.
 
 
@@ -55,10 +70,102 @@ class Registration(APIView):
 
         return Response({'message': 'Registration success'}, status=status.HTTP_201_CREATED)
     
+class BulkCreateView(APIView):
+    """
+    Базовый класс представлений пакетного создания объектов.
+    Принимает список записей (или объект с этим списком под ключом
+    `collection_key`) длиной до `settings.BULK_MAX_ITEMS` и отвечает
+    отчётом по каждой записи: 201, если созданы все объекты, 207,
+    если часть записей содержит ошибки, 400, если не создано ничего
+    """
+
+    permission_classes = [rest_perm.IsAuthenticated]
+    collection_key = None
+    create = None
+
+    def post(self, request, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента со списком записей
+
+            headers: 
+                {
+                    'Authorization': 'Bearer <JWT>',
+                    'Content-Type': 'application/json'
+                }
+
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Отчёт о создании объектов
+
+            {
+                'created': <количество созданных объектов>,
+                'failed': <количество записей с ошибками>,
+                'results': [
+                    {'index': <индекс записи>, 'status': 'created', 'id': <id объекта>, ...},
+                    {'index': <индекс записи>, 'status': 'error', 'errors': {...}},
+                    ...
+                ]
+            }
+        """
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get(self.collection_key)
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Bad data', 'errors': {
+                self.collection_key: ['Expected a non-empty list of records']
+            }}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BULK_MAX_ITEMS:
+            return Response({'error': 'Bad data', 'errors': {
+                self.collection_key: [f'Ensure this list has no more than {settings.BULK_MAX_ITEMS} records']
+            }}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = self.create(items)
+        created = sum(result['status'] == bulk.CREATED for result in results)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created, 'failed': len(results) - created, 'results': results
+        }, status=response_status)
+
+class UsersBulk(BulkCreateView):
+    """
+    Пакетная регистрация пользователей. Записи:
+    `{'email': ..., 'password': ..., 'password2': ... (необязательный),
+    'phone': ..., 'first_name': ..., 'last_name': ...}`
+    """
+    collection_key = 'users'
+    create = staticmethod(bulk.create_users)
+
+class OrganizationsBulk(BulkCreateView):
+    """
+    Пакетное создание организаций. Записи:
+    `{'name': ..., 'description': ..., 'users': [<id пользователя>, ...]}`
+    """
+    collection_key = 'organizations'
+    create = staticmethod(bulk.create_organizations)
+
 class UserEdit(generics.UpdateAPIView):
 
     permission_classes = [rest_perm.IsAuthenticated]
     serializer_class = serializers.UserSerializer
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, MultiPartParser, ImageUploadParser]
+
+    def initialize_request(self, request, *args, **kwargs):
+        """
+        Заменяет обработчики загрузки файлов запроса обработчиком,
+        который пишет файл аватара во временный файл порциями
+        и ограничивает его размер
+        """
+        request.upload_handlers = [AvatarUploadHandler(request)]
+        return super(UserEdit, self).initialize_request(request, *args, **kwargs)
 
     def get_object(self):
         """
@@ -84,7 +191,10 @@ class UserEdit(generics.UpdateAPIView):
             headers: 
                 {
                     'Authorization': 'Bearer <JWT>',
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json' 
+                        или 'multipart/form-data' (аватар - файл в поле 'avatar')
+                        или 'image/<тип>' (тело запроса - файл аватара, имя файла 
+                            в необязательном заголовке 'Content-Disposition')
                 }
 
             json: 
@@ -96,7 +206,9 @@ class UserEdit(generics.UpdateAPIView):
                     'last_name': '<Фамилия пользователя>', 
                     'avatar': '<http://абсолютная/ссылка/на/файл/аватара.ext>', 
                     'organization_set': <Список id организаций [ 1, ..., n]>
-                    !NB: Список, переданный в 'organization_set' заменит прежний
+                    !NB: Список, переданный в 'organization_set' заменит прежний;
+                    в базу данных записываются только изменившиеся поля
+                    и разница между прежним и новым списком организаций
                 }
 
             params:
@@ -107,7 +219,12 @@ class UserEdit(generics.UpdateAPIView):
         Returns
         -------
         json: rest_framework.response.Response
-            Сериализованные данные пользователя после модификации
+            Сериализованные данные пользователя после модификации.
+
+            Если передан файл аватара, он обрабатывается заданием в фоне:
+            ответ 202 содержит прежний аватар пользователя и состояние
+            задания 'avatar_job' (см. `AvatarJobView`), ссылка на которое
+            передаётся также заголовком 'Location'
 
             {
                 'id': <id пользователя>, 
@@ -119,20 +236,196 @@ class UserEdit(generics.UpdateAPIView):
                 'organization_set': <Список организаций [ 'Организация 1', ..., 'Организация n']
             } 
         """
+        return self.edit(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        """
+        Изменяет только переданные поля пользователя. Параметры
+        запроса и ответ такие же, как у `put`, но список
+        'organization_set', если передан, применяется разницей:
+        добавляются только новые и удаляются только исключённые
+        организации. Запрос, который ничего не меняет, не выполняет
+        запись в базу данных
+        """
+        return self.edit(request, partial=True)
+
+    def edit(self, request, partial):
+        """
+        Проверяет данные пользователя, сохраняет изменившиеся поля
+        и передаёт файл аватара на обработку
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента
+        partial : bool
+            Частичное изменение (PATCH)
+
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Сериализованные данные пользователя после модификации
+        """
         user = self.get_object()
-        serializer = self.get_serializer(user, context={'request': request}, data=request.data)
-        if serializer.is_valid():
-            serializer.save()
+        serializer = self.get_serializer(
+            user, context={'request': request}, data=request.data, partial=partial
+        )
+        if not serializer.is_valid():
+            if serializer.staged_avatar:
+                avatars.discard(serializer.staged_avatar)
+            return Response(
+                {'error': 'Bad data', 'errors': serializer.errors }, 
+                status=status.HTTP_400_BAD_REQUEST
+             )
+
+        serializer.save()
+        if not serializer.staged_avatar:
             return Response(serializer.data, status=status.HTTP_200_OK,)
+
+        job = tasks.enqueue(user, serializer.staged_avatar)
+        if job.status == models.AvatarJob.DONE:
+            user.refresh_from_db()
+            return Response(self.get_serializer(user).data, status=status.HTTP_200_OK,)
+        if job.status == models.AvatarJob.FAILED:
+            return Response(
+                {'error': 'Bad data', 'errors': {'avatar': [job.error]}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        srd_job = serializers.AvatarJobSerializer(job, context={'request': request}).data
         return Response(
-            {'error': 'Bad data', 'errors': serializer.errors }, 
-            status=status.HTTP_400_BAD_REQUEST
-         )
+            {**serializer.data, 'avatar_job': srd_job},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': srd_job['url']}
+        )
+
+class AvatarJobView(generics.GenericAPIView):
+
+    permission_classes = [rest_perm.IsAuthenticated]
+    serializer_class = serializers.AvatarJobSerializer
+    queryset = models.AvatarJob.objects.select_related('user')
+
+    def get(self, request, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента
+
+            headers: 
+                {
+                    'Authorization': 'Bearer <JWT>'
+                }
+
+            path:
+                /user/avatar/jobs/<id задания>/
+
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Состояние задания обработки аватара
+
+            {
+                'id': <id задания>,
+                'url': '<http://ссылка/на/api/user/avatar/jobs/<id>/>',
+                'status': '<pending | processing | done | failed>',
+                'attempts': <Количество попыток обработки>,
+                'error': '<Описание ошибки последней попытки>',
+                'avatar': '<http://абсолютная/ссылка/на/файл/аватара.ext>',
+                'backlog': <Количество заданий в очереди>,
+                'created': '<Время создания задания>',
+                'updated': '<Время последнего изменения задания>'
+            }
+        """
+        try:
+            job = self.get_queryset().get(pk=kwargs['pk'])
+        except models.AvatarJob.DoesNotExist:
+            return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
     
-class UserView(generics.GenericAPIView):
+class AvatarFile(View):
+    """
+    Отдаёт файл аватара из `MEDIA_ROOT` по ссылке `MEDIA_URL<путь>`
+    (`api.serving.serve`)
+    """
+
+    def get(self, request, name):
+        """
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            Запрос клиента
+        name : str
+            Путь к файлу аватара относительно `MEDIA_ROOT`
+
+        Returns
+        -------
+        response : django.http.HttpResponse
+            Файл аватара
+        """
+        try:
+            path = safe_join(settings.MEDIA_ROOT, name)
+        except SuspiciousFileOperation:
+            return JsonResponse({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        if not os.path.isfile(path):
+            return JsonResponse({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        return serving.serve(request, name, path)
+
+class AvatarRendition(View):
+    """
+    Отдаёт рендеринг аватара размером `<size>` x `<size>`,
+    создавая его при первом запросе. Ссылки на рендеринги
+    возвращаются в поле `avatar` представлений пользователей,
+    если клиент передал параметр `avatar_size`
+    """
+
+    def get(self, request, size, name):
+        """
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            Запрос клиента
+        size : int
+            Размер рендеринга из `renditions.RENDITION_SIZES`
+        name : str
+            Путь к файлу аватара относительно `MEDIA_ROOT`
+
+        Returns
+        -------
+        response : django.http.HttpResponse
+            Файл рендеринга
+        """
+        if size not in renditions.RENDITION_SIZES or name.startswith(f'{renditions.RENDITIONS_DIRECTORY}/'):
+            return JsonResponse({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            path = renditions.ensure(name, size)
+        except (FileNotFoundError, IsADirectoryError, SuspiciousFileOperation, avatars.InvalidAvatar):
+            return JsonResponse({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        return serving.serve(request, renditions.rendition_name(name, size), path)
+
+class UserView(ConditionalGetMixin, SparseFieldsetMixin, CachedRepresentationMixin, generics.GenericAPIView):
 
     permission_classes = [rest_perm.IsAuthenticated]
     serializer_class = serializers.UserSerializerOnlyRead
+    queryset = models.User.objects.all()
+    representation_cache = cache.USERS
+    representation_reader = readers.UserReader
+    version_loader = staticmethod(conditional.user_versions)
+    read_replica = True
+
+    def get_queryset(self):
+        """
+        Возвращает набор запросов пользователей с предварительной
+        выборкой связанных организаций и их участников, ограниченный
+        полями и связями, выбранными клиентом
+
+        Returns
+        -------
+        queryset: django.db.models.QuerySet
+            Набор запросов модели `api.models.User`
+        """
+        queryset = super(UserView, self).get_queryset()
+        return self.serializer_class.setup_eager_loading(queryset, self.get_fieldset())
 
     def get_object(self):
         """
@@ -145,7 +438,7 @@ class UserView(generics.GenericAPIView):
             Экземпляр пользователя для модификации данных
         """
         pk = self.request.query_params.get('pk')
-        return models.User.objects.get(pk=pk)
+        return self.get_queryset().get(pk=pk)
 
     def get(self, request, *args, **kwargs):
         """
@@ -157,12 +450,22 @@ class UserView(generics.GenericAPIView):
             headers: 
                 {
                     'Authorization': 'Bearer <JWT>',
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'If-None-Match': '<ETag предыдущего ответа>' (необязательный)
                 }
 
             params:
                 {
-                    'pk': <id пользователя>
+                    'pk': <id пользователя>,
+                    'avatar_size': <размер аватара в пикселях> (необязательный, 
+                        ссылка на аватар заменяется ссылкой на его рендеринг
+                        подходящего размера),
+                    'fields': '<Поля представления через запятую>' (необязательный,
+                        поле 'id' выводится всегда),
+                    'expand': '<Раскрываемые связи через запятую: organization_set,
+                        organization_set.users>' (необязательный, нераскрытые
+                        связи выводятся списками id),
+                    'depth': <Наибольшая глубина раскрываемых связей> (необязательный)
                 }
         Returns
         -------
@@ -188,19 +491,81 @@ class UserView(generics.GenericAPIView):
                                     ]
             }
         """
-        try: 
-            user = self.get_object()
-        except models.User.DoesNotExist:
+        try:
+            pk = int(request.query_params.get('pk'))
+        except (TypeError, ValueError):
+            return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        fieldset = self.get_fieldset_params()
+        if not fieldset.is_valid():
+            return Response(
+                {'error': 'Bad data', 'errors': fieldset.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        users = list(self.queryset.filter(pk=pk).only('pk', 'version', 'modified'))
+        if not users:
             return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = self.get_serializer(user)
-        return Response(serializer.data,status=status.HTTP_200_OK)
+        versions = self.version_loader(users)
+        etag, last_modified = self.get_validators(versions)
+        if self.is_not_modified(etag, last_modified):
+            return self.conditional_response(etag, last_modified)
+
+        representations = self.get_representations(users, versions)
+        if not representations:
+            return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+        return self.conditional_response(etag, last_modified, representations[0])
 
-class Users(generics.ListAPIView):
+class Users(ConditionalGetMixin, SparseFieldsetMixin, CachedRepresentationMixin, PaginationModeMixin, generics.ListAPIView):
 
     permission_classes = [rest_perm.IsAuthenticated]
     serializer_class = serializers.UserSerializerOnlyRead
     queryset = models.User.objects.all()
+    representation_cache = cache.USERS
+    representation_reader = readers.UserReader
+    version_loader = staticmethod(conditional.user_versions)
+    read_replica = True
+
+    def get_queryset(self):
+        """
+        Возвращает набор запросов пользователей с предварительной
+        выборкой связанных организаций и их участников, ограниченный
+        полями и связями, выбранными клиентом
+
+        Returns
+        -------
+        queryset: django.db.models.QuerySet
+            Набор запросов модели `api.models.User`
+        """
+        queryset = super(Users, self).get_queryset()
+        return self.serializer_class.setup_eager_loading(queryset, self.get_fieldset())
+
+    def filter_users(self, queryset, filters):
+        """
+        Фильтрует пользователей по номеру телефона в формате E.164,
+        коду страны и членству в организации. Каждый фильтр
+        выполняется по индексу: `phone_e164`, (`phone_country_code`,
+        `phone`, `id`) и промежуточной таблице `Organization.users`
+
+        Parameters
+        ----------
+        queryset : django.db.models.QuerySet
+            Набор запросов модели `api.models.User`
+        filters : dict
+            Проверенные параметры `serializers.UserFilterSerializer`
+
+        Returns
+        -------
+        queryset: django.db.models.QuerySet
+            Отфильтрованный набор запросов
+        """
+        if 'phone' in filters:
+            queryset = queryset.filter(phone_e164=filters['phone'])
+        if 'country_code' in filters:
+            queryset = queryset.filter(phone_country_code=filters['country_code'])
+        if 'organization' in filters:
+            queryset = queryset.filter(organization=filters['organization'])
+        return queryset
 
     def get(self, request, *args, **kwargs):
         """
@@ -211,7 +576,22 @@ class Users(generics.ListAPIView):
 
             headers: 
                 {
-                    'Authorization': 'Bearer <JWT>'
+                    'Authorization': 'Bearer <JWT>',
+                    'If-None-Match': '<ETag предыдущего ответа>' (необязательный)
+                }
+
+            params:
+                {
+                    'pagination': 'cursor' (необязательный, постраничное
+                        отображение по курсору вместо номера страницы),
+                    'cursor': <курсор из ссылки 'next_url' или 'previous_url'>,
+                    'avatar_size': <размер аватаров в пикселях> (необязательный),
+                    'phone': '<Телефонный номер>' (необязательный),
+                    'country_code': <Телефонный код страны> (необязательный),
+                    'organization': <id организации пользователей> (необязательный),
+                    'fields': '<Поля представления через запятую>' (необязательный),
+                    'expand': '<Раскрываемые связи через запятую>' (необязательный),
+                    'depth': <Наибольшая глубина раскрываемых связей> (необязательный)
                 }
             
         Returns
@@ -241,11 +621,27 @@ class Users(generics.ListAPIView):
                             ...
             ]
         """
-        paginate_users = self.paginator.paginate_queryset(self.queryset, request)
-        srd_users = self.serializer_class(paginate_users, context={'request': request}, many=True)
-        context = { 'users': srd_users.data }
-        context.update(self.paginator.get_html_context())
-        return Response(context, status=status.HTTP_200_OK,)
+        filters = serializers.UserFilterSerializer(data=request.query_params)
+        fieldset = self.get_fieldset_params()
+        if not all([filters.is_valid(), fieldset.is_valid()]):
+            return Response(
+                {'error': 'Bad data', 'errors': {**filters.errors, **fieldset.errors}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        users = self.queryset.only('pk', 'version', 'modified')
+        paginate_users = self.paginator.paginate_queryset(
+            self.filter_users(users, filters.validated_data), request
+        )
+        html_context = self.paginator.get_html_context()
+        versions = self.version_loader(paginate_users)
+        etag, last_modified = self.get_validators(versions, html_context)
+        if self.is_not_modified(etag, last_modified):
+            return self.conditional_response(etag, last_modified)
+
+        srd_users = self.get_representations(paginate_users, versions)
+        context = { 'users': srd_users }
+        context.update(html_context)
+        return self.conditional_response(etag, last_modified, context)
     
 class OrganizationCreate(generics.CreateAPIView):
 
@@ -294,11 +690,26 @@ class OrganizationCreate(generics.CreateAPIView):
         return Response({'message': 'Invalid data', 'errors': serializer.errors},
                         status=status.HTTP_400_BAD_REQUEST)
     
-class Organizations(generics.ListAPIView):
+class Organizations(ConditionalGetMixin, SparseFieldsetMixin, CachedRepresentationMixin, PaginationModeMixin, generics.ListAPIView):
 
     permission_classes = [rest_perm.IsAuthenticated]
     serializer_class = serializers.OrganizationOnlyRead
     queryset = models.Organization.objects.all()
+    representation_cache = cache.ORGANIZATIONS
+    representation_reader = readers.OrganizationReader
+    version_loader = staticmethod(conditional.organization_versions)
+    read_replica = True
+
+    def get_queryset(self):
+        """
+        Returns
+        -------
+        queryset: django.db.models.QuerySet
+            Набор запросов модели `api.models.Organization`,
+            ограниченный полями, выбранными клиентом
+        """
+        queryset = super(Organizations, self).get_queryset()
+        return self.serializer_class.setup_eager_loading(queryset, self.get_fieldset())
 
     def get(self, request, *args, **kwargs):
         """
@@ -310,7 +721,20 @@ class Organizations(generics.ListAPIView):
             headers: 
                 {
                     'Authorization': 'Bearer <JWT>',
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'If-None-Match': '<ETag предыдущего ответа>' (необязательный)
+                }
+
+            params:
+                {
+                    'pagination': 'cursor' (необязательный, постраничное
+                        отображение по курсору вместо номера страницы),
+                    'cursor': <курсор из ссылки 'next_url' или 'previous_url'>,
+                    'avatar_size': <размер аватаров в пикселях> (необязательный),
+                    'fields': '<Поля представления через запятую>' (необязательный),
+                    'expand': '<Раскрываемые связи: users>' (необязательный, без
+                        раскрытия 'users' - список id первых участников),
+                    'depth': <Наибольшая глубина раскрываемых связей> (необязательный)
                 }
             
         Returns
@@ -323,28 +747,260 @@ class Organizations(generics.ListAPIView):
                 'organizations':   [ 
                     {
                         'id': <id организации 1>, 
-                        'users': <Список пользователей [ 
+                        'name': 'Титан', 
+                        'description': None,
+                        'users_count': <Количество участников организации>,
+                        'users': <Первые участники организации [ 
                                     {
                                         'id': <id пользователя 1>, 
                                         'email': 'email пользователя-1@yandex.ru', 
                                         'phone': '<Телефонный номер пользователя-1>', 
                                         'first_name': 'Имя пользователя-1', 
                                         'last_name': 'Фамилия пользователя-1', 
-                                        'avatar': '<Путь к аватару пользователя-1>', 
-                                        'organization_set': <Список названий организаций пользователя-1 
-                                            ['Организация-1', ..., 'Организация-n']
+                                        'avatar': '<Путь к аватару пользователя-1>'
                                     },
                                     ...
                                 ]>, 
-                        'name': 'Титан', 
-                        'description': None
+                        'users_url': '<http://ссылка/на/api/organizations/<id>/members/>'
                     },
                     ... 
                 ]
             }
         """
-        paginate_organizations = self.paginator.paginate_queryset(self.queryset, request)
-        srd_organizations = self.serializer_class(paginate_organizations, many=True)
-        context = { "organizations": srd_organizations.data }
+        fieldset = self.get_fieldset_params()
+        if not fieldset.is_valid():
+            return Response(
+                {'error': 'Bad data', 'errors': fieldset.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        paginate_organizations = self.paginator.paginate_queryset(
+            self.queryset.only('pk', 'version', 'modified'), request
+        )
+        html_context = self.paginator.get_html_context()
+        versions = self.version_loader(paginate_organizations)
+        etag, last_modified = self.get_validators(versions, html_context)
+        if self.is_not_modified(etag, last_modified):
+            return self.conditional_response(etag, last_modified)
+
+        srd_organizations = self.get_representations(paginate_organizations, versions)
+        context = { "organizations": srd_organizations }
+        context.update(html_context)
+        return self.conditional_response(etag, last_modified, context)
+
+class SearchView(CachedRepresentationMixin, generics.GenericAPIView):
+    """
+    Базовый класс представлений поиска по индексу `search_index`.
+    Результаты упорядочены по релевантности и разбиты на страницы
+    `RankedPagination`, представления объектов берутся из кэша
+    представлений так же, как в списках
+    """
+
+    permission_classes = [rest_perm.IsAuthenticated]
+    pagination_class = RankedPagination
+    read_replica = True
+    search_index = None
+    collection_key = None
+
+    def get(self, request, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента
+
+            headers: 
+                {
+                    'Authorization': 'Bearer <JWT>'
+                }
+
+            params:
+                {
+                    'q': '<Поисковый запрос: слова или их начала>',
+                    'page': <Номер страницы> (необязательный),
+                    'avatar_size': <размер аватаров в пикселях> (необязательный)
+                }
+
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Сериализованные данные найденных объектов в порядке
+            релевантности и ссылки на соседние страницы
+            {
+                '<collection_key>': [ ... ],
+                'previous_url': '<Ссылка на предыдущую страницу>',
+                'next_url': '<Ссылка на следующую страницу>'
+            }
+        """
+        query = request.query_params.get('q', '')
+        if not search.terms(query):
+            return Response(
+                {'error': 'Bad data', 'errors': {'q': ['Enter at least one word to search for.']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        pks = self.paginator.paginate_ranked(
+            lambda limit, offset: self.search_index.search(query, limit, offset), request
+        )
+        found = self.search_index.model.objects.only('pk', 'version', 'modified').in_bulk(pks)
+        context = {self.collection_key: self.get_representations([found[pk] for pk in pks if pk in found])}
+        context.update(self.paginator.get_html_context())
+        return Response(context, status=status.HTTP_200_OK)
+
+class UserSearch(SearchView):
+    """
+    Поиск пользователей по email, имени и фамилии
+    """
+
+    serializer_class = serializers.UserSerializerOnlyRead
+    queryset = models.User.objects.all()
+    representation_cache = cache.USERS
+    representation_reader = readers.UserReader
+    version_loader = staticmethod(conditional.user_versions)
+    search_index = search.USERS
+    collection_key = 'users'
+
+    def get_queryset(self):
+        queryset = super(UserSearch, self).get_queryset()
+        return self.serializer_class.setup_eager_loading(queryset)
+
+class OrganizationSearch(SearchView):
+    """
+    Поиск организаций по названию и описанию
+    """
+
+    serializer_class = serializers.OrganizationOnlyRead
+    queryset = models.Organization.objects.all()
+    representation_cache = cache.ORGANIZATIONS
+    representation_reader = readers.OrganizationReader
+    version_loader = staticmethod(conditional.organization_versions)
+    search_index = search.ORGANIZATIONS
+    collection_key = 'organizations'
+
+class OrganizationMembers(PaginationModeMixin, generics.ListAPIView):
+
+    permission_classes = [rest_perm.IsAuthenticated]
+    serializer_class = serializers.MemberSerializer
+
+    def get_queryset(self):
+        """
+        Возвращает набор запросов участников организации
+        по параметру пути запроса
+
+        Returns
+        -------
+        queryset: django.db.models.QuerySet
+            Набор запросов модели `api.models.User`
+        """
+        return models.User.objects.filter(organization=self.kwargs['pk'])
+
+    def get(self, request, *args, **kwargs):
+        """
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента
+
+            headers: 
+                {
+                    'Authorization': 'Bearer <JWT>'
+                }
+
+            path:
+                /organizations/<id организации>/members/
+
+            params:
+                {
+                    'pagination': 'cursor' (необязательный, постраничное
+                        отображение по курсору вместо номера страницы),
+                    'cursor': <курсор из ссылки 'next_url' или 'previous_url'>,
+                    'avatar_size': <размер аватаров в пикселях> (необязательный)
+                }
+            
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Список сериализованных данных участников организации 
+            с разбивкой для постраничного отображения
+
+            {
+                'users': [
+                            {
+                                'id': <id пользователя-1>, 
+                                'email': '<email-пользователя-1>', 
+                                'phone': '<Телефонный номер пользователя в международном формате>', 
+                                'first_name': '<Имя пользователя>', 
+                                'last_name': '<Фамилия пользователя>', 
+                                'avatar': '<http://абсолютная/ссылка/на/файл/аватара.ext>'
+                            },
+                            ...
+                ]
+            }
+        """
+        if not models.Organization.objects.filter(pk=kwargs['pk']).exists():
+            return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+
+        paginate_users = self.paginator.paginate_queryset(self.get_queryset(), request)
+        srd_users = self.serializer_class(paginate_users, context={'request': request}, many=True)
+        context = { 'users': srd_users.data }
         context.update(self.paginator.get_html_context())
-        return Response(context, status=status.HTTP_200_OK,)
\ No newline at end of file
+        return Response(context, status=status.HTTP_200_OK,)
+
+    def post(self, request, *args, **kwargs):
+        """
+        Добавляет и удаляет участников организации. Все
+        пользователи проверяются пакетными запросами, изменения
+        записываются в одной транзакции: если какого-либо
+        пользователя нет, участники не изменяются
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Запрос клиента
+
+            headers: 
+                {
+                    'Authorization': 'Bearer <JWT>',
+                    'Content-Type': 'application/json'
+                }
+
+            path:
+                /organizations/<id организации>/members/
+
+            json:
+                {
+                    'add': <Список id добавляемых пользователей [ 1, ..., n ]>,
+                    'remove': <Список id удаляемых пользователей [ 1, ..., n ]>
+                }
+
+        Returns
+        -------
+        json: rest_framework.response.Response
+            Количество добавленных и удалённых участников
+            и итоговое количество участников организации
+
+            {
+                'added': <количество добавленных участников>,
+                'removed': <количество удалённых участников>,
+                'users_count': <количество участников организации>
+            }
+        """
+        try:
+            organization = models.Organization.objects.get(pk=kwargs['pk'])
+        except models.Organization.DoesNotExist:
+            return Response({'error': 'Not Found'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = serializers.MembershipChangeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'error': 'Bad data', 'errors': serializer.errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            added, removed = memberships.change_members(organization, **serializer.validated_data)
+        except memberships.UsersNotFound as error:
+            return Response({'error': 'Bad data', 'errors': {
+                'users': [f'Invalid pk "{pk}" - object does not exist.' for pk in error.pks]
+            }}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'added': len(added),
+            'removed': len(removed),
+            'users_count': memberships.Membership.objects.filter(organization_id=organization.pk).count()
+        }, status=status.HTTP_200_OK)
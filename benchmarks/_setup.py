@@ -0,0 +1,50 @@
+"""
+Настройка Django для скриптов замеров производительности.
+
+Каждый замер работает с собственной временной базой данных
+SQLite, чтобы не затрагивать `db.sqlite3` проекта.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+def setup(database_name=None, migrate=True, overrides=None):
+    """
+    Настраивает Django на временную базу данных и создаёт таблицы
+
+    Parameters
+    ----------
+    database_name : str
+        Путь к файлу базы данных. По умолчанию создаётся
+        временный файл
+    migrate : bool
+        Создавать ли таблицы
+    overrides : dict
+        Значения настроек, заменяющие значения `settings.py`
+
+    Returns
+    -------
+    database_name : str
+        Путь к файлу базы данных
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    os.chdir(BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'user_organizations.settings')
+
+    if database_name is None:
+        database_name = tempfile.mkstemp(suffix='.sqlite3')[1]
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.DATABASES['default']['NAME'] = database_name
+    for name, value in (overrides or {}).items():
+        setattr(settings, name, value)
+    django.setup()
+    if migrate:
+        call_command('migrate', run_syncdb=True, verbosity=0)
+    return database_name
@@ -0,0 +1,165 @@
+"""
+Замер пропускной способности представлений на чтение при
+большом числе одновременных соединений: синхронные представления
+через WSGI (поток на соединение), те же представления через ASGI
+и асинхронные представления `/api/async/...` через ASGI.
+
+Приложения вызываются в процессе замера, без HTTP-сервера, поэтому
+замер показывает накладные расходы Django и модели потоков, а не
+сетевого стека.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.async_reads --connections 200 --requests 4000
+"""
+import argparse
+import asyncio
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks._setup import setup
+
+PATHS = ('users/?page={page}', 'organizations/?page={page}')
+
+def populate(users_count, organizations_count):
+    from api import models
+
+    models.User.objects.bulk_create(
+        (models.User(email=f'user-{i}@yandex.ru') for i in range(users_count)), batch_size=2000
+    )
+    models.Organization.objects.bulk_create(
+        (models.Organization(name=f'Организация {i}') for i in range(organizations_count)), batch_size=2000
+    )
+    through = models.Organization.users.through
+    user_ids = list(models.User.objects.values_list('pk', flat=True))
+    organization_ids = list(models.Organization.objects.values_list('pk', flat=True))
+    through.objects.bulk_create(
+        (through(user_id=user_id, organization_id=organization_ids[user_id % len(organization_ids)])
+         for user_id in user_ids),
+        batch_size=2000
+    )
+    return models.User.objects.first()
+
+def urls(prefix, count, pages):
+    return [
+        f'/api/{prefix}' + PATHS[i % len(PATHS)].format(page=1 + (i // len(PATHS)) % pages)
+        for i in range(count)
+    ]
+
+class ThreadCounter:
+    """
+    Запоминает наибольшее число потоков процесса во время замера
+    """
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.005)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        return self.peak
+
+def run_wsgi(paths, connections, token):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def request(url):
+        parts = urlsplit(url)
+        environ = {
+            'PATH_INFO': parts.path, 'QUERY_STRING': parts.query,
+            'HTTP_AUTHORIZATION': f'Bearer {token}', 'wsgi.input': io.BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        body = application(environ, lambda status, headers: statuses.append(status))
+        b''.join(body)
+        body.close()
+        return statuses[0]
+
+    #Многопоточный WSGI-сервер обслуживает каждое соединение потоком:
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        return list(executor.map(request, paths))
+
+def run_asgi(paths, connections, token):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+
+    async def request(url, semaphore):
+        parts = urlsplit(url)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': parts.path,
+            'query_string': parts.query.encode(), 'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            await application(scope, receive, send)
+        return messages[0]['status']
+
+    async def main():
+        semaphore = asyncio.Semaphore(connections)
+        return await asyncio.gather(*(request(url, semaphore) for url in paths))
+
+    return asyncio.run(main())
+
+def measure(name, run, paths, connections, token):
+    counter = ThreadCounter()
+    started = time.perf_counter()
+    statuses = run(paths, connections, token)
+    elapsed = time.perf_counter() - started
+    peak = counter.stop()
+    failed = sum(not str(status).startswith('200') for status in statuses)
+    print(
+        f'{name}: {len(paths) / elapsed:,.0f} запросов/с, '
+        f'потоков: {peak}, ошибок: {failed}'
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--organizations', type=int, default=200)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    args = parser.parse_args()
+
+    database_name = setup()
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    token = str(AccessToken.for_user(populate(args.users, args.organizations)))
+    pages = max(1, min(args.users, args.organizations) // 10)
+
+    #Прогрев: кэш представлений заполняется до замеров:
+    run_wsgi(sorted(set(urls('', args.requests, pages))), 4, token)
+
+    measure('WSGI, синхронные представления', run_wsgi, urls('', args.requests, pages), args.connections, token)
+    measure('ASGI, синхронные представления', run_asgi, urls('', args.requests, pages), args.connections, token)
+    measure('ASGI, /api/async/', run_asgi, urls('async/', args.requests, pages), args.connections, token)
+
+    os.remove(database_name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Замер пропускной способности команд `export_directory`
+и `import_directory` на SQLite.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.directory --users 200000 --organizations 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks._setup import setup
+
+def populate(users_count, organizations_count, memberships_per_user):
+    from django.contrib.auth.hashers import make_password
+    from api import models
+
+    password = make_password('qwerty1234')
+    models.User.objects.bulk_create(
+        (models.User(email=f'user-{i}@yandex.ru', password=password, phone=f'+7917{i:07d}')
+         for i in range(users_count)),
+        batch_size=2000
+    )
+    models.Organization.objects.bulk_create(
+        (models.Organization(name=f'Организация {i}') for i in range(organizations_count)),
+        batch_size=2000
+    )
+    through = models.Organization.users.through
+    user_ids = list(models.User.objects.values_list('pk', flat=True))
+    organization_ids = list(models.Organization.objects.values_list('pk', flat=True))
+    through.objects.bulk_create(
+        (through(user_id=user_id, organization_id=organization_ids[(user_id + k) % len(organization_ids)])
+         for user_id in user_ids for k in range(memberships_per_user)),
+        batch_size=2000
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--organizations', type=int, default=1000)
+    parser.add_argument('--memberships-per-user', type=int, default=2)
+    args = parser.parse_args()
+
+    source = setup()
+    from django.core.management import call_command
+    from django.db import connection
+    from api import models
+
+    populate(args.users, args.organizations, args.memberships_per_user)
+    rows = (
+        models.User.objects.count()
+        + models.Organization.objects.count()
+        + models.Organization.users.through.objects.count()
+    )
+    path = tempfile.mkstemp(suffix='.jsonl.gz')[1]
+
+    started = time.perf_counter()
+    call_command('export_directory', path, verbosity=0, stdout=open(os.devnull, 'w'))
+    export_time = time.perf_counter() - started
+
+    models.Organization.users.through.objects.all().delete()
+    models.Organization.objects.all().delete()
+    models.User.objects.all().delete()
+    connection.close()
+
+    started = time.perf_counter()
+    call_command('import_directory', path, verbosity=0, stdout=open(os.devnull, 'w'))
+    import_time = time.perf_counter() - started
+
+    print(f'строк: {rows}, размер выгрузки: {os.path.getsize(path) / 2**20:.1f} МБ')
+    print(f'export_directory: {export_time:.2f} с, {rows / export_time:,.0f} строк/с')
+    print(f'import_directory: {import_time:.2f} с, {rows / import_time:,.0f} строк/с')
+
+    os.remove(path)
+    os.remove(source)
+
+if __name__ == '__main__':
+    main()
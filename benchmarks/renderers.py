@@ -0,0 +1,90 @@
+"""
+Замер рендеринга и разбора тел запросов `json` (стандартная
+библиотека, `JSONRenderer`/`JSONParser` DRF), orjson (`api.renderers.ORJSONRenderer`,
+`api.parsers.ORJSONParser`) и MessagePack (`api.renderers.MessagePackRenderer`,
+`api.parsers.MessagePackParser`, если установлена библиотека msgpack).
+
+Данные - представления страниц `/api/users/` и `/api/organizations/`
+из 10 и 100 объектов и тело запроса `/api/users/bulk/`.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.renderers --users 20000 --organizations 1000 --repeat 200
+"""
+import argparse
+import io
+import os
+import statistics
+import time
+
+from benchmarks._setup import setup
+from benchmarks.directory import populate
+from benchmarks.serializers import make_view
+
+def payloads(user_ids, organization_ids):
+    from api import views
+
+    result = []
+    for view_class, path, key, ids in (
+        (views.Users, '/api/users/', 'users', user_ids),
+        (views.Organizations, '/api/organizations/', 'organizations', organization_ids),
+    ):
+        view = make_view(view_class, path, {})
+        for page_size in (10, 100):
+            representations = view.render_representations(ids[:page_size])
+            result.append((f'{path} страница {page_size}', {
+                key: list(representations.values()),
+                'previous_url': None, 'next_url': f'http://127.0.0.1:8082{path}?page=2',
+            }))
+    result.append(('/api/users/bulk/ 1000 записей', {'users': [
+        {'email': f'bulk-{i}@yandex.ru', 'password': 'qwerty1234', 'phone': f'+7917{i:07d}',
+         'first_name': 'Иван', 'last_name': 'Иванов'}
+        for i in range(1000)
+    ]}))
+    return result
+
+def timing(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--organizations', type=int, default=1000)
+    parser.add_argument('--memberships-per-user', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    database_name = setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api import models, parsers, renderers
+
+    populate(args.users, args.organizations, args.memberships_per_user)
+    models.User.objects.update(first_name='Иван', last_name='Иванов', avatar='avatars/avatar.png')
+    formats = [('json', JSONRenderer(), JSONParser())]
+    if renderers.orjson is not None:
+        formats.append(('orjson', renderers.ORJSONRenderer(), parsers.ORJSONParser()))
+    if renderers.msgpack is not None:
+        formats.append(('msgpack', renderers.MessagePackRenderer(), parsers.MessagePackParser()))
+
+    user_ids = list(models.User.objects.values_list('pk', flat=True))
+    organization_ids = list(models.Organization.objects.values_list('pk', flat=True))
+    for name, data in payloads(user_ids, organization_ids):
+        print(name)
+        for format_name, renderer, format_parser in formats:
+            body = renderer.render(data)
+            rendering = timing(lambda: renderer.render(data), args.repeat)
+            parsing = timing(lambda: format_parser.parse(io.BytesIO(body)), args.repeat)
+            print(
+                f'    {format_name}: {len(body) / 1024:.1f} КБ, рендеринг {rendering:.3f} мс, '
+                f'разбор {parsing:.3f} мс'
+            )
+    os.remove(database_name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Замер задержки поиска `/api/users/search/` и
+`/api/organizations/search/` на SQLite FTS5.
+
+Запросы - начала имён, фамилий, email-ов и названий случайных
+записей базы данных (от 2 до 6 символов, одно или два слова).
+Замеряется полная обработка запроса представлением в процессе,
+без HTTP-сервера.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.search --users 1000000 --queries 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from benchmarks._setup import setup
+
+FIRST_NAMES = (
+    'Иван', 'Пётр', 'Сергей', 'Андрей', 'Алексей', 'Дмитрий', 'Михаил', 'Николай', 'Александр',
+    'Владимир', 'Евгений', 'Олег', 'Павел', 'Роман', 'Тимур', 'Артём', 'Мария', 'Анна', 'Елена',
+    'Ольга', 'Наталья', 'Татьяна', 'Ирина', 'Светлана', 'Юлия', 'Ксения', 'Дарья', 'Алина',
+    'Ivan', 'Peter', 'Sergey', 'Andrey', 'Maria', 'Anna', 'Elena', 'Olga',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+    'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров',
+    'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+    'Захаров', 'Зайцев', 'Соловьёв', 'Борисов', 'Яковлев', 'Григорьев', 'Романов', 'Воробьёв',
+    'Ivanov', 'Smirnov', 'Kuznetsov', 'Popov', 'Petrov', 'Sokolov',
+)
+DOMAINS = ('yandex.ru', 'mail.ru', 'gmail.com', 'rambler.ru', 'example.org')
+WORDS = (
+    'нефтехимия', 'энергетика', 'машиностроение', 'банк', 'холдинг', 'строительство',
+    'логистика', 'радиосвязь', 'приборостроение', 'металлургия', 'разработка', 'исследования',
+)
+
+def populate(users_count, organizations_count, rng):
+    from api import models
+
+    batch = []
+    for i in range(users_count):
+        batch.append(models.User(
+            email=f'{rng.choice(LAST_NAMES).lower()}.{i}@{rng.choice(DOMAINS)}',
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+        ))
+        if len(batch) == 10000:
+            models.User.objects.bulk_create(batch)
+            batch = []
+    models.User.objects.bulk_create(batch)
+    models.Organization.objects.bulk_create(
+        models.Organization(
+            name=f'{rng.choice(WORDS).capitalize()} {rng.choice(LAST_NAMES)} {i}',
+            description=' '.join(rng.sample(WORDS, 4)),
+        )
+        for i in range(organizations_count)
+    )
+
+def prefix(word, rng):
+    return word[:rng.randint(2, min(6, len(word)))]
+
+def queries(model, fields, count, rng):
+    ids = list(model.objects.values_list('pk', flat=True))
+    rows = model.objects.in_bulk(rng.sample(ids, min(count, len(ids))))
+    result = []
+    for row in rows.values():
+        words = [word for field in fields for word in str(getattr(row, field) or '').replace('@', ' ').replace('.', ' ').split()]
+        chosen = rng.sample(words, min(len(words), rng.choice((1, 2))))
+        result.append(' '.join(prefix(word, rng) for word in chosen))
+    return result
+
+def measure(name, client, path, requests):
+    timings = []
+    for query in requests:
+        started = time.perf_counter()
+        response = client.get(path, {'q': query})
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.content
+    percentiles = statistics.quantiles(timings, n=100)
+    print(
+        f'{name}: {len(timings)} запросов, p50 {percentiles[49]:.1f} мс, '
+        f'p99 {percentiles[98]:.1f} мс, максимум {max(timings):.1f} мс'
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--organizations', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    database_name = setup()
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+    from api import models
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    populate(args.users, args.organizations, rng)
+    print(f'Заполнение базы данных: {time.perf_counter() - started:.0f} с')
+
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(models.User.objects.first())}')
+    measure(
+        '/api/users/search/', client, '/api/users/search/',
+        queries(models.User, ('email', 'first_name', 'last_name'), args.queries, rng)
+    )
+    measure(
+        '/api/organizations/search/', client, '/api/organizations/search/',
+        queries(models.Organization, ('name', 'description'), args.queries, rng)
+    )
+    os.remove(database_name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Замер построения представлений `/api/users/` и `/api/organizations/`
+сериализаторами DRF и читателями `api.readers` из строк `values_list`.
+
+Замеряется только построение представлений страницы без кэша
+представлений (`render_representations` представления), запросы
+к базе данных входят в замер.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.serializers --users 20000 --organizations 1000 --pages 200
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from urllib.parse import urlencode
+
+from benchmarks._setup import setup
+from benchmarks.directory import populate
+
+def make_view(view_class, path, params):
+    from rest_framework.test import APIRequestFactory
+
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = view.initialize_request(APIRequestFactory().get(path, params))
+    return view
+
+def measure(view, pages, fast):
+    from django.conf import settings
+
+    settings.FAST_READ_SERIALIZERS = fast
+    timings = []
+    for pks in pages:
+        started = time.perf_counter()
+        representations = view.render_representations(pks)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(representations) == len(pks)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--organizations', type=int, default=1000)
+    parser.add_argument('--memberships-per-user', type=int, default=2)
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    database_name = setup()
+    from api import models, views
+
+    populate(args.users, args.organizations, args.memberships_per_user)
+    models.User.objects.update(first_name='Иван', last_name='Иванов', avatar='avatars/avatar.png')
+    rng = random.Random(0)
+    user_ids = list(models.User.objects.values_list('pk', flat=True))
+    organization_ids = list(models.Organization.objects.values_list('pk', flat=True))
+
+    cases = (
+        (views.Users, '/api/users/', {}, user_ids),
+        (views.Users, '/api/users/', {'fields': 'email,first_name'}, user_ids),
+        (views.Users, '/api/users/', {'depth': 1}, user_ids),
+        (views.Organizations, '/api/organizations/', {}, organization_ids),
+    )
+    for view_class, path, params, ids in cases:
+        for page_size in (10, 100):
+            pages = [rng.sample(ids, page_size) for _ in range(args.pages)]
+            view = make_view(view_class, path, params)
+            drf, fast = measure(view, pages, False), measure(view, pages, True)
+            print(
+                f'{path}{"?" + urlencode(params) if params else ""} страница {page_size}: сериализаторы {drf:.2f} мс, '
+                f'читатель {fast:.2f} мс, ускорение {drf / fast:.1f}x'
+            )
+    os.remove(database_name)
+
+if __name__ == '__main__':
+    main()
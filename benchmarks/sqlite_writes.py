@@ -0,0 +1,128 @@
+"""
+Нагрузочный тест записи в SQLite несколькими процессами, как
+у нескольких рабочих процессов gunicorn: каждый процесс попеременно
+создаёт пользователей (как `Registration`) и изменяет их
+в транзакции чтения-записи (как `UserEdit`).
+
+Тест выполняется дважды, каждый раз с новой базой данных:
+с настройками SQLite по умолчанию (журнал отката, транзакции
+`BEGIN`) и с настройками `settings.SQLITE_PRAGMAS` и
+`settings.SQLITE_IMMEDIATE_TRANSACTIONS`.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.sqlite_writes --processes 8 --transactions 200
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmarks._setup import setup
+
+SEED_USERS = 50
+DEFAULT_SQLITE = {
+    'SQLITE_PRAGMAS': {},
+    'SQLITE_IMMEDIATE_TRANSACTIONS': False,
+}
+
+def prepare(database_name, overrides):
+    setup(database_name, overrides=overrides)
+    from api import models
+
+    models.User.objects.bulk_create(
+        models.User(email=f'seed-{i}@yandex.ru') for i in range(SEED_USERS)
+    )
+
+def write(database_name, overrides, worker, transactions, start):
+    """
+    Выполняет `transactions` транзакций записи
+
+    Returns
+    -------
+    errors : int
+        Число транзакций, завершившихся ошибкой `database is locked`
+    """
+    setup(database_name, migrate=False, overrides=overrides)
+    from django.db import OperationalError, transaction
+    from api import models
+
+    user_ids = list(models.User.objects.values_list('pk', flat=True))
+    errors = 0
+    start.wait()
+    for i in range(transactions):
+        try:
+            if i % 2:
+                with transaction.atomic():
+                    user = models.User.objects.get(pk=random.choice(user_ids))
+                    user.first_name = f'{worker}-{i}'
+                    user.save(update_fields=['first_name'])
+            else:
+                models.User.objects.create(email=f'worker-{worker}-{i}@yandex.ru')
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            errors += 1
+    return errors
+
+def stress(processes, transactions, overrides=None):
+    """
+    Запускает `processes` процессов записи в новую базу данных
+
+    Parameters
+    ----------
+    processes : int
+        Число процессов
+    transactions : int
+        Число транзакций каждого процесса
+    overrides : dict
+        Значения настроек процессов. По умолчанию - настройки
+        `settings.py`
+
+    Returns
+    -------
+    errors : int
+        Общее число ошибок `database is locked`
+    rate : float
+        Число транзакций в секунду
+    """
+    database_name = tempfile.mkstemp(suffix='.sqlite3')[1]
+    context = multiprocessing.get_context('spawn')
+    try:
+        with context.Pool(1) as pool:
+            pool.apply(prepare, (database_name, overrides))
+
+        with context.Manager() as manager, context.Pool(processes) as pool:
+            #Процессы начинают запись одновременно, после настройки Django:
+            start = manager.Barrier(processes + 1)
+            results = [
+                pool.apply_async(write, (database_name, overrides, worker, transactions, start))
+                for worker in range(processes)
+            ]
+            start.wait(timeout=120)
+            started = time.perf_counter()
+            errors = sum(result.get() for result in results)
+            elapsed = time.perf_counter() - started
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(database_name + suffix):
+                os.remove(database_name + suffix)
+    return errors, processes * transactions / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--transactions', type=int, default=200)
+    args = parser.parse_args()
+
+    for name, overrides in (('SQLite по умолчанию', DEFAULT_SQLITE), ('settings.SQLITE_PRAGMAS', None)):
+        errors, rate = stress(args.processes, args.transactions, overrides)
+        print(
+            f'{name}: {rate:,.0f} транзакций/с, '
+            f'ошибок database is locked: {errors} из {args.processes * args.transactions}'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 import configparser
+import importlib.util
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -53,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'user_organizations.urls'
@@ -82,11 +85,60 @@ WSGI_APPLICATION = 'user_organizations.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+#Прагмы каждого нового соединения SQLite (`api.sqlite`):
+SQLITE_PRAGMAS = {
+    'busy_timeout': config.getint('sqlite', 'busy_timeout', fallback=5000),
+    'journal_mode': config.get('sqlite', 'journal_mode', fallback='wal'),
+    'synchronous': config.get('sqlite', 'synchronous', fallback='normal'),
+    'cache_size': config.getint('sqlite', 'cache_size', fallback=-65536),
+    'mmap_size': config.getint('sqlite', 'mmap_size', fallback=268435456),
+}
+SQLITE_IMMEDIATE_TRANSACTIONS = config.getboolean('sqlite', 'immediate_transactions', fallback=True)
+
+#Реплики основной базы данных только для чтения: файлы SQLite через запятую
+REPLICA_NAMES = [name.strip() for name in config.get('replicas', 'databases', fallback='').split(',') if name.strip()]
+DATABASE_REPLICAS = []
+for number, name in enumerate(REPLICA_NAMES, 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+DATABASE_STICKY_SECONDS = config.getint('replicas', 'sticky_seconds', fallback=5)
+DATABASE_STICKY_COOKIE = 'primary_until'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+REPRESENTATIONS_CACHE = 'representations'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    REPRESENTATIONS_CACHE: {
+        'BACKEND': config.get(
+            'representations_cache', 'backend',
+            fallback='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config.get('representations_cache', 'location', fallback='representations'),
+        'TIMEOUT': config.getint('representations_cache', 'timeout', fallback=300),
+        'OPTIONS': {
+            'MAX_ENTRIES': config.getint('representations_cache', 'max_entries', fallback=10000),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -127,22 +179,43 @@ MEDIA_ROOT = BASE_DIR.joinpath('api//user_avatars')
 MEDIA_URL = '/'
 STATIC_URL = '/static/'
 
+AVATAR_UPLOAD_MAX_SIZE = config.getint('avatars', 'max_upload_size', fallback=10 * 1024 * 1024)
+AVATAR_UPLOADS_ROOT = BASE_DIR.joinpath('api//avatar_uploads')
+AVATAR_PROCESSING = config.get('avatars', 'processing', fallback='pool')
+AVATAR_WORKERS = config.getint('avatars', 'workers', fallback=2)
+AVATAR_JOB_MAX_ATTEMPTS = config.getint('avatars', 'max_attempts', fallback=3)
+AVATAR_MAX_PIXELS = config.getint('avatars', 'max_pixels', fallback=40_000_000)
+AVATAR_STORAGE = config.get('avatars', 'storage', fallback='per_user')
+AVATAR_SERVE = config.get('avatars', 'serve', fallback='django')
+AVATAR_ACCEL_PREFIX = config.get('avatars', 'accel_prefix', fallback='/protected/avatars/')
+
+PHONE_DEFAULT_REGION = config.get('phones', 'default_region', fallback='RU')
+
+BULK_MAX_ITEMS = config.getint('bulk', 'max_items', fallback=5000)
+BULK_PASSWORD_WORKERS = config.getint('bulk', 'password_workers', fallback=os.cpu_count() or 1)
+BULK_MAX_MEMBERS = config.getint('bulk', 'max_members', fallback=10000)
+
 STATIC_DIRS = [
     BASE_DIR / "static",
     '/user_avatars'
 ]
 
 SITE_ID = 1
+#MessagePack предлагается клиентам, только если установлена библиотека msgpack:
+MSGPACK_AVAILABLE = importlib.util.find_spec('msgpack') is not None
+
 REST_FRAMEWORK = {
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'api.parsers.ORJSONParser',
+        *(['api.parsers.MessagePackParser'] if MSGPACK_AVAILABLE else []),
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
+        *(['api.renderers.MessagePackRenderer'] if MSGPACK_AVAILABLE else []),
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication'
+        'api.authentication.CachedBasicAuthentication',
+        'api.authentication.CachedJWTAuthentication'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
@@ -155,4 +228,18 @@ SIMPLE_JWT = {
     "SIGNING_KEY": config["secret_key"]["secret_key"]
 }
 
+JWT_PRINCIPAL_CACHE_TTL = config.getint('jwt', 'principal_cache_ttl', fallback=60)
+JWT_PRINCIPAL_CACHE_SIZE = config.getint('jwt', 'principal_cache_size', fallback=10000)
+JWT_STATELESS_AUTHENTICATION = config.getboolean('jwt', 'stateless', fallback=False)
+BASIC_AUTH_CACHE_TTL = config.getint('basic_auth', 'cache_ttl', fallback=300)
+BASIC_AUTH_CACHE_SIZE = config.getint('basic_auth', 'cache_size', fallback=10000)
+
+#Наибольшее число совпадений поискового запроса, ранжируемых `bm25` (`api.search`):
+SEARCH_RANK_LIMIT = config.getint('search', 'rank_limit', fallback=5000)
+
+#Построение представлений на чтение из строк `values_list` без сериализаторов DRF:
+FAST_READ_SERIALIZERS = config.getboolean('serializers', 'fast_read', fallback=True)
+
+ASYNC_READ_WORKERS = config.getint('async', 'workers', fallback=8)
+
 
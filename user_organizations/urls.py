@@ -13,11 +13,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 
+from api.views import AvatarFile
+
 from . import settings
 
 urlpatterns = [
@@ -25,8 +26,10 @@ urlpatterns = [
     path('api/', include('api.urls')),
 ]
 
-if settings.MEDIA_ROOT:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
 if settings.DEBUG:
     urlpatterns += staticfiles_urlpatterns()
+
+if settings.MEDIA_ROOT:
+    urlpatterns += [
+        path(f'{settings.MEDIA_URL.lstrip("/")}<path:name>', AvatarFile.as_view(), name='avatar-file'),
+    ]